@@ -0,0 +1,115 @@
+"""Direcciones MAC a partir de la tabla ARP del PC.
+
+``getARPInfo`` en el firmware siempre devuelve "Unknown", así que la columna
+MAC no aporta nada. ``ArpCache`` lee la tabla de vecinos del kernel
+(``/proc/net/arp``) y mantiene un índice IP -> MAC:
+
+- el archivo solo se vuelve a interpretar si su contenido cambió, y como
+  mucho una vez cada ``min_interval`` segundos;
+- las entradas que desaparecen de la tabla se conservan ``ttl`` segundos;
+- la búsqueda es un acceso a diccionario por dispositivo.
+
+En sistemas sin ``/proc/net/arp`` el índice queda vacío y los dispositivos
+no se modifican.
+"""
+import time
+
+ARP_PATH = "/proc/net/arp"
+UNKNOWN_MACS = {"", "Unknown", "00:00:00:00:00:00"}
+
+# Flag ATF_COM: la entrada está completa (tiene MAC)
+ATF_COM = 0x2
+
+
+class ArpCache:
+    """Índice IP -> MAC alimentado por la tabla ARP del sistema"""
+
+    def __init__(self, path=ARP_PATH, ttl=300, min_interval=2.0):
+        self.path = path
+        self.ttl = ttl
+        self.min_interval = min_interval
+        self._raw = None
+        self._last_read = 0.0
+        self._current = {}
+        self._stale = {}
+
+    def _parse(self, raw):
+        table = {}
+        for line in raw.splitlines()[1:]:
+            fields = line.split()
+            if len(fields) < 4:
+                continue
+            ip, flags, mac = fields[0], fields[2], fields[3]
+            try:
+                complete = int(flags, 16) & ATF_COM
+            except ValueError:
+                continue
+            if complete and mac not in UNKNOWN_MACS:
+                table[ip] = mac.upper()
+        return table
+
+    def refresh(self, force=False):
+        """Releer la tabla si pasó ``min_interval`` y su contenido cambió"""
+        now = time.monotonic()
+        if not force and now - self._last_read < self.min_interval:
+            return
+        self._last_read = now
+        try:
+            with open(self.path, encoding="ascii", errors="replace") as f:
+                raw = f.read()
+        except OSError:
+            return
+        if raw == self._raw:
+            return
+        self._raw = raw
+
+        table = self._parse(raw)
+        for ip, mac in self._current.items():
+            if ip not in table:
+                self._stale[ip] = (mac, now)
+        for ip in table:
+            self._stale.pop(ip, None)
+        self._current = table
+
+        # Olvidar las entradas antiguas que ya superaron el TTL
+        expired = [ip for ip, (_, since) in self._stale.items() if now - since > self.ttl]
+        for ip in expired:
+            del self._stale[ip]
+
+    def lookup(self, ip):
+        """MAC conocida para ``ip`` o None"""
+        mac = self._current.get(ip)
+        if mac is not None:
+            return mac
+        stale = self._stale.get(ip)
+        if stale is not None and time.monotonic() - stale[1] <= self.ttl:
+            return stale[0]
+        return None
+
+    def __len__(self):
+        return len(self._current) + len(self._stale)
+
+    def enrich(self, devices):
+        """Completar la MAC de los dispositivos que no la tienen (in situ)"""
+        self.refresh()
+        for device in devices:
+            if device.mac in UNKNOWN_MACS:
+                mac = self.lookup(device.ip)
+                if mac:
+                    device.mac = mac
+        return devices
+
+
+_cache = None
+
+
+def get_arp_cache():
+    """Caché ARP compartida por toda la aplicación"""
+    global _cache
+    if _cache is None:
+        _cache = ArpCache()
+    return _cache
+
+
+def enrich_devices(devices):
+    return get_arp_cache().enrich(devices)
@@ -0,0 +1,159 @@
+"""Circuit breaker por endpoint y plazos por operación para ``esp32_client``.
+
+Con el ESP32 fuera de la red cada petición esperaba su timeout completo (5 s
+para ``/status``, hasta 30 s para ``/connect``). Ahora, tras
+``FAILURE_THRESHOLD`` fallos seguidos de un endpoint su circuito se abre y las
+peticiones a ese endpoint fallan al instante con ``CircuitOpenError``.
+
+Mientras haya algún circuito abierto, un ``HealthProbe`` intenta cada
+``PROBE_INTERVAL`` segundos una conexión TCP al ESP32 (sin HTTP: no ocupa al
+servidor de la placa). Cuando responde, los circuitos pasan a semiabiertos:
+la siguiente petición de cada endpoint se deja pasar como prueba y, según su
+resultado, el circuito se cierra o se vuelve a abrir. Los oyentes de
+``add_recovery_listener`` reciben la IP del ESP32 en cuanto el sondeo
+responde, así que la interfaz detecta la recuperación en un intervalo de
+sondeo en lugar de tras una cola de timeouts.
+
+``deadline_timeout`` recorta el timeout de una petición para que la operación
+completa (espera en la cola del ejecutor incluida) no supere su plazo.
+"""
+import socket
+import threading
+import time
+
+import requests
+
+FAILURE_THRESHOLD = 2
+PROBE_INTERVAL = 2.0    # s entre sondeos TCP con algún circuito abierto
+PROBE_TIMEOUT = 1.0     # s para establecer la conexión del sondeo
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """El circuito del endpoint está abierto: no se intenta la petición"""
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """La operación agotó su plazo antes de poder enviarse"""
+
+
+class CircuitBreaker:
+    """Estado del circuito de un endpoint (cerrado, abierto o semiabierto)"""
+
+    def __init__(self, path, failure_threshold=FAILURE_THRESHOLD):
+        self.path = path
+        self.failure_threshold = failure_threshold
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+
+    def allow(self):
+        """¿Se puede enviar la petición? En semiabierto solo pasa una prueba a la vez"""
+        if self.state == CLOSED:
+            return True
+        if self.state == HALF_OPEN and not self._trial:
+            self._trial = True
+            return True
+        return False
+
+    def record_success(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+
+    def record_failure(self):
+        """Contar un fallo; devuelve True si el circuito se acaba de abrir"""
+        self.failures += 1
+        self._trial = False
+        if self.state == HALF_OPEN or (self.state == CLOSED
+                                       and self.failures >= self.failure_threshold):
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+            return True
+        return False
+
+    def half_open(self):
+        if self.state == OPEN:
+            self.state = HALF_OPEN
+            self._trial = False
+
+
+class HealthProbe:
+    """Hilo que sondea el ESP32 por TCP mientras haya circuitos abiertos"""
+
+    def __init__(self, esp32_ip, on_alive, interval=PROBE_INTERVAL, timeout=PROBE_TIMEOUT):
+        host, _, port = esp32_ip.partition(":")
+        self.address = (host, int(port) if port else 80)
+        self.esp32_ip = esp32_ip
+        self.on_alive = on_alive
+        self.interval = interval
+        self.timeout = timeout
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def alive(self):
+        try:
+            with socket.create_connection(self.address, self.timeout):
+                return True
+        except OSError:
+            return False
+
+    def start(self):
+        """Arrancar el hilo si no está ya en marcha"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name=f"probe-{self.esp32_ip}",
+                                            daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if self.alive():
+                # Antes de avisar: si la petición de prueba falla, ``start``
+                # debe poder lanzar otro hilo
+                with self._lock:
+                    self._thread = None
+                self.on_alive()
+                return
+
+    def stop(self):
+        self._stop.set()
+
+
+_listeners = []
+
+
+def add_recovery_listener(callback):
+    """``callback(esp32_ip)`` al volver a responder un ESP32 con circuitos
+    abiertos; se llama desde el hilo del sondeo"""
+    if callback not in _listeners:
+        _listeners.append(callback)
+
+
+def remove_recovery_listener(callback):
+    if callback in _listeners:
+        _listeners.remove(callback)
+
+
+def notify_recovered(esp32_ip):
+    for callback in list(_listeners):
+        callback(esp32_ip)
+
+
+def deadline_timeout(timeout, deadline, path):
+    """Recortar ``(conexión, lectura)`` al tiempo que queda hasta ``deadline``"""
+    if deadline is None:
+        return timeout
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise DeadlineExceeded(f"Plazo agotado para {path} antes de enviar la petición")
+    connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+    return min(connect, remaining), min(read, remaining)
@@ -0,0 +1,409 @@
+"""Benchmarks de las interfaces contra el emulador del ESP32.
+
+Arranca un ``ESP32Emulator`` local (latencia, número de hosts y de redes
+configurables) y mide, sin pantalla (plataforma ``offscreen`` de Qt):
+
+- ``requests.*``: peticiones por segundo y latencia de ``esp32_client`` con
+  varios hilos, el mismo camino que siguen los hilos de ``RequestExecutor``
+  (respuestas completas y, para ``/status`` y ``/devices``, ``304``).
+- ``e2e.devices``: desde que cambia la lista de dispositivos del emulador
+  hasta que ``WiFiManagerGUI.on_devices_update`` termina de pintarla (canal
+  de eventos, ``RequestExecutor`` y repintado incluidos).
+- ``e2e.refresh_status``: ``WiFiManagerUI.refresh_status`` de ``frontend``
+  hasta que se pinta la respuesta.
+- ``render.*``: tiempo de cada repintado con registros ya decodificados
+  (``on_devices_update``, ``on_status_update``, ``on_devices_result`` y, si
+  hay pantalla para Tk, ``populate_devices_list`` de ``InterfazC1``).
+
+Con ``--replay`` los repintados usan las respuestas de ``/status`` y
+``/devices`` de una captura de campo (``esp32_capture``) en lugar de listas
+generadas por el emulador.
+
+Los ficheros de historial y de logs se escriben en un directorio temporal.
+Con ``--baseline`` se comparan los resultados con los de una ejecución
+anterior (``--json``) y se sale con código 1 si algo empeora más de
+``--tolerance``.
+
+Uso::
+
+    python esp32_bench.py
+    python esp32_bench.py --hosts 200 --networks 40 --latency 0.02 --json base.json
+    python esp32_bench.py --hosts 200 --networks 40 --latency 0.02 --baseline base.json
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from importlib.machinery import SourceFileLoader
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from esp32_capture import read_capture
+from esp32_client import CONDITIONAL_PATHS, OPERATIONS, close_all, get_client, operation_deadline
+from esp32_emulator import DEFAULT_NETWORKS, ESP32Emulator, ESP32State, mask_for_hosts, synthetic_networks
+from esp32_records import PayloadDecoder
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REQUEST_OPERATIONS = ("status", "devices", "config", "scan_wifi")
+DEFAULT_TOLERANCE = 0.25
+WAIT_TIMEOUT = 10000    # ms por actualización antes de darla por perdida
+
+# Opciones que cambian la carga: comparar con otras no tiene sentido
+WORKLOAD_OPTIONS = ("hosts", "networks", "latency", "churn", "workers", "replay")
+
+# Métrica -> True si más es mejor (para comparar con --baseline)
+HIGHER_IS_BETTER = {"rps": True, "p50_ms": False, "p95_ms": False}
+
+
+def summarize(samples, elapsed=None):
+    """Resumen de una serie de duraciones (s) en ms; ``rps`` si se da ``elapsed``"""
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+    result = {
+        "count": len(samples),
+        "mean_ms": statistics.fmean(samples) * 1000,
+        "p50_ms": ordered[len(ordered) // 2] * 1000,
+        "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+        "max_ms": ordered[-1] * 1000,
+    }
+    if elapsed:
+        result["rps"] = len(samples) / elapsed
+    return result
+
+
+def load_frontend(filename):
+    """Cargar una interfaz del repositorio cuyo nombre de fichero no es importable"""
+    name = os.path.splitext(filename)[0].replace(" ", "_")
+    return SourceFileLoader(name, os.path.join(HERE, filename)).load_module()
+
+
+def timed(function):
+    """Envolver ``function`` y guardar la duración de cada llamada en ``.samples``"""
+    def wrapper(*args):
+        started = time.perf_counter()
+        try:
+            return function(*args)
+        finally:
+            wrapper.samples.append(time.perf_counter() - started)
+            wrapper.finished = time.perf_counter()
+    wrapper.samples = []
+    wrapper.finished = None
+    return wrapper
+
+
+def change_devices(state):
+    """Forzar un cambio en la lista de dispositivos del emulador"""
+    with state.lock:
+        version = state.devices_version
+        while state.devices_version == version:
+            state.scan_devices()
+
+
+class Bench:
+    """Emulador, aplicación Qt y resultados de una ejecución"""
+
+    def __init__(self, args):
+        self.args = args
+        self.results = {}
+        networks = (DEFAULT_NETWORKS if args.networks is None
+                    else synthetic_networks(args.networks, args.seed))
+        self.state_options = dict(hosts=args.hosts, churn=args.churn, networks=networks,
+                                  mask=mask_for_hosts(args.hosts), seed=args.seed,
+                                  connected_ssid=networks[0][0])
+        self.emulator = ESP32Emulator(port=0, latency=args.latency,
+                                      scan_interval=3600 * 1000, **self.state_options).start()
+        self.address = self.emulator.address
+        self.app = None
+        # Las ventanas viven hasta el final: sus hilos pueden emitir aún
+        self.windows = []
+
+    def report(self, name, summary):
+        self.results[name] = summary
+        if summary.get("count"):
+            rps = f"  {summary['rps']:8.1f} req/s" if "rps" in summary else ""
+            print(f"{name:32} n={summary['count']:<5} p50 {summary['p50_ms']:8.2f} ms"
+                  f"  p95 {summary['p95_ms']:8.2f} ms{rps}")
+        else:
+            print(f"{name:32} sin muestras")
+
+    def records(self, count):
+        """Pares ``(estado, dispositivos)`` decodificados que cambian en cada paso"""
+        if self.args.replay:
+            return self.captured_records(count)
+        state = ESP32State(**self.state_options)
+        ssid, _, _, _, password = state.networks[0]
+        decoder = PayloadDecoder()
+        records = []
+        for i in range(count):
+            # Se alternan conectado y desconectado para repintar el estado entero
+            if i % 2:
+                state.disconnect()
+                status = decoder.decode("status", state.status_payload())
+                state.connect(ssid, password)
+            else:
+                status = decoder.decode("status", state.status_payload())
+            change_devices(state)
+            records.append((status, decoder.decode("devices", state.devices_payload())))
+        return records
+
+    def captured_records(self, count):
+        """Como ``records``, con las respuestas de ``/status`` y ``/devices`` de una captura"""
+        decoder = PayloadDecoder()
+        status = None
+        records = []
+        for entry in read_capture(self.args.replay):
+            if entry.get("s") != 200 or not entry.get("b") or entry.get("m") != "GET":
+                continue
+            if entry["p"] == "/status":
+                status = decoder.decode("status", json.loads(entry["b"]))
+            elif entry["p"] == "/devices" and status is not None:
+                records.append((status, decoder.decode("devices", json.loads(entry["b"]))))
+        if not records:
+            raise SystemExit(f"{self.args.replay} no tiene respuestas de /status y /devices")
+        return [records[i % len(records)] for i in range(count)]
+
+    # -- peticiones -------------------------------------------------------
+
+    def bench_requests(self):
+        client = get_client(self.address)
+        for operation in REQUEST_OPERATIONS:
+            method, path = OPERATIONS[operation]
+
+            def full(_):
+                started = time.perf_counter()
+                response = client.request(method, path, deadline=operation_deadline(operation))
+                client.decode(operation, response)
+                return time.perf_counter() - started
+
+            def conditional(_):
+                started = time.perf_counter()
+                client.call(operation)
+                return time.perf_counter() - started
+
+            self.run_requests(f"requests.{operation}", full)
+            if path in CONDITIONAL_PATHS:
+                # Sin cambios en el emulador todas son ``304``
+                client.call(operation)
+                self.run_requests(f"requests.{operation} (304)", conditional)
+        client.forget_versions()
+
+    def run_requests(self, name, call):
+        started = time.perf_counter()
+        with ThreadPoolExecutor(self.args.workers) as pool:
+            samples = list(pool.map(call, range(self.args.requests)))
+        self.report(name, summarize(samples, time.perf_counter() - started))
+
+    # -- interfaces Qt ----------------------------------------------------
+
+    def wait(self, predicate, timeout=WAIT_TIMEOUT):
+        """Procesar eventos de Qt hasta que ``predicate()`` se cumpla"""
+        from PyQt6.QtCore import QEventLoop, QTimer
+        deadline = time.monotonic() + timeout / 1000
+        while not predicate() and time.monotonic() < deadline:
+            loop = QEventLoop()
+            QTimer.singleShot(5, loop.quit)
+            loop.exec()
+        return predicate()
+
+    def bench_main_window(self):
+        """``import sys.py``: actualización de extremo a extremo y repintados"""
+        gui = load_frontend("import sys.py")
+        window = gui.WiFiManagerGUI()
+        self.windows.append(window)
+        window.ip_entry.setText(self.address)
+        window.update_esp32_ip()
+        self.wait(lambda: window.connected and window.devices_model.rowCount() > 0)
+
+        render = timed(window.on_devices_update)
+        window.on_devices_update = render
+        latencies = []
+        for _ in range(self.args.updates):
+            count = len(render.samples)
+            started = time.perf_counter()
+            change_devices(self.emulator.state)
+            if not self.wait(lambda: len(render.samples) > count):
+                break
+            latencies.append(render.finished - started)
+        self.report("e2e.devices", summarize(latencies))
+        self.report("render.on_devices_update (red)", summarize(render.samples))
+
+        # Repintados sin red, con registros ya decodificados
+        window.events.connection_changed.disconnect()
+        window.events.stop()
+        window.stop_polling()
+        records = self.records(self.args.renders)
+        render.samples.clear()
+        status_render = timed(window.on_status_update)
+        for status, devices in records:
+            status_render(status)
+            render(devices)
+            self.app.processEvents()
+        self.report("render.on_devices_update", summarize(render.samples))
+        self.report("render.on_status_update", summarize(status_render.samples))
+        window.close()
+
+    def bench_frontend(self):
+        """``frontend.py``: ``refresh_status`` hasta el repintado, y ``on_devices_result``"""
+        import frontend
+        frontend.ESP32_IP = self.address
+        window = frontend.WiFiManagerUI()
+        self.windows.append(window)
+        # Con el canal de eventos activo no hay sondeo que interfiera
+        self.wait(lambda: window.connected and window.devices_model.rowCount() > 0
+                  and not window.polling)
+
+        render = timed(window.on_status_result)
+        window.on_status_result = render
+        client = get_client(self.address)
+        latencies = []
+        for _ in range(self.args.updates):
+            count = len(render.samples)
+            client.forget_versions(window.executor.scope)
+            started = time.perf_counter()
+            window.refresh_status()
+            if not self.wait(lambda: len(render.samples) > count):
+                break
+            latencies.append(render.finished - started)
+        self.report("e2e.refresh_status", summarize(latencies))
+
+        window.events.connection_changed.disconnect()
+        window.events.stop()
+        devices_render = timed(window.on_devices_result)
+        for _, devices in self.records(self.args.renders):
+            devices_render(devices)
+            self.app.processEvents()
+        self.report("render.on_devices_result", summarize(devices_render.samples))
+        window.close()
+
+    # -- interfaz Tk ------------------------------------------------------
+
+    def bench_tk(self):
+        """``InterfazC1``: ``populate_devices_list`` (necesita pantalla)"""
+        import tkinter
+        try:
+            root = tkinter.Tk()
+        except tkinter.TclError as e:
+            print(f"{'render.populate_devices_list':32} omitido: {e}")
+            return
+        interface = load_frontend("InterfazC1")
+        app = interface.WiFiManagerGUI(root)
+        app.auto_refresh = False
+        app.events.stop()
+        render = timed(app.populate_devices_list)
+        for _, devices in self.records(self.args.renders):
+            render(devices)
+            root.update()
+        self.report("render.populate_devices_list", summarize(render.samples))
+        root.destroy()
+
+    def run(self):
+        from PyQt6.QtWidgets import QApplication
+        self.app = QApplication.instance() or QApplication(sys.argv[:1])
+        print(f"Emulador en {self.address}: {self.args.hosts} hosts, "
+              f"{len(self.state_options['networks'])} redes, latencia {self.args.latency * 1000:g} ms")
+        self.bench_requests()
+        self.bench_main_window()
+        self.bench_frontend()
+        if not self.args.no_tk:
+            self.bench_tk()
+        return self.results
+
+    def close(self):
+        from hostname_resolver import get_resolver
+        from history_store import get_history_store
+        get_resolver().shutdown()
+        get_history_store().close()
+        self.emulator.stop()
+        close_all()
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Métricas que empeoran más de ``tolerance`` respecto a ``baseline``.
+
+    Una medida con muestras en la referencia que ahora falta o no tiene
+    muestras también cuenta como regresión.
+    """
+    regressions = []
+    for name, previous in baseline.items():
+        if not previous.get("count"):
+            continue
+        summary = results.get(name, {})
+        if not summary.get("count"):
+            regressions.append(f"{name}: {previous['count']} muestras -> sin muestras")
+            continue
+        for metric, higher_is_better in HIGHER_IS_BETTER.items():
+            if metric not in summary or not previous.get(metric):
+                continue
+            ratio = summary[metric] / previous[metric]
+            if (ratio < 1 - tolerance) if higher_is_better else (ratio > 1 + tolerance):
+                regressions.append(f"{name} {metric}: {previous[metric]:.2f} -> "
+                                   f"{summary[metric]:.2f} ({(ratio - 1) * 100:+.0f} %)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de las interfaces contra el emulador del ESP32")
+    parser.add_argument("--hosts", type=int, default=50, help="hosts simulados en la subred")
+    parser.add_argument("--networks", type=int, help="redes inventadas en /scan (por defecto 4 fijas)")
+    parser.add_argument("--latency", type=float, default=0.0, help="retardo por respuesta (s)")
+    parser.add_argument("--churn", type=float, default=0.2,
+                        help="probabilidad de que un host cambie de estado en cada escaneo")
+    parser.add_argument("--requests", type=int, default=200, help="peticiones por endpoint")
+    parser.add_argument("--workers", type=int, default=2, help="hilos para las peticiones")
+    parser.add_argument("--updates", type=int, default=30, help="actualizaciones de extremo a extremo")
+    parser.add_argument("--renders", type=int, default=100, help="repintados por método")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--replay", metavar="CAPTURA",
+                        help="repintar con las listas de dispositivos de una captura (esp32_capture)")
+    parser.add_argument("--no-tk", action="store_true", help="no medir InterfazC1")
+    parser.add_argument("--json", metavar="FICHERO", help="guardar los resultados")
+    parser.add_argument("--baseline", metavar="FICHERO", help="resultados anteriores con los que comparar")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="empeoramiento admitido frente a --baseline (0.25 = 25 %%)")
+    args = parser.parse_args()
+    if args.replay:
+        args.replay = os.path.abspath(args.replay)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            reference = json.load(f)
+        baseline = reference["results"]
+        different = [name for name in WORKLOAD_OPTIONS
+                     if reference["options"].get(name) != getattr(args, name)]
+        if different:
+            print(f"Aviso: la referencia se midió con otras opciones ({', '.join(different)})")
+    output = os.path.abspath(args.json) if args.json else None
+
+    # Historial y logs de las interfaces, fuera del directorio de trabajo
+    directory = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix="esp32_bench_")
+    os.chdir(workdir)
+    bench = Bench(args)
+    try:
+        results = bench.run()
+    finally:
+        bench.close()
+        os.chdir(directory)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump({"options": vars(args), "results": results}, f, indent=2)
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"EMPEORA {regression}")
+        if regressions:
+            sys.exit(1)
+        print("Sin regresiones respecto a la referencia")
+
+
+if __name__ == "__main__":
+    main()
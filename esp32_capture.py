@@ -0,0 +1,218 @@
+"""Captura del tráfico con el ESP32 para reproducirlo después.
+
+Con una captura activa, ``esp32_client`` anota cada petición (método, ruta,
+datos enviados, código, ETag, cuerpo y duración) y ``esp32_events`` cada
+evento recibido, con el instante relativo al inicio de la captura. El fichero
+es JSON Lines comprimido con gzip; un cuerpo igual al anterior de la misma
+ruta se guarda como ``"r": 1`` en lugar de repetirlo, así que una sesión larga
+sondeando ``/status`` y ``/devices`` ocupa poco.
+
+Como en ``log_sink``, ``record`` solo encola: un hilo escritor agrupa lo que
+llega y lo vuelca en el fichero (``flush`` tras cada lote, así que una captura
+interrumpida se puede leer hasta el último lote).
+
+Para capturar con cualquiera de las interfaces::
+
+    ESP32_CAPTURE=campo.jsonl.gz python "import sys.py"
+
+o ``--capture`` en ``esp32_poller``. ``esp32_replay`` sirve la captura.
+
+Las capturas se comparten, así que los datos enviados se guardan con las
+claves secretas (``SECRET_KEYS``, p. ej. la contraseña de ``/connect``)
+sustituidas por ``REDACTED``.
+"""
+import atexit
+import gzip
+import json
+import os
+import queue
+import threading
+import time
+import zlib
+from urllib.parse import parse_qsl, urlencode
+
+CAPTURE_ENV = "ESP32_CAPTURE"
+CAPTURE_FORMAT = 1
+
+# Campos de los datos enviados que no deben quedar en la captura
+SECRET_KEYS = {"password", "pass", "passwd", "psk", "key", "secret", "token"}
+REDACTED = "***"
+
+_STOP = object()
+
+
+def redact(data):
+    """Copia de los datos enviados sin los valores de ``SECRET_KEYS``"""
+    if isinstance(data, (str, bytes)):
+        if isinstance(data, bytes):
+            data = data.decode("utf-8", "replace")
+        pairs = parse_qsl(data, keep_blank_values=True)
+        if not any(key.lower() in SECRET_KEYS for key, _ in pairs):
+            return data
+        return urlencode([(key, REDACTED if key.lower() in SECRET_KEYS else value)
+                          for key, value in pairs])
+    return {key: REDACTED if str(key).lower() in SECRET_KEYS else value
+            for key, value in dict(data).items()}
+
+
+class CaptureWriter:
+    """Escritor de una captura en un hilo en segundo plano"""
+
+    def __init__(self, path, batch_interval=0.5):
+        self.path = path
+        self.batch_interval = batch_interval
+        self.started = time.monotonic()
+        self.records_written = 0
+        self.last_error = None
+        self.closed = False
+        self._queue = queue.Queue()
+        # (ip, método, ruta) -> crc32 del último cuerpo escrito
+        self._bodies = {}
+        self._writer = threading.Thread(target=self._run, name="capture-writer", daemon=True)
+        self._writer.start()
+
+    def elapsed(self):
+        return round(time.monotonic() - self.started, 4)
+
+    def record_response(self, esp32_ip, method, path, data, response, duration):
+        entry = {"t": self.elapsed(), "ip": esp32_ip, "m": method, "p": path,
+                 "s": response.status_code, "d": round(duration, 4)}
+        if data:
+            entry["q"] = redact(data)
+        etag = response.headers.get("ETag")
+        if etag:
+            entry["e"] = etag
+        if response.content:
+            entry["b"] = response.text
+        self._queue.put(entry)
+
+    def record_error(self, esp32_ip, method, path, data, error, duration):
+        entry = {"t": self.elapsed(), "ip": esp32_ip, "m": method, "p": path,
+                 "x": type(error).__name__, "d": round(duration, 4)}
+        if data:
+            entry["q"] = redact(data)
+        self._queue.put(entry)
+
+    def record_event(self, esp32_ip, name, payload):
+        self._queue.put({"t": self.elapsed(), "ip": esp32_ip, "ev": name, "b": payload})
+
+    def _compact(self, entry):
+        """Sustituir el cuerpo por ``"r": 1`` si repite el anterior de la ruta"""
+        body = entry.get("b")
+        if body is None or "ev" in entry:
+            return entry
+        key = (entry["ip"], entry["m"], entry["p"])
+        checksum = zlib.crc32(body.encode("utf-8"))
+        if self._bodies.get(key) == checksum:
+            entry = dict(entry)
+            del entry["b"]
+            entry["r"] = 1
+        else:
+            self._bodies[key] = checksum
+        return entry
+
+    def _run(self):
+        try:
+            stream = gzip.open(self.path, "wt", encoding="utf-8")
+            stream.write(json.dumps({"capture": CAPTURE_FORMAT, "started": time.time()}) + "\n")
+        except OSError as e:
+            self.last_error = str(e)
+            return
+
+        stopping = False
+        while not stopping:
+            entries = [self._queue.get()]
+            deadline = time.monotonic() + self.batch_interval
+            while True:
+                if entries[-1] is _STOP:
+                    entries.pop()
+                    stopping = True
+                    break
+                try:
+                    entries.append(self._queue.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+            try:
+                for entry in entries:
+                    stream.write(json.dumps(self._compact(entry), ensure_ascii=False,
+                                            separators=(",", ":")) + "\n")
+                stream.flush()
+                self.records_written += len(entries)
+            except OSError as e:
+                self.last_error = str(e)
+        stream.close()
+
+    def close(self):
+        """Escribir lo pendiente y cerrar el fichero"""
+        if self.closed:
+            return
+        self.closed = True
+        self._queue.put(_STOP)
+        self._writer.join(5)
+
+
+def read_capture(path):
+    """Registros de una captura, con los cuerpos ``"r": 1`` ya resueltos.
+
+    Una captura cortada a medias (la aplicación terminó sin cerrarla) se lee
+    hasta el último registro completo.
+    """
+    bodies = {}
+    with gzip.open(path, "rt", encoding="utf-8") as stream:
+        try:
+            header = json.loads(stream.readline())
+            if header.get("capture") != CAPTURE_FORMAT:
+                raise ValueError(f"{path} no es una captura del ESP32")
+            for line in stream:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                if "ev" not in entry:
+                    key = (entry["ip"], entry["m"], entry["p"])
+                    if entry.pop("r", None):
+                        entry["b"] = bodies.get(key)
+                    elif "b" in entry:
+                        bodies[key] = entry["b"]
+                yield entry
+        except EOFError:
+            return
+
+
+_capture = None
+_capture_lock = threading.Lock()
+_checked_environment = False
+
+
+def start_capture(path):
+    """Empezar a capturar en ``path`` (cierra la captura anterior si la hay)"""
+    global _capture
+    with _capture_lock:
+        if _capture is not None:
+            _capture.close()
+        _capture = CaptureWriter(path)
+        return _capture
+
+
+def stop_capture():
+    global _capture
+    with _capture_lock:
+        if _capture is not None:
+            _capture.close()
+            _capture = None
+
+
+def get_capture():
+    """Captura activa o None; la primera llamada mira ``ESP32_CAPTURE``"""
+    global _capture, _checked_environment
+    if not _checked_environment:
+        with _capture_lock:
+            if not _checked_environment:
+                _checked_environment = True
+                path = os.environ.get(CAPTURE_ENV)
+                if path:
+                    _capture = CaptureWriter(path)
+    return _capture
+
+
+atexit.register(stop_capture)
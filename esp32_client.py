@@ -0,0 +1,251 @@
+"""Cliente HTTP compartido para comunicarse con el ESP32-S3.
+
+Las tres interfaces (``import sys.py``, ``frontend.py`` e ``InterfazC1``) usan
+este módulo en lugar de llamar a ``requests.get``/``requests.post``
+directamente. Cada ESP32 tiene una única ``requests.Session`` con un pool de
+conexiones persistentes (keep-alive), así que los sondeos periódicos reutilizan
+la conexión TCP en vez de abrir y cerrar una por petición.
+
+``/status`` y ``/devices`` se piden de forma condicional: el cliente recuerda
+el ``ETag`` de la última respuesta y lo envía en ``If-None-Match``; si nada
+cambió, el ESP32 responde ``304`` sin cuerpo y no hay nada que interpretar.
+Las respuestas que sí llegan se convierten en registros con ``decode`` (ver
+``esp32_records``).
+
+Cada endpoint tiene un circuit breaker y cada operación un plazo total
+(``OPERATION_DEADLINES``): con el ESP32 caído las peticiones fallan al
+instante en lugar de agotar su timeout una tras otra (ver ``circuit_breaker``).
+
+Con una captura activa (``ESP32_CAPTURE``, ver ``esp32_capture``) cada
+petición queda anotada con su respuesta y su duración.
+"""
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from circuit_breaker import (CLOSED, PROBE_INTERVAL, CircuitBreaker, CircuitOpenError, HealthProbe,
+                             deadline_timeout, notify_recovered)
+from esp32_capture import get_capture
+from esp32_records import PayloadDecoder
+
+DEFAULT_ESP32_IP = "192.168.4.1"
+
+# Timeouts (conexión, lectura) en segundos para cada endpoint del firmware
+ENDPOINT_TIMEOUTS = {
+    "/scan": (3, 15),
+    "/connect": (3, 30),
+    "/status": (3, 5),
+    "/devices": (3, 10),
+    "/disconnect": (3, 10),
+    "/configure": (3, 5),
+    "/config": (3, 5),
+}
+DEFAULT_TIMEOUT = (3, 10)
+
+# Endpoints que envían ETag y aceptan If-None-Match (ver main.ino)
+CONDITIONAL_PATHS = {"/status", "/devices"}
+NOT_MODIFIED = 304
+
+# Operaciones de alto nivel usadas por las interfaces -> (método, ruta)
+OPERATIONS = {
+    "scan_wifi": ("GET", "/scan"),
+    "connect": ("POST", "/connect"),
+    "status": ("GET", "/status"),
+    "devices": ("GET", "/devices"),
+    "disconnect": ("POST", "/disconnect"),
+    "config": ("GET", "/config"),
+    "configure": ("POST", "/configure"),
+}
+
+# Espera admitida en la cola del ejecutor antes de enviar la petición
+QUEUE_ALLOWANCE = 2
+
+# Plazo total en segundos de cada operación, contado desde que se pide: la
+# conexión y la lectura de su endpoint más la espera en la cola. Así el plazo
+# solo recorta los timeouts de ``ENDPOINT_TIMEOUTS`` si la petición esperó de
+# más en la cola
+OPERATION_DEADLINES = {operation: sum(ENDPOINT_TIMEOUTS[path]) + QUEUE_ALLOWANCE
+                       for operation, (_, path) in OPERATIONS.items()}
+DEFAULT_DEADLINE = sum(DEFAULT_TIMEOUT) + QUEUE_ALLOWANCE
+
+
+class ESP32Client:
+    """Cliente con pool de conexiones keep-alive hacia un ESP32.
+
+    Una misma instancia se puede usar desde varios hilos a la vez: el pool de
+    urllib3 entrega a cada hilo una conexión libre y la devuelve al terminar.
+    """
+
+    def __init__(self, esp32_ip=DEFAULT_ESP32_IP, pool_size=4, timeouts=None):
+        self.esp32_ip = esp32_ip
+        self.timeouts = dict(ENDPOINT_TIMEOUTS)
+        if timeouts:
+            self.timeouts.update(timeouts)
+
+        self.session = requests.Session()
+        self.session.headers["Connection"] = "keep-alive"
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size,
+                              max_retries=0)
+        self.session.mount("http://", adapter)
+        # ETags por consumidor: cada ventana guarda los suyos, así un 200 que
+        # recibe una no se convierte en un 304 para la otra
+        self._etags = {}
+        self.decoder = PayloadDecoder()
+        self.breakers = {}
+        self._breakers_lock = threading.Lock()
+        self.probe = HealthProbe(esp32_ip, self._on_alive)
+
+    def url(self, path):
+        return f"http://{self.esp32_ip}{path}"
+
+    def timeout_for(self, path):
+        return self.timeouts.get(path, DEFAULT_TIMEOUT)
+
+    def breaker(self, path):
+        with self._breakers_lock:
+            breaker = self.breakers.get(path)
+            if breaker is None:
+                breaker = self.breakers[path] = CircuitBreaker(path)
+            return breaker
+
+    def open_circuits(self):
+        """Endpoints con el circuito abierto o semiabierto"""
+        with self._breakers_lock:
+            return [path for path, breaker in self.breakers.items() if breaker.state != CLOSED]
+
+    def _record(self, breaker, ok):
+        with self._breakers_lock:
+            if ok:
+                breaker.record_success()
+            elif breaker.record_failure():
+                self.probe.start()
+
+    def _on_alive(self):
+        """El sondeo TCP respondió: dejar pasar una petición de prueba por endpoint"""
+        with self._breakers_lock:
+            for breaker in self.breakers.values():
+                breaker.half_open()
+        notify_recovered(self.esp32_ip)
+
+    def versions(self, scope=None):
+        """ETags conocidos (ruta -> ETag) del consumidor ``scope``"""
+        return self._etags.setdefault(scope, {})
+
+    def request(self, method, path, data=None, timeout=None, conditional=False, deadline=None,
+                scope=None):
+        """Enviar una petición y devolver la ``requests.Response``.
+
+        Con ``conditional=True`` se envía el último ETag de ``path`` que
+        conoce ``scope`` (p. ej. el ``RequestExecutor`` de una ventana) y la
+        respuesta puede ser ``304`` (``NOT_MODIFIED``). ``deadline``
+        (``time.monotonic()``) limita el timeout al tiempo que queda. Lanza
+        ``CircuitOpenError`` sin tocar la red si el circuito de ``path`` está
+        abierto.
+        """
+        if timeout is None:
+            timeout = self.timeout_for(path)
+        etags = self.versions(scope)
+        breaker = self.breaker(path)
+        try:
+            timeout = deadline_timeout(timeout, deadline, path)
+            with self._breakers_lock:
+                allowed = breaker.allow()
+            if not allowed:
+                raise CircuitOpenError(f"Circuito abierto: {path} de {self.esp32_ip} no responde "
+                                       f"(se comprueba cada {PROBE_INTERVAL:g} s)")
+        except requests.exceptions.RequestException:
+            # Plazo agotado o circuito abierto: como tras un fallo de red, la
+            # interfaz muestra el error y la siguiente lectura debe ser completa
+            etags.pop(path, None)
+            raise
+        etag = etags.get(path) if conditional else None
+        headers = {"If-None-Match": etag} if etag else None
+        capture = get_capture()
+        started = time.monotonic()
+        response = None
+        try:
+            response = self.session.request(method, self.url(path), data=data,
+                                            headers=headers, timeout=timeout)
+        except requests.exceptions.RequestException as e:
+            # Tras un fallo la siguiente lectura debe ser completa
+            etags.pop(path, None)
+            if capture is not None:
+                capture.record_error(self.esp32_ip, method, path, data, e,
+                                     time.monotonic() - started)
+            raise
+        finally:
+            # Cualquier excepción cuenta como fallo: si no, la petición de
+            # prueba de un circuito semiabierto quedaría pendiente para siempre
+            self._record(breaker, response is not None and response.status_code < 500)
+        if capture is not None:
+            capture.record_response(self.esp32_ip, method, path, data, response,
+                                    time.monotonic() - started)
+
+        if conditional and response.status_code != NOT_MODIFIED:
+            etag = response.headers.get("ETag") if response.status_code == 200 else None
+            if etag:
+                etags[path] = etag
+            else:
+                etags.pop(path, None)
+        return response
+
+    def get(self, path, timeout=None, conditional=False):
+        return self.request("GET", path, timeout=timeout, conditional=conditional)
+
+    def post(self, path, data=None, timeout=None):
+        return self.request("POST", path, data=data, timeout=timeout)
+
+    def call(self, operation, data=None, deadline=None, scope=None):
+        """Ejecutar una operación de ``OPERATIONS`` por su nombre, dentro de
+        su plazo (desde ahora si no se indica ``deadline``)"""
+        method, path = OPERATIONS[operation]
+        conditional = method == "GET" and path in CONDITIONAL_PATHS
+        if deadline is None:
+            deadline = operation_deadline(operation)
+        return self.request(method, path, data=data, conditional=conditional,
+                            deadline=deadline, scope=scope)
+
+    def decode(self, operation, response):
+        """Registro tipado de la respuesta JSON de ``operation``"""
+        return self.decoder.decode(operation, response.json())
+
+    def forget_versions(self, scope=None):
+        """Olvidar los ETag de ``scope`` para que su siguiente lectura sea completa"""
+        self.versions(scope).clear()
+
+    def forget(self, path, scope=None):
+        """Olvidar solo el ETag de ``path`` (el resto sigue admitiendo 304)"""
+        self.versions(scope).pop(path, None)
+
+    def close(self):
+        self.probe.stop()
+        self.session.close()
+
+
+def operation_deadline(operation):
+    """Instante (``time.monotonic()``) en que vence el plazo de ``operation``"""
+    return time.monotonic() + OPERATION_DEADLINES.get(operation, DEFAULT_DEADLINE)
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(esp32_ip=DEFAULT_ESP32_IP):
+    """Obtener el cliente compartido para la IP indicada (uno por ESP32)"""
+    with _clients_lock:
+        client = _clients.get(esp32_ip)
+        if client is None:
+            client = ESP32Client(esp32_ip)
+            _clients[esp32_ip] = client
+        return client
+
+
+def close_all():
+    """Cerrar todas las sesiones abiertas (al salir de la aplicación)"""
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
@@ -0,0 +1,584 @@
+"""Emulador del firmware (``main.ino``) para probar las interfaces sin hardware.
+
+Sirve los mismos endpoints con el mismo formato JSON: ``/scan``, ``/connect``,
+``/status``, ``/devices``, ``/disconnect``, ``/configure`` y ``/config``,
+incluidos los ETag de ``/status`` y ``/devices`` y las respuestas ``304``, y
+el canal de eventos ``/events`` en un segundo puerto (ver ``esp32_events``).
+Una población simulada de hosts entra y sale de la red en cada escaneo.
+
+Uso::
+
+    python esp32_emulator.py --port 8080 --hosts 12
+    python esp32_emulator.py --hosts 200 --networks 40   # respuestas grandes
+    python "import sys.py"      # y poner 127.0.0.1:8080 como IP del ESP32
+
+Desde código (pruebas, benchmarks)::
+
+    emulator = ESP32Emulator(port=0).start()
+    client = get_client(emulator.address)
+"""
+import argparse
+import json
+import queue
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from subnet import get_subnet, int_to_ip, prefix_from_mask
+
+FIRMWARE_VERSION = "2.0.0"
+WIFI_SCAN_INTERVAL = 30000
+EVENT_PING_INTERVAL = 15
+MAX_EVENT_CLIENTS = 4
+# Pasos (ms) de los campos en vivo en el ETag de /devices, como en main.ino
+DEVICES_ETAG_SEEN_STEP = 30000
+DEVICES_ETAG_RESPONSE_STEP = 50
+
+DEFAULT_NETWORKS = [
+    # (ssid, rssi, encryption, channel, contraseña)
+    ("Casa", -48, "Secured", 6, "12345678"),
+    ("Oficina", -63, "Secured", 11, "oficina2024"),
+    ("Invitados", -71, "Open", 1, ""),
+    ("Vecino_5G", -82, "Secured", 36, "secreto"),
+]
+
+
+def synthetic_networks(count, seed=None):
+    """``count`` redes inventadas (para probar con escaneos grandes)"""
+    rng = random.Random(seed)
+    networks = []
+    for i in range(count):
+        encryption = "Open" if rng.random() < 0.2 else "Secured"
+        networks.append((f"Red_{i:03d}", rng.randint(-92, -40), encryption,
+                         rng.choice((1, 6, 11, 36, 44, 149)),
+                         "" if encryption == "Open" else f"clave{i:03d}"))
+    return networks
+
+
+def mask_for_hosts(hosts, mask="255.255.255.240"):
+    """``mask`` o la máscara más pequeña en la que caben ``hosts`` más el ESP32"""
+    prefix = min(prefix_from_mask(mask), 32 - (hosts + 2).bit_length())
+    prefix = max(prefix, 16)
+    return int_to_ip((0xFFFFFFFF << (32 - prefix)) & 0xFFFFFFFF)
+
+
+def fnv1a(text):
+    """Mismo hash que ``fnv1a`` en ``main.ino``"""
+    value = 2166136261
+    for byte in text.encode("utf-8"):
+        value = ((value ^ byte) * 16777619) & 0xFFFFFFFF
+    return value
+
+
+def signal_quality(rssi):
+    if rssi > -50:
+        return "Excelente"
+    if rssi > -60:
+        return "Buena"
+    if rssi > -70:
+        return "Regular"
+    return "Débil"
+
+
+class EmulatedDevice:
+    __slots__ = ("ip", "active", "last_seen", "first_seen", "response_time")
+
+    def __init__(self, ip, now, response_time):
+        self.ip = ip
+        self.active = True
+        self.last_seen = now
+        self.first_seen = now
+        self.response_time = response_time
+
+
+class EventHub:
+    """Clientes conectados a ``/events``; cada uno tiene su propia cola"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients = []
+
+    def subscribe(self):
+        with self._lock:
+            if len(self._clients) >= MAX_EVENT_CLIENTS:
+                return None
+            client = queue.Queue()
+            self._clients.append(client)
+            return client
+
+    def unsubscribe(self, client):
+        with self._lock:
+            if client in self._clients:
+                self._clients.remove(client)
+
+    def publish(self, name, data):
+        message = f"event: {name}\ndata: {json.dumps(data)}\n\n".encode("utf-8")
+        with self._lock:
+            for client in self._clients:
+                client.put(message)
+
+    def close(self):
+        """Terminar todos los flujos abiertos"""
+        with self._lock:
+            for client in self._clients:
+                client.put(None)
+
+    def __len__(self):
+        return len(self._clients)
+
+
+class ESP32State:
+    """Estado del firmware simulado; todos los accesos pasan por ``lock``"""
+
+    def __init__(self, networks=DEFAULT_NETWORKS, hosts=8, churn=0.1,
+                 ip="192.168.1.100", gateway="192.168.1.1", mask="255.255.255.240",
+                 scan_interval=5000, connected_ssid=None, seed=None):
+        self.lock = threading.Lock()
+        self.random = random.Random(seed)
+        self.started = time.monotonic()
+        self.networks = list(networks)
+        self.churn = churn
+        self.ip = ip
+        self.gateway = gateway
+        self.subnet_mask = mask
+        self.scan_interval = scan_interval
+        self.mac = "24:0A:C4:%02X:%02X:%02X" % tuple(self.random.randrange(256) for _ in range(3))
+        self.hostname = "esp32s3-" + self.mac.replace(":", "")[-6:].lower()
+        self.connected_ssid = None
+        self.devices = []
+        self.devices_version = 1
+        self.last_devices_etag = ""
+        self.events = EventHub()
+
+        # Hosts que pueden aparecer en la subred (sin contar al propio ESP32)
+        subnet = get_subnet(ip, mask)
+        candidates = [int_to_ip(value) for value in subnet.hosts(exclude_self=True)]
+        self.population = self.random.sample(candidates, min(hosts, len(candidates)))
+        if connected_ssid:
+            self.connect(connected_ssid, self._password(connected_ssid))
+
+    def millis(self):
+        return int((time.monotonic() - self.started) * 1000)
+
+    def _network(self, ssid):
+        for network in self.networks:
+            if network[0] == ssid:
+                return network
+        return None
+
+    def _password(self, ssid):
+        network = self._network(ssid)
+        return network[4] if network else ""
+
+    @property
+    def connected(self):
+        return self.connected_ssid is not None
+
+    def rssi(self):
+        network = self._network(self.connected_ssid)
+        # Variación de ±2 dB alrededor del valor nominal
+        return network[1] + self.random.randint(-2, 2) if network else 0
+
+    def bssid(self, ssid):
+        value = fnv1a(ssid)
+        return "AA:BB:CC:%02X:%02X:%02X" % (value >> 16 & 0xFF, value >> 8 & 0xFF, value & 0xFF)
+
+    def connect(self, ssid, password):
+        network = self._network(ssid)
+        if network is None or (network[2] != "Open" and network[4] != password):
+            return False
+        self.connected_ssid = ssid
+        self.devices = []
+        self.devices_version += 1
+        self.events.publish("status", self.status_payload())
+        self.scan_devices()
+        return True
+
+    def disconnect(self):
+        self.connected_ssid = None
+        left = [device.ip for device in self.devices if device.active]
+        self.devices = []
+        self.devices_version += 1
+        self.events.publish("status", self.status_payload())
+        self.events.publish("devices", {"version": self.devices_version, "joined": [],
+                                        "left": left, "activeDevices": 0})
+        self.last_devices_etag = self.devices_etag()
+
+    def scan_devices(self):
+        """Equivalente a ``scanNetworkDevices``: cada host aparece o desaparece"""
+        if not self.connected:
+            return
+        now = self.millis()
+        known = {device.ip: device for device in self.devices}
+        joined, left = [], []
+        for ip in self.population:
+            device = known.get(ip)
+            online = (self.random.random() >= self.churn) if device is None or device.active \
+                else (self.random.random() < self.churn)
+            if device is None:
+                if online:
+                    self.devices.append(EmulatedDevice(ip, now, self.random.randint(1, 40)))
+                    joined.append(ip)
+            elif online:
+                if not device.active:
+                    joined.append(ip)
+                device.active = True
+                device.last_seen = now
+                device.response_time = self.random.randint(1, 40)
+            elif device.active:
+                left.append(ip)
+                device.active = False
+
+        # Igual que el firmware: olvidar los inactivos tras 2 minutos
+        before = len(self.devices)
+        self.devices = [d for d in self.devices if d.active or now - d.last_seen <= 120000]
+        active = sum(1 for d in self.devices if d.active)
+        if joined or left or len(self.devices) != before:
+            self.devices_version += 1
+        # Como el firmware: también se avisa si solo cambiaron los campos en vivo del ETag
+        etag = self.devices_etag()
+        if joined or left or etag != self.last_devices_etag:
+            self.events.publish("devices", {"version": self.devices_version, "joined": joined,
+                                            "left": left, "activeDevices": active})
+        self.last_devices_etag = etag
+        self.events.publish("scan", {"type": "devices", "duration": 0, "activeDevices": active})
+
+    def status_etag(self):
+        fingerprint = "1" if self.connected else "0"
+        if self.connected:
+            network = self._network(self.connected_ssid)
+            # El firmware divide el RSSI entre 3 (división entera de C)
+            rssi_bucket = int(network[1] / 3)
+            fingerprint += (self.connected_ssid + self.ip + self.bssid(self.connected_ssid)
+                            + str(network[3]) + str(rssi_bucket))
+        return '"s%x"' % fnv1a(fingerprint)
+
+    def devices_etag(self):
+        # Igual que devicesEtag() en main.ino: versión más los campos en vivo agrupados
+        fingerprint = str(self.devices_version)
+        for device in self.devices:
+            if device.active:
+                fingerprint += (device.ip + str(device.last_seen // DEVICES_ETAG_SEEN_STEP)
+                                + str(device.response_time // DEVICES_ETAG_RESPONSE_STEP))
+        if self.connected:
+            fingerprint += str(int(self._network(self.connected_ssid)[1] / 3))
+        return '"d%d-%x"' % (self.devices_version, fnv1a(fingerprint))
+
+    def scan_payload(self):
+        networks = sorted(self.networks, key=lambda n: -n[1])
+        return {
+            "networks": [{"ssid": ssid, "rssi": rssi + self.random.randint(-3, 3),
+                          "encryption": encryption, "channel": channel,
+                          "bssid": self.bssid(ssid), "quality": signal_quality(rssi)}
+                         for ssid, rssi, encryption, channel, _ in networks],
+            "totalNetworks": len(networks),
+            "scanTime": self.millis(),
+        }
+
+    def status_payload(self):
+        data = {"connected": self.connected}
+        if self.connected:
+            network = self._network(self.connected_ssid)
+            data.update({
+                "ssid": self.connected_ssid,
+                "ip": self.ip,
+                "rssi": network[1],
+                "gateway": self.gateway,
+                "dns": self.gateway,
+                "bssid": self.bssid(self.connected_ssid),
+                "channel": network[3],
+                "uptime": self.millis(),
+            })
+        return data
+
+    def devices_payload(self):
+        now = self.millis()
+        devices = [{
+            "ip": self.ip if self.connected else "0.0.0.0",
+            "type": "ESP32-S3 Scanner",
+            "active": True,
+            "mac": self.mac,
+            "hostname": self.hostname,
+            "responseTime": 0,
+            "uptime": now,
+        }]
+        active = [d for d in self.devices if d.active]
+        for device in active:
+            devices.append({
+                "ip": device.ip,
+                "type": "Network Device",
+                "active": True,
+                "mac": "Unknown",
+                "hostname": "Unknown",
+                "lastSeen": device.last_seen,
+                "firstSeen": device.first_seen,
+                "responseTime": device.response_time,
+                "onlineTime": device.last_seen - device.first_seen,
+            })
+        data = {"devices": devices}
+        if self.connected:
+            subnet = get_subnet(self.ip, self.subnet_mask)
+            network = self._network(self.connected_ssid)
+            data["networkInfo"] = {
+                "subnet": self.subnet_mask,
+                "network": subnet.network_str,
+                "broadcast": subnet.broadcast_str,
+                "gateway": self.gateway,
+                "dns": self.gateway,
+                "ssid": self.connected_ssid,
+                "channel": network[3],
+                "rssi": network[1],
+            }
+        data.update({
+            "totalDevices": len(devices),
+            "scanInterval": self.scan_interval,
+            "scanTime": now,
+            "activeDevices": len(active),
+        })
+        return data
+
+    def config_payload(self):
+        return {
+            "scanInterval": self.scan_interval,
+            "wifiScanInterval": WIFI_SCAN_INTERVAL,
+            "subnetMask": self.subnet_mask,
+            "freeHeap": 180000 + self.random.randint(-2000, 2000),
+            "uptime": self.millis(),
+            "version": FIRMWARE_VERSION,
+            "eventsPort": self.events_port,
+        }
+
+
+class EmulatorHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "ESP32Emulator"
+    # Cabeceras y cuerpo van en dos escrituras: sin esto Nagle y el ACK
+    # retardado añaden ~40 ms a cada respuesta con cuerpo
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def _args(self):
+        url = urlsplit(self.path)
+        args = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            body = self.rfile.read(length).decode("utf-8", "replace")
+            args.update({k: v[-1] for k, v in parse_qs(body).items()})
+        return url.path, args
+
+    def _send(self, status, body=b"", content_type="application/json", headers=()):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        self.send_response(status)
+        self.send_header("Access-Control-Allow-Origin", "*")
+        for name, value in headers:
+            self.send_header(name, value)
+        if status != 304:
+            self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body and self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _json(self, data, status=200, etag=None):
+        headers = [("ETag", etag)] if etag else []
+        self._send(status, json.dumps(data).encode("utf-8"), headers=headers)
+
+    def _conditional(self, etag, payload):
+        # Igual que sendNotModified() en main.ino
+        if self.headers.get("If-None-Match") == etag:
+            self._send(304, headers=[("ETag", etag)])
+        else:
+            self._json(payload(), etag=etag)
+
+    def do_OPTIONS(self):
+        self._send(200, content_type="text/plain", headers=[
+            ("Access-Control-Allow-Methods", "GET, POST, OPTIONS"),
+            ("Access-Control-Allow-Headers", "Content-Type")])
+
+    def do_GET(self):
+        path, _ = self._args()
+        state = self.state
+        with state.lock:
+            if path == "/scan":
+                payload = state.scan_payload()
+                self._json(payload)
+                state.events.publish("scan", {"type": "wifi",
+                                              "totalNetworks": payload["totalNetworks"]})
+            elif path == "/status":
+                self._conditional(state.status_etag(), state.status_payload)
+            elif path == "/devices":
+                self._conditional(state.devices_etag(), state.devices_payload)
+            elif path == "/config":
+                self._json(state.config_payload())
+            else:
+                self._not_found(path)
+
+    def do_POST(self):
+        path, args = self._args()
+        state = self.state
+        with state.lock:
+            if path == "/connect":
+                if "ssid" not in args:
+                    self._send(400, b'{"error":"Missing SSID parameter"}')
+                    return
+                success = state.connect(args["ssid"], args.get("password", ""))
+                data = {"success": success}
+                if success:
+                    data.update({"ip": state.ip, "ssid": state.connected_ssid,
+                                 "gateway": state.gateway, "dns": state.gateway,
+                                 "rssi": state.rssi()})
+                self._json(data)
+            elif path == "/disconnect":
+                state.disconnect()
+                self._send(200, b'{"success":true}')
+            elif path == "/configure":
+                try:
+                    interval = int(args.get("scanInterval", 0))
+                except ValueError:
+                    interval = 0
+                if 1000 <= interval <= 60000:
+                    state.scan_interval = interval
+                self._json({"success": True, "scanInterval": state.scan_interval})
+            else:
+                self._not_found(path)
+
+    def _not_found(self, path):
+        self._send(404, f"Not found: {path}".encode("utf-8"), content_type="text/plain")
+
+
+class EventsHandler(BaseHTTPRequestHandler):
+    """Segundo puerto del firmware: flujo ``text/event-stream``"""
+    protocol_version = "HTTP/1.1"
+    server_version = "ESP32Emulator"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        hub = self.server.state.events
+        client = hub.subscribe() if urlsplit(self.path).path == "/events" else None
+        if client is None:
+            self.send_response(503 if urlsplit(self.path).path == "/events" else 404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.end_headers()
+            self.wfile.write(b"retry: 3000\n\n")
+            self.wfile.flush()
+            while not self.server.stopping.is_set():
+                try:
+                    message = client.get(timeout=EVENT_PING_INTERVAL)
+                except queue.Empty:
+                    message = b": ping\n\n"
+                if message is None:
+                    break
+                self.wfile.write(message)
+                self.wfile.flush()
+        except OSError:
+            pass
+        finally:
+            hub.unsubscribe(client)
+            self.close_connection = True
+
+
+class ESP32Emulator:
+    """Servidor HTTP con un ``ESP32State`` y su bucle de escaneo"""
+
+    def __init__(self, host="127.0.0.1", port=8080, events_port=0, latency=0.0,
+                 verbose=False, **state_options):
+        self.state = ESP32State(**state_options)
+        self._stop = threading.Event()
+        self._threads = []
+        self.server = ThreadingHTTPServer((host, port), EmulatorHandler)
+        self.events_server = ThreadingHTTPServer((host, events_port), EventsHandler)
+        for server in (self.server, self.events_server):
+            server.daemon_threads = True
+            server.state = self.state
+            server.latency = latency
+            server.verbose = verbose
+            server.stopping = self._stop
+        self.state.events_port = self.events_server.server_address[1]
+
+    @property
+    def address(self):
+        """``host:puerto`` para usar como IP del ESP32 en las interfaces"""
+        host, port = self.server.server_address[:2]
+        return f"{host}:{port}"
+
+    def _scan_loop(self):
+        while not self._stop.wait(self.state.scan_interval / 1000):
+            with self.state.lock:
+                self.state.scan_devices()
+
+    def start(self):
+        for target in (self.server.serve_forever, self.events_server.serve_forever,
+                       self._scan_loop):
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self.state.events.close()
+        for server in (self.server, self.events_server):
+            server.shutdown()
+            server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Emulador HTTP del firmware ESP32-S3")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--events-port", type=int, default=8081)
+    parser.add_argument("--hosts", type=int, default=8, help="hosts simulados en la subred")
+    parser.add_argument("--churn", type=float, default=0.1,
+                        help="probabilidad de que un host cambie de estado en cada escaneo")
+    parser.add_argument("--mask", default="255.255.255.240",
+                        help="se amplía si --hosts no cabe en la subred")
+    parser.add_argument("--networks", type=int,
+                        help="número de redes inventadas en /scan (por defecto 4 fijas)")
+    parser.add_argument("--scan-interval", type=int, default=5000, help="ms entre escaneos")
+    parser.add_argument("--latency", type=float, default=0.0, help="retardo por respuesta (s)")
+    parser.add_argument("--connected", metavar="SSID", help="arrancar ya conectado a SSID")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args()
+
+    emulator = ESP32Emulator(args.host, args.port, args.events_port,
+                             latency=args.latency, verbose=args.verbose,
+                             hosts=args.hosts, churn=args.churn,
+                             mask=mask_for_hosts(args.hosts, args.mask),
+                             scan_interval=args.scan_interval,
+                             connected_ssid=args.connected, seed=args.seed,
+                             networks=(DEFAULT_NETWORKS if args.networks is None
+                                       else synthetic_networks(args.networks, args.seed)))
+    emulator.start()
+    print(f"Emulador ESP32 escuchando en http://{emulator.address} "
+          f"(eventos en el puerto {emulator.state.events_port})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        emulator.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""Canal de eventos (Server-Sent Events) del ESP32.
+
+El servidor web del firmware atiende las peticiones de una en una, así que el
+canal de eventos va en un segundo puerto (``eventsPort`` en ``/config``, 81 por
+defecto). Una conexión permanente recibe:
+
+- ``status``: el mismo JSON que ``/status``, cuando cambia la conexión o el RSSI
+  (se entrega siempre como ``esp32_records.Status``; uno que no sea un objeto
+  JSON se descarta y queda en ``last_error``);
+- ``devices``: ``{"version", "joined": [ips], "left": [ips], "activeDevices"}``,
+  cuando cambia la lista o los campos en vivo de su ETag (las listas pueden ir
+  vacías);
+- ``scan``: fin de un escaneo (``"type": "devices"`` o ``"wifi"``).
+
+``EventStream`` mantiene esa conexión en un hilo propio y se reconecta con
+espera creciente. Las interfaces solo sondean mientras el canal no está
+disponible (firmware antiguo, puerto bloqueado, ESP32 reiniciándose...).
+"""
+import http.client
+import json
+import threading
+
+import requests
+
+from esp32_capture import get_capture
+from esp32_client import get_client
+from esp32_records import Status
+
+EVENTS_PATH = "/events"
+# Sin datos en este tiempo se da la conexión por perdida (el firmware envía un
+# comentario de keep-alive cada 15 s)
+READ_TIMEOUT = 35
+MAX_BACKOFF = 60
+
+
+class EventStream:
+    """Suscripción a ``/events`` en un hilo de fondo.
+
+    ``on_event(nombre, datos)`` y ``on_state(conectado)`` se llaman desde ese
+    hilo; las interfaces deben pasarlos a su hilo principal.
+    """
+
+    def __init__(self, esp32_ip, on_event, on_state=None):
+        self.esp32_ip = esp32_ip
+        self.on_event = on_event
+        self.on_state = on_state
+        self.connected = False
+        self.events_received = 0
+        # Eventos ``status`` descartados por no traer un estado válido
+        self.events_dropped = 0
+        self.last_error = None
+        self._stop = threading.Event()
+        self._connection = None
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="esp32-events", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        connection = self._connection
+        if connection is not None:
+            # Desbloquea la lectura en curso
+            connection.close()
+
+    def _set_connected(self, connected):
+        if connected != self.connected:
+            self.connected = connected
+            # Tras ``stop`` el dueño de los callbacks puede haber desaparecido
+            if self.on_state and not self._stop.is_set():
+                self.on_state(connected)
+
+    def _events_port(self):
+        client = get_client(self.esp32_ip)
+        response = client.call("config")
+        if response.status_code != 200:
+            return None
+        return client.decode("config", response).events_port
+
+    def _run(self):
+        backoff = 1
+        while not self._stop.is_set():
+            try:
+                port = self._events_port()
+                if port:
+                    self._listen(self.esp32_ip.split(":")[0], port)
+                    backoff = 1
+            except (OSError, ValueError, http.client.HTTPException,
+                    requests.exceptions.RequestException):
+                pass
+            self._set_connected(False)
+            # Firmware sin canal de eventos o conexión perdida: reintentar más tarde
+            if self._stop.wait(backoff):
+                break
+            backoff = min(backoff * 2, MAX_BACKOFF)
+
+    def _listen(self, host, port):
+        connection = http.client.HTTPConnection(host, port, timeout=READ_TIMEOUT)
+        self._connection = connection
+        try:
+            connection.request("GET", EVENTS_PATH, headers={"Accept": "text/event-stream"})
+            response = connection.getresponse()
+            if response.status != 200:
+                return
+            self._set_connected(True)
+
+            name, data = "message", []
+            while not self._stop.is_set():
+                line = response.readline()
+                if not line:
+                    return
+                line = line.decode("utf-8", "replace").rstrip("\r\n")
+                if not line:
+                    # Línea vacía: fin del evento
+                    if data:
+                        self._dispatch(name, "\n".join(data))
+                    name, data = "message", []
+                elif line.startswith(":"):
+                    continue
+                else:
+                    field, _, value = line.partition(":")
+                    value = value[1:] if value.startswith(" ") else value
+                    if field == "event":
+                        name = value
+                    elif field == "data":
+                        data.append(value)
+        finally:
+            self._connection = None
+            connection.close()
+
+    def _dispatch(self, name, payload):
+        capture = get_capture()
+        if capture is not None:
+            capture.record_event(self.esp32_ip, name, payload)
+        try:
+            data = json.loads(payload)
+        except ValueError:
+            data = {"raw": payload}
+        else:
+            if name == "status" and isinstance(data, dict):
+                data = get_client(self.esp32_ip).decoder.decode("status", data)
+        self.events_received += 1
+        if name == "status" and not isinstance(data, Status):
+            # Las interfaces leen ``data.connected``: sin un Status no hay nada que aplicar
+            self.events_dropped += 1
+            self.last_error = f"Evento status no válido: {payload[:200]}"
+            return
+        self.on_event(name, data)
@@ -0,0 +1,356 @@
+"""Sondeo del ESP32 sin interfaz gráfica (servidor, contenedor, Raspberry Pi...).
+
+No importa PyQt6 ni tkinter: usa el mismo cliente (``esp32_client``), el mismo
+canal de eventos (``esp32_events``) y los mismos registros (``esp32_records``)
+que las interfaces. Por cada ESP32 un hilo sondea ``/status``, ``/devices`` y
+``/scan``; el intervalo de cada uno lo adapta un ``PollScheduler`` (más lento
+si no hay cambios, backoff si el ESP32 no responde) y todos los ESP32
+comparten un presupuesto de peticiones por minuto. Mientras el canal de
+eventos está activo, ``/status`` y ``/devices`` solo se piden cuando el ESP32
+avisa de un cambio.
+
+Cada cambio se escribe como una línea JSON (stdout o fichero) y las métricas
+se sirven en formato de texto de Prometheus en ``http://127.0.0.1:9105/metrics``.
+
+Uso::
+
+    python esp32_poller.py --esp32 192.168.4.1 --output esp32.jsonl
+    python esp32_poller.py --esp32 10.0.0.20 --esp32 10.0.0.21 --metrics-port 9200
+    python esp32_poller.py --esp32 192.168.4.1 --capture campo.jsonl.gz
+"""
+import argparse
+import json
+import signal
+import sys
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from circuit_breaker import CircuitOpenError, add_recovery_listener
+from esp32_capture import start_capture, stop_capture
+from esp32_client import DEFAULT_ESP32_IP, NOT_MODIFIED, OPERATIONS, close_all, get_client
+from esp32_events import EventStream
+from esp32_records import as_dict
+from poll_scheduler import DEFAULT_BUDGET, DEFAULT_BURST, PollScheduler, RequestBudget
+
+METRICS_PORT = 9105
+
+# Descripción de cada métrica: nombre -> (tipo, ayuda)
+METRICS = {
+    "esp32_up": ("gauge", "1 si la última petición al ESP32 tuvo respuesta"),
+    "esp32_requests_total": ("counter", "Peticiones HTTP por endpoint y resultado"),
+    "esp32_request_duration_seconds_sum": ("counter", "Tiempo total de las peticiones por endpoint"),
+    "esp32_request_duration_seconds_count": ("counter", "Peticiones cronometradas por endpoint"),
+    "esp32_wifi_connected": ("gauge", "1 si el ESP32 está conectado a una red WiFi"),
+    "esp32_wifi_rssi_dbm": ("gauge", "RSSI del enlace WiFi del ESP32"),
+    "esp32_devices": ("gauge", "Dispositivos conocidos por el ESP32 según estado"),
+    "esp32_networks_visible": ("gauge", "Redes WiFi del último escaneo"),
+    "esp32_events_connected": ("gauge", "1 si el canal de eventos está activo"),
+    "esp32_events_total": ("counter", "Eventos recibidos por el canal de eventos"),
+    "esp32_circuit_open": ("gauge", "1 si el circuito del endpoint está abierto o semiabierto"),
+}
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels):
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in labels)
+
+
+class Metrics:
+    """Contadores y medidores en memoria, compartidos por todos los sondeos"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = defaultdict(float)
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self._values[name, tuple(sorted(labels.items()))] = value
+
+    def add(self, name, value=1, **labels):
+        with self._lock:
+            self._values[name, tuple(sorted(labels.items()))] += value
+
+    def render(self):
+        """Formato de texto de Prometheus (versión 0.0.4)"""
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = []
+        current = None
+        for (name, labels), value in values:
+            if name != current:
+                kind, help_text = METRICS[name]
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                current = name
+            lines.append(f"{name}{{{_labels(labels)}}} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.server.metrics.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class JsonLinesWriter:
+    """Salida de líneas JSON compartida por los hilos de sondeo"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    def write(self, record):
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+        with self._lock:
+            self.stream.write(line)
+            self.stream.flush()
+
+
+class ESP32Poller:
+    """Sondeo de un ESP32 en un hilo propio"""
+
+    def __init__(self, esp32_ip, writer, metrics, status_interval=5, devices_interval=10,
+                 scan_interval=60, events=True, enrich=False, budget=None):
+        self.esp32_ip = esp32_ip
+        self.writer = writer
+        self.metrics = metrics
+        self.scheduler = PollScheduler(budget)
+        for operation, interval in (("status", status_interval), ("devices", devices_interval),
+                                    ("scan_wifi", scan_interval)):
+            if interval:
+                self.scheduler.add(operation, interval)
+        self.enrich = enrich
+        self.connected = False
+        self.active_ips = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.events = EventStream(esp32_ip, self._on_event, self._on_events_state) if events else None
+        add_recovery_listener(self._on_recovered)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name=f"poller-{self.esp32_ip}",
+                                        daemon=True)
+        self._thread.start()
+        if self.events is not None:
+            self.events.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self.events is not None:
+            self.events.stop()
+
+    def join(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def emit(self, kind, **fields):
+        self.writer.write({"ts": round(time.time(), 3), "esp32": self.esp32_ip,
+                           "type": kind, **fields})
+
+    def poll_now(self, *operations):
+        """Adelantar las operaciones indicadas al siguiente ciclo"""
+        self.scheduler.poll_now(*operations)
+        self._wake.set()
+
+    def _on_events_state(self, connected):
+        self.metrics.set("esp32_events_connected", 1 if connected else 0, esp32=self.esp32_ip)
+        self.emit("events", connected=connected)
+        # Sincronizar lo que haya cambiado mientras no había canal
+        self.poll_now("status", "devices")
+
+    def _on_recovered(self, esp32_ip):
+        # El sondeo TCP del circuit breaker vuelve a conectar: no esperar al backoff
+        if esp32_ip == self.esp32_ip:
+            self.emit("recovered")
+            self.scheduler.boost()
+            self.poll_now("status", "devices")
+
+    def _on_event(self, name, data):
+        self.metrics.add("esp32_events_total", esp32=self.esp32_ip, event=name)
+        if name == "status":
+            self.on_status(data)
+        elif name == "devices":
+            self.poll_now("devices")
+
+    def _pushed(self, operation):
+        # Con el canal activo el ESP32 avisa de los cambios de estado y dispositivos
+        return (operation in ("status", "devices") and self.events is not None
+                and self.events.connected)
+
+    def _accept(self, operation, forced):
+        if operation == "devices" and not self.connected:
+            return False
+        # Forzada: primera vez o pedida con poll_now
+        return forced or not self._pushed(operation)
+
+    def _run(self):
+        while not self._stop.is_set():
+            for operation, forced in self.scheduler.due(accept=self._accept):
+                self.poll(operation)
+            delay = self.scheduler.next_delay()
+            self._wake.wait(60 if delay is None else max(delay, 0.05))
+            self._wake.clear()
+
+    def poll(self, operation):
+        """Hacer una petición y publicar el resultado"""
+        client = get_client(self.esp32_ip)
+        endpoint = OPERATIONS[operation][1]
+        started = time.perf_counter()
+        try:
+            response = client.call(operation)
+        except requests.exceptions.RequestException as e:
+            self.scheduler.failure(operation)
+            self.metrics.set("esp32_up", 0, esp32=self.esp32_ip)
+            self.metrics.add("esp32_requests_total", esp32=self.esp32_ip, endpoint=endpoint,
+                             code="circuit_open" if isinstance(e, CircuitOpenError) else "error")
+            self.update_circuits(client)
+            self.emit("error", endpoint=endpoint, error=str(e))
+            return
+        self.update_circuits(client)
+        elapsed = time.perf_counter() - started
+        self.metrics.set("esp32_up", 1, esp32=self.esp32_ip)
+        self.metrics.add("esp32_requests_total", esp32=self.esp32_ip, endpoint=endpoint,
+                         code=str(response.status_code))
+        self.metrics.add("esp32_request_duration_seconds_sum", elapsed,
+                         esp32=self.esp32_ip, endpoint=endpoint)
+        self.metrics.add("esp32_request_duration_seconds_count", esp32=self.esp32_ip,
+                         endpoint=endpoint)
+        if response.status_code == NOT_MODIFIED:
+            self.scheduler.success(operation)
+            return
+        if response.status_code != 200:
+            self.scheduler.failure(operation)
+            self.emit("error", endpoint=endpoint, error=f"Error del servidor: {response.status_code}")
+            return
+        try:
+            data = client.decode(operation, response)
+        except ValueError:
+            self.scheduler.failure(operation)
+            self.emit("error", endpoint=endpoint, error="Respuesta no válida del ESP32")
+            return
+        self.scheduler.success(operation, data)
+        {"status": self.on_status, "devices": self.on_devices,
+         "scan_wifi": self.on_scan}[operation](data)
+
+    def update_circuits(self, client):
+        open_paths = client.open_circuits()
+        for path in client.breakers:
+            self.metrics.set("esp32_circuit_open", 1 if path in open_paths else 0,
+                             esp32=self.esp32_ip, endpoint=path)
+
+    def on_status(self, status):
+        was_connected, self.connected = self.connected, status.connected
+        self.metrics.set("esp32_wifi_connected", 1 if status.connected else 0, esp32=self.esp32_ip)
+        if status.connected:
+            self.metrics.set("esp32_wifi_rssi_dbm", status.rssi, esp32=self.esp32_ip)
+        if status.connected and not was_connected:
+            self.poll_now("devices")
+        self.emit("status", **as_dict(status))
+
+    def on_devices(self, device_list):
+        devices = device_list.devices
+        if self.enrich:
+            # Importados aquí: solo hacen falta con --enrich
+            from arp_cache import enrich_devices
+            from hostname_resolver import get_resolver
+            from oui_vendors import enrich_vendors
+            devices = get_resolver().enrich(enrich_vendors(enrich_devices(devices)))
+
+        active = {device.ip for device in devices if device.active}
+        joined = sorted(active - self.active_ips) if self.active_ips is not None else []
+        left = sorted(self.active_ips - active) if self.active_ips is not None else []
+        self.active_ips = active
+        self.metrics.set("esp32_devices", len(active), esp32=self.esp32_ip, state="active")
+        self.metrics.set("esp32_devices", len(devices) - len(active), esp32=self.esp32_ip,
+                         state="inactive")
+        self.emit("devices", joined=joined, left=left, **as_dict(device_list))
+
+    def on_scan(self, scan):
+        self.metrics.set("esp32_networks_visible", len(scan.networks), esp32=self.esp32_ip)
+        self.emit("scan", **as_dict(scan))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sondeo de ESP32-S3 sin interfaz gráfica")
+    parser.add_argument("--esp32", action="append", metavar="IP",
+                        help=f"IP (o host:puerto) del ESP32; se puede repetir (por defecto {DEFAULT_ESP32_IP})")
+    parser.add_argument("--output", default="-", help="fichero JSON Lines ('-' para stdout)")
+    parser.add_argument("--metrics-host", default="127.0.0.1")
+    parser.add_argument("--metrics-port", type=int, default=METRICS_PORT, help="0 para desactivar")
+    parser.add_argument("--status-interval", type=float, default=5, help="segundos entre sondeos de /status")
+    parser.add_argument("--devices-interval", type=float, default=10, help="segundos entre sondeos de /devices")
+    parser.add_argument("--scan-interval", type=float, default=60,
+                        help="segundos entre escaneos WiFi (0 para desactivar)")
+    parser.add_argument("--budget", type=float,
+                        help=f"peticiones por minuto entre todos los ESP32 (por defecto {DEFAULT_BUDGET} por ESP32)")
+    parser.add_argument("--no-events", action="store_true", help="no usar el canal de eventos")
+    parser.add_argument("--capture", metavar="FICHERO",
+                        help="guardar las peticiones y eventos para esp32_replay (.jsonl.gz)")
+    parser.add_argument("--enrich", action="store_true",
+                        help="completar MAC (ARP), fabricante (OUI) y hostname")
+    args = parser.parse_args()
+
+    if args.capture:
+        start_capture(args.capture)
+    stream = sys.stdout if args.output == "-" else open(args.output, "a", encoding="utf-8")
+    writer = JsonLinesWriter(stream)
+    metrics = Metrics()
+
+    server = None
+    if args.metrics_port:
+        server = ThreadingHTTPServer((args.metrics_host, args.metrics_port), MetricsHandler)
+        server.daemon_threads = True
+        server.metrics = metrics
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f"Métricas en http://{args.metrics_host}:{server.server_address[1]}/metrics",
+              file=sys.stderr)
+
+    addresses = args.esp32 or [DEFAULT_ESP32_IP]
+    budget = RequestBudget(args.budget or DEFAULT_BUDGET * len(addresses),
+                           DEFAULT_BURST * len(addresses))
+    pollers = [ESP32Poller(ip, writer, metrics, args.status_interval, args.devices_interval,
+                           args.scan_interval, events=not args.no_events, enrich=args.enrich,
+                           budget=budget).start()
+               for ip in addresses]
+
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopping.set())
+    try:
+        while not stopping.wait(3600):
+            pass
+    except KeyboardInterrupt:
+        pass
+    for poller in pollers:
+        poller.stop()
+    for poller in pollers:
+        poller.join(5)
+    if server is not None:
+        server.shutdown()
+    close_all()
+    stop_capture()
+    if stream is not sys.stdout:
+        stream.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+"""Registros tipados para las respuestas JSON del ESP32.
+
+``PayloadDecoder`` convierte una sola vez (en el hilo que hizo la petición) los
+JSON de ``/scan``, ``/status``, ``/devices`` y ``/config`` en objetos con
+``__slots__``: los campos quedan validados y con su tipo, y los textos que se
+repiten en cada sondeo (SSID, tipo, MAC, gateway...) se internan. Las
+interfaces, el historial y los enriquecedores (ARP, OUI, hostnames) leen
+atributos en lugar de hacer ``dict.get`` con valores por defecto en cada
+sondeo.
+
+El decodificador recuerda el último registro de cada red (por BSSID) y de
+cada dispositivo (por IP): si el JSON de la entidad no cambió, se devuelve el
+mismo objeto, con la MAC, el fabricante y el hostname ya completados y los
+textos derivados (calidad de señal, hora de última conexión) ya calculados.
+"""
+import sys
+import threading
+from datetime import datetime
+
+from subnet import ip_to_int
+
+UNKNOWN = "Unknown"
+
+# Campos que cambian en cada respuesta sin que cambie la entidad
+VOLATILE_FIELDS = ("uptime", "onlineTime")
+
+
+def signal_quality(rssi):
+    if rssi > -50:
+        return "Excelente", "#4caf50"
+    if rssi > -60:
+        return "Buena", "#8bc34a"
+    if rssi > -70:
+        return "Regular", "#ff9800"
+    return "Débil", "#f44336"
+
+
+_signal_texts = {}
+
+
+def signal_text(rssi):
+    """``"-48 dBm (Excelente)"``; hay pocos valores posibles y se guardan todos"""
+    text = _signal_texts.get(rssi)
+    if text is None:
+        text = _signal_texts[rssi] = f"{rssi} dBm ({signal_quality(rssi)[0]})"
+    return text
+
+
+def _text(value, default=""):
+    if value is None:
+        return default
+    return sys.intern(value if isinstance(value, str) else str(value))
+
+
+def _int(value, default=0):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _optional_int(value):
+    return None if value is None else _int(value, None)
+
+
+def _strip_volatile(raw):
+    for field in VOLATILE_FIELDS:
+        raw.pop(field, None)
+    return raw
+
+
+def as_dict(record):
+    """Campos públicos de un registro (para JSON)"""
+    data = {}
+    for name in type(record).__slots__:
+        if name.startswith("_"):
+            continue
+        value = getattr(record, name)
+        if isinstance(value, list):
+            value = [as_dict(item) for item in value]
+        elif hasattr(value, "__slots__"):
+            value = as_dict(value)
+        data[name] = value
+    return data
+
+
+class WiFiNetwork:
+    """Red de ``/scan``"""
+    __slots__ = ("ssid", "rssi", "encryption", "channel", "bssid", "_raw")
+
+    def __init__(self, raw):
+        self._raw = raw
+        self.ssid = _text(raw.get("ssid"))
+        self.rssi = _int(raw.get("rssi"))
+        self.encryption = _text(raw.get("encryption"))
+        self.channel = _int(raw.get("channel"))
+        self.bssid = _text(raw.get("bssid"))
+
+    @property
+    def key(self):
+        return self.bssid or self.ssid
+
+    @property
+    def quality(self):
+        return signal_quality(self.rssi)
+
+    @property
+    def signal_text(self):
+        return signal_text(self.rssi)
+
+
+class WiFiScan:
+    """Resultado de ``/scan``"""
+    __slots__ = ("networks", "total_networks", "scan_time")
+
+    def __init__(self, networks, total_networks, scan_time):
+        self.networks = networks
+        self.total_networks = total_networks
+        self.scan_time = scan_time
+
+
+class Status:
+    """Estado de la conexión WiFi del ESP32 (``/status`` o evento ``status``)"""
+    __slots__ = ("connected", "ssid", "ip", "rssi", "gateway", "dns", "bssid", "channel", "_raw")
+
+    def __init__(self, raw):
+        self._raw = raw
+        self.connected = bool(raw.get("connected", False))
+        self.ssid = _text(raw.get("ssid"), UNKNOWN)
+        self.ip = _text(raw.get("ip"), UNKNOWN)
+        self.rssi = _int(raw.get("rssi"))
+        self.gateway = _text(raw.get("gateway"), "N/A")
+        self.dns = _text(raw.get("dns"), "N/A")
+        self.bssid = _text(raw.get("bssid"))
+        self.channel = _int(raw.get("channel"))
+
+    @property
+    def quality(self):
+        return signal_quality(self.rssi)
+
+
+class Device:
+    """Dispositivo de ``/devices`` o del barrido local.
+
+    ``mac``, ``vendor`` y ``hostname`` los completan los enriquecedores; al
+    reutilizar el registro en el siguiente sondeo se conservan.
+    """
+    __slots__ = ("ip", "ip_int", "type", "mac", "vendor", "hostname", "active",
+                 "last_seen", "first_seen", "response_time", "_raw", "_last_seen_text")
+
+    def __init__(self, ip, ip_int, device_type=UNKNOWN, mac=UNKNOWN, hostname=UNKNOWN,
+                 active=False, last_seen=None, first_seen=None, response_time=None, raw=None):
+        self.ip = ip
+        self.ip_int = ip_int
+        self.type = device_type
+        self.mac = mac
+        self.vendor = ""
+        self.hostname = hostname
+        self.active = active
+        self.last_seen = last_seen
+        self.first_seen = first_seen
+        self.response_time = response_time
+        self._raw = raw
+        self._last_seen_text = None
+
+    @classmethod
+    def from_json(cls, raw):
+        """Validar un dispositivo del JSON; None si la IP no es válida"""
+        ip = raw.get("ip")
+        try:
+            ip_int = ip_to_int(ip)
+        except (OSError, TypeError):
+            return None
+        return cls(_text(ip), ip_int, _text(raw.get("type"), UNKNOWN),
+                   _text(raw.get("mac"), UNKNOWN), _text(raw.get("hostname"), UNKNOWN),
+                   bool(raw.get("active", False)), _optional_int(raw.get("lastSeen")),
+                   _optional_int(raw.get("firstSeen")), _optional_int(raw.get("responseTime")),
+                   raw)
+
+    def inherit(self, previous):
+        """Conservar lo que los enriquecedores añadieron al registro anterior"""
+        raw, old = self._raw, previous._raw
+        if old is not None and raw.get("mac") == old.get("mac"):
+            self.mac = previous.mac
+            self.vendor = previous.vendor
+        if old is not None and raw.get("hostname") == old.get("hostname"):
+            self.hostname = previous.hostname
+
+    @property
+    def last_seen_text(self):
+        if self._last_seen_text is None:
+            if self.last_seen:
+                self._last_seen_text = datetime.fromtimestamp(self.last_seen / 1000).strftime('%H:%M:%S')
+            else:
+                self._last_seen_text = "N/A"
+        return self._last_seen_text
+
+    @property
+    def status_text(self):
+        return "🟢 Activo" if self.active else "🔴 Inactivo"
+
+
+class NetworkInfo:
+    """Bloque ``networkInfo`` de ``/devices``"""
+    __slots__ = ("subnet", "network", "broadcast", "gateway", "dns", "ssid", "channel",
+                 "rssi", "_raw")
+
+    def __init__(self, raw):
+        self._raw = raw
+        self.subnet = _text(raw.get("subnet"))
+        self.network = _text(raw.get("network"))
+        self.broadcast = _text(raw.get("broadcast"))
+        self.gateway = _text(raw.get("gateway"), "N/A")
+        self.dns = _text(raw.get("dns"), "N/A")
+        self.ssid = _text(raw.get("ssid"))
+        self.channel = _int(raw.get("channel"))
+        self.rssi = _int(raw.get("rssi"))
+
+
+class DeviceList:
+    """Resultado de ``/devices``"""
+    __slots__ = ("devices", "network_info", "total_devices", "active_devices",
+                 "scan_interval", "scan_time")
+
+    def __init__(self, devices, network_info, total_devices, active_devices,
+                 scan_interval, scan_time):
+        self.devices = devices
+        self.network_info = network_info
+        self.total_devices = total_devices
+        self.active_devices = active_devices
+        self.scan_interval = scan_interval
+        self.scan_time = scan_time
+
+
+class Config:
+    """Configuración del firmware (``/config``)"""
+    __slots__ = ("scan_interval", "wifi_scan_interval", "subnet_mask", "free_heap",
+                 "uptime", "version", "events_port")
+
+    def __init__(self, raw):
+        self.scan_interval = _int(raw.get("scanInterval"))
+        self.wifi_scan_interval = _int(raw.get("wifiScanInterval"))
+        self.subnet_mask = _text(raw.get("subnetMask")) or None
+        self.free_heap = _int(raw.get("freeHeap"))
+        self.uptime = _int(raw.get("uptime"))
+        self.version = _text(raw.get("version"))
+        self.events_port = _optional_int(raw.get("eventsPort"))
+
+
+class PayloadDecoder:
+    """Decodificador de las respuestas de un ESP32 (uno por ``ESP32Client``)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._networks = {}
+        self._devices = {}
+        self._status = None
+        self._network_info = None
+        self.reused = 0
+        self.decoded = 0
+
+    def decode(self, operation, payload):
+        """Registro para ``operation``; las demás respuestas se devuelven tal cual"""
+        decoder = _DECODERS.get(operation)
+        if decoder is None or not isinstance(payload, dict):
+            return payload
+        with self._lock:
+            return decoder(self, payload)
+
+    def _reuse(self, previous, raw):
+        if previous is not None and previous._raw == raw:
+            self.reused += 1
+            return True
+        self.decoded += 1
+        return False
+
+    def scan(self, payload):
+        networks = {}
+        for raw in payload.get("networks") or ():
+            if not isinstance(raw, dict):
+                continue
+            key = raw.get("bssid") or raw.get("ssid")
+            network = self._networks.get(key)
+            if not self._reuse(network, raw):
+                network = WiFiNetwork(raw)
+            networks[key] = network
+        self._networks = networks
+        return WiFiScan(list(networks.values()),
+                        _int(payload.get("totalNetworks"), len(networks)),
+                        _int(payload.get("scanTime")))
+
+    def status(self, payload):
+        raw = _strip_volatile(payload)
+        if not self._reuse(self._status, raw):
+            self._status = Status(raw)
+        return self._status
+
+    def devices(self, payload):
+        devices = {}
+        for raw in payload.get("devices") or ():
+            if not isinstance(raw, dict):
+                continue
+            raw = _strip_volatile(raw)
+            previous = self._devices.get(raw.get("ip"))
+            if self._reuse(previous, raw):
+                device = previous
+            else:
+                device = Device.from_json(raw)
+                if device is None:
+                    continue
+                if previous is not None:
+                    device.inherit(previous)
+            devices[device.ip] = device
+        self._devices = devices
+
+        raw = payload.get("networkInfo")
+        if not isinstance(raw, dict):
+            network_info = None
+        elif self._reuse(self._network_info, raw):
+            network_info = self._network_info
+        else:
+            network_info = self._network_info = NetworkInfo(raw)
+
+        device_list = list(devices.values())
+        return DeviceList(device_list, network_info,
+                          _int(payload.get("totalDevices"), len(device_list)),
+                          _int(payload.get("activeDevices"),
+                               sum(1 for device in device_list if device.active)),
+                          _int(payload.get("scanInterval")), _int(payload.get("scanTime")))
+
+    def config(self, payload):
+        return Config(payload)
+
+    def clear(self):
+        """Olvidar los registros guardados (p. ej. al desconectar)"""
+        with self._lock:
+            self._networks = {}
+            self._devices = {}
+            self._status = None
+            self._network_info = None
+
+
+_DECODERS = {
+    "scan_wifi": PayloadDecoder.scan,
+    "status": PayloadDecoder.status,
+    "devices": PayloadDecoder.devices,
+    "config": PayloadDecoder.config,
+}
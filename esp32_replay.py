@@ -0,0 +1,294 @@
+"""Servidor que reproduce una captura de ``esp32_capture`` como si fuera el ESP32.
+
+Cualquiera de las interfaces (o ``esp32_poller`` y ``esp32_bench``) puede
+apuntar a él en lugar de a la placa. Dos modos:
+
+- Por tiempo (por defecto): el reloj de la reproducción avanza ``--speed``
+  veces más rápido que el real y cada petición recibe la última respuesta
+  capturada para esa ruta hasta ese instante, con su duración original
+  (dividida por ``--speed``). Los eventos capturados se emiten por
+  ``/events`` en su momento.
+- ``--deterministic``: cada petición a una ruta recibe la siguiente respuesta
+  capturada para ella, sin esperas ni canal de eventos (las interfaces
+  sondean). Dos ejecuciones con las mismas peticiones ven lo mismo.
+
+``/status`` y ``/devices`` responden ``304`` si ``If-None-Match`` coincide
+con el ETag capturado, igual que el firmware. Las peticiones que fallaron en
+la captura (timeout, conexión rechazada...) cierran la conexión sin responder.
+
+Uso::
+
+    python esp32_replay.py campo.jsonl.gz --port 8080 --speed 10
+    python esp32_replay.py campo.jsonl.gz --deterministic --loop
+    python "import sys.py"      # y poner 127.0.0.1:8080 como IP del ESP32
+"""
+import argparse
+import bisect
+import json
+import threading
+import time
+from collections import Counter, defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from esp32_capture import read_capture
+from esp32_emulator import EventHub, EventsHandler
+
+
+class Replay:
+    """Respuestas y eventos de un ESP32 de la captura, ordenados por instante"""
+
+    def __init__(self, entries, esp32_ip=None):
+        entries = list(entries)
+        if esp32_ip is None:
+            # El ESP32 que más respondió: las interfaces arrancan con la IP
+            # por defecto y sus fallos también quedan en la captura
+            answered = Counter(entry["ip"] for entry in entries if "s" in entry)
+            esp32_ip = answered.most_common(1)[0][0] if answered else None
+        self.esp32_ip = esp32_ip
+        self.responses = defaultdict(list)    # (método, ruta) -> [entrada]
+        self.times = defaultdict(list)        # (método, ruta) -> [instante]
+        self.events = []                      # (instante, nombre, datos)
+        bodies = {}
+        for entry in entries:
+            if entry["ip"] != self.esp32_ip:
+                continue
+            if "ev" in entry:
+                self.events.append((entry["t"], entry["ev"], entry["b"]))
+                continue
+            key = entry["m"], entry["p"]
+            if entry.get("s") == 304:
+                # El 304 confirma el último cuerpo completo con ese ETag (si
+                # la captura empezó con un 304 no hay cuerpo que servir)
+                if key not in bodies:
+                    continue
+                entry = dict(entry, s=200, b=bodies[key])
+            elif entry.get("s") == 200 and entry.get("b") is not None:
+                bodies[key] = entry["b"]
+            self.responses[key].append(entry)
+            self.times[key].append(entry["t"])
+        times = [t for values in self.times.values() for t in values]
+        times += [t for t, _, _ in self.events]
+        self.duration = max(times, default=0.0)
+
+    @classmethod
+    def load(cls, path, esp32_ip=None):
+        return cls(read_capture(path), esp32_ip)
+
+    def __len__(self):
+        return sum(len(entries) for entries in self.responses.values())
+
+    def at(self, method, path, t):
+        """Última respuesta capturada hasta el instante ``t`` (o la primera)"""
+        key = method, path
+        index = bisect.bisect_right(self.times[key], t) - 1
+        entries = self.responses.get(key)
+        return entries[max(index, 0)] if entries else None
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "ESP32Replay"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status, body=b"", headers=()):
+        self.send_response(status)
+        self.send_header("Access-Control-Allow-Origin", "*")
+        for name, value in headers:
+            self.send_header(name, value)
+        if status != 304:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def _reply(self, method):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        path = urlsplit(self.path).path
+        entry = self.server.player.next(method, path)
+        if entry is None:
+            self._send(404, b'{"error":"Not found"}')
+            return
+        delay = self.server.player.delay(entry)
+        if delay:
+            time.sleep(delay)
+        if "x" in entry:
+            # Fallo en la captura: el cliente ve la conexión cortada
+            self.close_connection = True
+            return
+        etag = entry.get("e")
+        headers = [("ETag", etag)] if etag else []
+        if etag and self.headers.get("If-None-Match") == etag:
+            self._send(304, headers=headers)
+            return
+        body = entry.get("b") or ""
+        if path == "/config" and entry["s"] == 200:
+            body = self.server.player.config_body(body)
+        self._send(entry["s"], body.encode("utf-8"), headers)
+
+    def do_GET(self):
+        self._reply("GET")
+
+    def do_POST(self):
+        self._reply("POST")
+
+    def do_OPTIONS(self):
+        self._send(200, headers=[("Access-Control-Allow-Methods", "GET, POST, OPTIONS"),
+                                 ("Access-Control-Allow-Headers", "Content-Type")])
+
+
+class ReplayServer:
+    """Servidor HTTP (y de eventos, en el modo por tiempo) de un ``Replay``"""
+
+    def __init__(self, replay, host="127.0.0.1", port=8080, events_port=0, speed=1.0,
+                 deterministic=False, loop=False, verbose=False):
+        self.replay = replay
+        self.speed = speed
+        self.deterministic = deterministic
+        self.loop = loop
+        self.events = EventHub()
+        self.requests_served = 0
+        self._positions = defaultdict(int)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._started = None
+
+        self.server = ThreadingHTTPServer((host, port), ReplayHandler)
+        servers = [self.server]
+        self.events_server = None
+        if replay.events and not deterministic:
+            self.events_server = ThreadingHTTPServer((host, events_port), EventsHandler)
+            # ``EventsHandler`` del emulador busca el hub en ``server.state.events``
+            self.events_server.state = self
+            servers.append(self.events_server)
+        for server in servers:
+            server.daemon_threads = True
+            server.player = self
+            server.verbose = verbose
+            server.stopping = self._stop
+        self._threads = []
+
+    @property
+    def address(self):
+        host, port = self.server.server_address[:2]
+        return f"{host}:{port}"
+
+    def clock(self):
+        """Instante de la captura que se está reproduciendo"""
+        t = (time.monotonic() - self._started) * self.speed
+        if self.loop and self.replay.duration:
+            t %= self.replay.duration
+        return t
+
+    def next(self, method, path):
+        """Respuesta que toca para una petición"""
+        with self._lock:
+            self.requests_served += 1
+            if not self.deterministic:
+                return self.replay.at(method, path, self.clock())
+            entries = self.replay.responses.get((method, path))
+            if not entries:
+                return None
+            position = self._positions[method, path]
+            self._positions[method, path] += 1
+            if self.loop:
+                return entries[position % len(entries)]
+            return entries[min(position, len(entries) - 1)]
+
+    def delay(self, entry):
+        """Duración capturada de la petición, comprimida como el reloj"""
+        if self.deterministic or not self.speed:
+            return 0.0
+        return entry.get("d", 0.0) / self.speed
+
+    def config_body(self, body):
+        """``/config`` con el puerto de eventos de la reproducción"""
+        try:
+            data = json.loads(body)
+        except ValueError:
+            return body
+        if self.events_server is not None:
+            data["eventsPort"] = self.events_server.server_address[1]
+        else:
+            data.pop("eventsPort", None)
+        return json.dumps(data)
+
+    def _events_loop(self):
+        while not self._stop.is_set():
+            for t, name, payload in self.replay.events:
+                wait = (t - self.clock()) / self.speed
+                if wait < 0 and self.loop:
+                    continue
+                if self._stop.wait(max(wait, 0)):
+                    return
+                try:
+                    self.events.publish(name, json.loads(payload))
+                except ValueError:
+                    continue
+            if not self.loop:
+                return
+            # Esperar a que el reloj vuelva a empezar
+            if self._stop.wait(max(self.replay.duration - self.clock(), 0) / self.speed):
+                return
+
+    def start(self):
+        self._started = time.monotonic()
+        targets = [self.server.serve_forever]
+        if self.events_server is not None:
+            targets += [self.events_server.serve_forever, self._events_loop]
+        for target in targets:
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self.events.close()
+        for server in (self.server, self.events_server):
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reproducir una captura del tráfico con el ESP32")
+    parser.add_argument("capture", help="fichero de esp32_capture (.jsonl.gz)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--events-port", type=int, default=8081)
+    parser.add_argument("--esp32", metavar="IP", help="ESP32 de la captura (por defecto el que más respondió)")
+    parser.add_argument("--speed", type=float, default=1.0, help="factor de compresión del tiempo")
+    parser.add_argument("--deterministic", action="store_true",
+                        help="servir las respuestas en orden, sin esperas ni eventos")
+    parser.add_argument("--loop", action="store_true", help="volver a empezar al terminar")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args()
+    if args.speed <= 0:
+        parser.error("--speed debe ser mayor que 0")
+
+    replay = Replay.load(args.capture, args.esp32)
+    if not len(replay):
+        parser.error(f"La captura no tiene peticiones de {args.esp32 or 'ningún ESP32'}")
+    server = ReplayServer(replay, args.host, args.port, args.events_port, speed=args.speed,
+                          deterministic=args.deterministic, loop=args.loop,
+                          verbose=args.verbose).start()
+    mode = "en orden" if args.deterministic else f"a x{args.speed:g}"
+    print(f"Reproduciendo {len(replay)} respuestas y {len(replay.events)} eventos de "
+          f"{replay.esp32_ip} ({replay.duration:.0f} s, {mode}) en http://{server.address}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
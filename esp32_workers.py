@@ -0,0 +1,217 @@
+"""Ejecutor de peticiones al ESP32 para las interfaces PyQt6.
+
+En lugar de crear un ``QThread`` por cada operación, un número fijo de hilos
+de trabajo consume una cola de peticiones. Los resultados vuelven al hilo de
+la interfaz mediante las señales de cada ``NetworkRequest``.
+
+Las lecturas (``GET``) se agrupan: si ya hay una petición en curso para la
+misma operación y el mismo ESP32, los nuevos suscriptores se conectan a esa
+petición y todos reciben la misma respuesta.
+
+Cada petición tiene un plazo que empieza a contar al crearla
+(``OPERATION_DEADLINES``): si pasa demasiado tiempo en la cola, falla sin
+llegar a enviarse. Con el circuito del endpoint abierto falla al instante.
+
+Si el ESP32 responde ``304`` a una lectura condicional se emite
+``not_modified`` en lugar de ``data_updated``: la interfaz no tiene nada que
+interpretar ni volver a dibujar. Las respuestas de ``/scan``, ``/status``,
+``/devices`` y ``/config`` se decodifican en el hilo de trabajo y llegan a la
+interfaz como registros de ``esp32_records``.
+"""
+import queue
+import threading
+
+import requests
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from esp32_client import NOT_MODIFIED, OPERATIONS, get_client, operation_deadline
+from esp32_events import EventStream
+
+
+class NetworkRequest(QObject):
+    """Petición pendiente; emite el resultado (registro o dict), el error
+    (str) o ``not_modified`` si los datos no cambiaron desde la última lectura"""
+    data_updated = pyqtSignal(object)
+    error_occurred = pyqtSignal(str)
+    not_modified = pyqtSignal()
+
+    def __init__(self, esp32_ip, operation, data=None, scope=None):
+        super().__init__()
+        self.esp32_ip = esp32_ip
+        self.operation = operation
+        self.data = data
+        self.scope = scope
+        self.deadline = operation_deadline(operation)
+        self._subscribers = []
+
+    def subscribe(self, on_result=None, on_error=None, on_unchanged=None):
+        """Conectar callbacks, ignorando los que ya estaban suscritos"""
+        for callback, signal in ((on_result, self.data_updated),
+                                 (on_error, self.error_occurred),
+                                 (on_unchanged, self.not_modified)):
+            if callback is not None and callback not in self._subscribers:
+                self._subscribers.append(callback)
+                signal.connect(callback)
+
+    def fetch(self):
+        """Hacer la petición HTTP y devolver ``(datos, error)``; ambos son
+        None si la respuesta fue ``304``"""
+        try:
+            client = get_client(self.esp32_ip)
+            response = client.call(self.operation, self.data, self.deadline, self.scope)
+
+            if response.status_code == 200:
+                return client.decode(self.operation, response), None
+            if response.status_code == NOT_MODIFIED:
+                return None, None
+            return None, f"Error del servidor: {response.status_code}"
+
+        except requests.exceptions.RequestException as e:
+            return None, f"Error de conexión: {str(e)}"
+        except ValueError:
+            return None, "Respuesta no válida del ESP32"
+
+    def deliver(self, data, error):
+        """Emitir el resultado a todos los suscriptores"""
+        if error is not None:
+            self.error_occurred.emit(error)
+        elif data is None:
+            self.not_modified.emit()
+        else:
+            self.data_updated.emit(data)
+
+
+class TaskRequest(NetworkRequest):
+    """Tarea local (no HTTP) ejecutada en el mismo pool de hilos"""
+
+    def __init__(self, name, function):
+        super().__init__(None, name)
+        self.function = function
+
+    def fetch(self):
+        try:
+            return self.function(), None
+        except Exception as e:
+            return None, f"Error en {self.operation}: {str(e)}"
+
+
+class EventChannel(QObject):
+    """``EventStream`` con señales Qt: los eventos llegan al hilo de la interfaz"""
+    event_received = pyqtSignal(str, object)
+    connection_changed = pyqtSignal(bool)
+
+    def __init__(self, esp32_ip, parent=None):
+        super().__init__(parent)
+        self.stream = EventStream(esp32_ip, self.event_received.emit,
+                                  self.connection_changed.emit)
+
+    @property
+    def connected(self):
+        return self.stream.connected
+
+    def start(self):
+        self.stream.start()
+        return self
+
+    def stop(self):
+        self.stream.stop()
+
+
+class RequestExecutor(QObject):
+    """Pool fijo de hilos que atiende las peticiones en orden de llegada"""
+
+    def __init__(self, max_workers=2, parent=None):
+        super().__init__(parent)
+        self._jobs = queue.Queue()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self.coalesced_count = 0
+        # Espacio de ETags propio (ver ``ESP32Client.request``): un 304 solo
+        # significa "sin cambios desde lo que recibió esta ventana"
+        self.scope = object()
+        self._workers = []
+        for i in range(max_workers):
+            worker = threading.Thread(target=self._worker_loop,
+                                      name=f"esp32-worker-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def submit(self, esp32_ip, operation, data=None, on_result=None, on_error=None,
+               on_unchanged=None):
+        """Encolar una operación y devolver su ``NetworkRequest``.
+
+        Los callbacks se conectan antes de encolar para no perder resultados
+        de peticiones que terminan muy rápido. Si la operación es una lectura
+        que ya está en curso, se devuelve la petición existente.
+        """
+        key = (esp32_ip, operation)
+        coalesce = data is None and OPERATIONS[operation][0] == "GET"
+
+        with self._lock:
+            request = self._in_flight.get(key) if coalesce else None
+            is_new = request is None
+            if is_new:
+                request = NetworkRequest(esp32_ip, operation, data, self.scope)
+                if coalesce:
+                    self._in_flight[key] = request
+            else:
+                self.coalesced_count += 1
+            request.subscribe(on_result, on_error, on_unchanged)
+
+        if is_new:
+            self._jobs.put(request)
+        return request
+
+    def submit_task(self, name, function, on_result=None, on_error=None):
+        """Ejecutar ``function()`` en el pool; las tareas con el mismo
+        nombre en curso se agrupan igual que las lecturas"""
+        key = (None, name)
+        with self._lock:
+            request = self._in_flight.get(key)
+            is_new = request is None
+            if is_new:
+                request = TaskRequest(name, function)
+                self._in_flight[key] = request
+            else:
+                self.coalesced_count += 1
+            request.subscribe(on_result, on_error)
+
+        if is_new:
+            self._jobs.put(request)
+        return request
+
+    def pending(self):
+        """Número aproximado de peticiones en cola"""
+        return self._jobs.qsize()
+
+    def _worker_loop(self):
+        while True:
+            request = self._jobs.get()
+            if request is None:
+                break
+            try:
+                data, error = request.fetch()
+            except Exception as e:
+                # Un JSON con forma inesperada no puede dejar el pool sin un
+                # hilo ni la petición en curso para siempre
+                data, error = None, f"Respuesta no válida del ESP32: {e!r}"
+            finally:
+                # Sacar la petición de la tabla antes de emitir: quien se suscriba
+                # después recibe una petición nueva en lugar de perder el resultado
+                with self._lock:
+                    key = (request.esp32_ip, request.operation)
+                    if self._in_flight.get(key) is request:
+                        del self._in_flight[key]
+            request.deliver(data, error)
+
+    def shutdown(self):
+        """Descartar la cola y detener los hilos de trabajo"""
+        try:
+            while True:
+                self._jobs.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            self._in_flight.clear()
+        for _ in self._workers:
+            self._jobs.put(None)
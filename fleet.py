@@ -0,0 +1,154 @@
+"""Registro de escáneres ESP32 y vista combinada de la flota.
+
+Las interfaces hablan con un único ESP32; en una instalación con varios, el
+registro (``wifi_manager_scanners.json``) guarda el nombre y la IP de cada
+uno, y ``merge_devices``/``merge_networks`` combinan lo que ve cada escáner en
+una sola lista con la columna de origen. El sondeo lo hace ``fleet_window``
+con un ``ScannerWorker`` por escáner sobre un pool de hilos compartido.
+"""
+import json
+import os
+import time
+
+from arp_cache import UNKNOWN_MACS
+
+SCANNERS_PATH = "wifi_manager_scanners.json"
+
+
+class Scanner:
+    """Un ESP32 de la flota y el resultado de su último sondeo"""
+
+    def __init__(self, name, esp32_ip, enabled=True):
+        self.name = name
+        self.esp32_ip = esp32_ip
+        self.enabled = enabled
+        self.status = None
+        self.devices = []
+        self.networks = []
+        self.error = None
+        self.latency = None
+        self.last_ok = None
+
+    @property
+    def online(self):
+        return self.error is None and self.last_ok is not None
+
+    def state_text(self):
+        if not self.enabled:
+            return "Pausado"
+        if self.error is not None:
+            return "Sin respuesta"
+        if self.status is None:
+            return "Consultando..."
+        return f"Conectado a {self.status.ssid}" if self.status.connected else "Sin WiFi"
+
+    def mark_ok(self, latency):
+        self.error = None
+        self.latency = latency
+        self.last_ok = time.time()
+
+    def to_json(self):
+        return {"name": self.name, "ip": self.esp32_ip, "enabled": self.enabled}
+
+
+class ScannerRegistry:
+    """Escáneres conocidos, guardados en un fichero JSON"""
+
+    def __init__(self, path=SCANNERS_PATH):
+        self.path = path
+        self.scanners = {}
+        self.last_error = None
+        self.load()
+
+    def __iter__(self):
+        return iter(self.scanners.values())
+
+    def __len__(self):
+        return len(self.scanners)
+
+    def load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            self.last_error = str(e)
+            return
+        for entry in entries:
+            try:
+                self.scanners[entry["name"]] = Scanner(entry["name"], entry["ip"],
+                                                       entry.get("enabled", True))
+            except (KeyError, TypeError):
+                continue
+
+    def save(self):
+        temporary = self.path + ".tmp"
+        try:
+            with open(temporary, "w", encoding="utf-8") as f:
+                json.dump([scanner.to_json() for scanner in self], f, indent=2)
+            os.replace(temporary, self.path)
+        except OSError as e:
+            self.last_error = str(e)
+
+    def add(self, name, esp32_ip, enabled=True):
+        name, esp32_ip = name.strip(), esp32_ip.strip()
+        if not name or not esp32_ip:
+            raise ValueError("El nombre y la IP son obligatorios")
+        if name in self.scanners:
+            raise ValueError(f"Ya existe un escáner llamado {name}")
+        scanner = self.scanners[name] = Scanner(name, esp32_ip, enabled)
+        self.save()
+        return scanner
+
+    def remove(self, name):
+        scanner = self.scanners.pop(name, None)
+        if scanner is not None:
+            self.save()
+        return scanner
+
+    def enabled(self):
+        return [scanner for scanner in self if scanner.enabled]
+
+
+def device_key(device):
+    """Clave de un dispositivo en la flota: MAC si se conoce, si no la IP"""
+    return device.mac.upper() if device.mac not in UNKNOWN_MACS else device.ip
+
+
+def merge_devices(scanners):
+    """Dispositivos de todos los escáneres, uno por MAC/IP.
+
+    Devuelve ``(dispositivo, orígenes)``: el registro visto más recientemente
+    (o activo) y los nombres de los escáneres que lo ven.
+    """
+    merged = {}
+    for scanner in scanners:
+        for device in scanner.devices:
+            key = device_key(device)
+            entry = merged.get(key)
+            if entry is None:
+                merged[key] = [device, [scanner.name]]
+                continue
+            best, sources = entry
+            if scanner.name not in sources:
+                sources.append(scanner.name)
+            if (device.active, device.last_seen or 0) > (best.active, best.last_seen or 0):
+                entry[0] = device
+    return [(device, sources) for device, sources in merged.values()]
+
+
+def merge_networks(scanners):
+    """Redes de todos los escáneres, una por BSSID, con el RSSI más fuerte"""
+    merged = {}
+    for scanner in scanners:
+        for network in scanner.networks:
+            entry = merged.get(network.key)
+            if entry is None:
+                merged[network.key] = [network, [scanner.name]]
+                continue
+            if scanner.name not in entry[1]:
+                entry[1].append(scanner.name)
+            if network.rssi > entry[0].rssi:
+                entry[0] = network
+    return [(network, sources) for network, sources in merged.values()]
@@ -0,0 +1,338 @@
+"""Ventana de flota: varios ESP32 vigilados desde una sola consola.
+
+Cada escáner del registro (``fleet.ScannerRegistry``) tiene un
+``ScannerWorker`` que pide ``/status``, ``/devices`` y, con menos frecuencia,
+``/scan`` a través de un ``RequestExecutor`` compartido con un número fijo de
+hilos. Las operaciones de un escáner van una tras otra (nunca tiene más de
+una petición en curso) y uno que no responde solo vuelve a consultar su
+estado cada ``OFFLINE_INTERVAL`` segundos, así que una placa lenta o caída
+ocupa como mucho un hilo y no retrasa a las demás.
+
+Las tablas de dispositivos y redes combinan lo que ve cada escáner (por MAC o
+IP, y por BSSID) con una columna de origen; se redibujan como mucho una vez
+cada ``REFRESH_DELAY`` ms aunque lleguen respuestas de decenas de placas.
+
+Se abre desde el botón "Flota" de ``import sys.py`` o directamente con
+``python fleet_window.py``.
+"""
+import sys
+import time
+from functools import partial
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+from PyQt6.QtWidgets import (QApplication, QHBoxLayout, QHeaderView, QLabel, QLineEdit,
+                             QMainWindow, QMessageBox, QPushButton, QTableView, QTabWidget,
+                             QVBoxLayout, QWidget)
+
+from arp_cache import enrich_devices
+from circuit_breaker import add_recovery_listener, remove_recovery_listener
+from esp32_client import close_all
+from esp32_workers import RequestExecutor
+from fleet import ScannerRegistry, merge_devices, merge_networks
+from hostname_resolver import get_resolver
+from oui_vendors import enrich_vendors
+from table_models import (FleetDevicesModel, FleetNetworksModel, ScannersModel, attach_model,
+                          selected_record)
+
+FLEET_WORKERS = 16
+POLL_INTERVAL = 5000       # ms entre sondeos de estado y dispositivos
+SCAN_INTERVAL = 60         # s entre escaneos WiFi de cada escáner
+OFFLINE_INTERVAL = 30      # s entre reintentos a un escáner sin respuesta
+REFRESH_DELAY = 500        # ms mínimos entre redibujados de las tablas
+
+
+class ScannerWorker(QObject):
+    """Sondeo de un escáner; los resultados llegan al hilo de la interfaz"""
+    changed = pyqtSignal(str)
+
+    def __init__(self, scanner, executor, parent=None):
+        super().__init__(parent)
+        self.scanner = scanner
+        self.executor = executor
+        # Petición en curso (como mucho una) y operaciones que esperan turno
+        self._sent = {}
+        self._pending = []
+        self._last_scan = 0.0
+        self._last_attempt = 0.0
+        # Un callback de error por operación, creado una sola vez: el executor
+        # descarta suscripciones repetidas comparándolas
+        self._errors = {operation: partial(self.on_error, operation)
+                        for operation in ("status", "devices", "scan_wifi")}
+        self._handlers = {"status": (self.on_status, self.on_status_unchanged),
+                          "devices": (self.on_devices, self.on_devices_unchanged),
+                          "scan_wifi": (self.on_scan, None)}
+
+    def poll(self):
+        """Pedir lo que toque; no hace nada si el escáner está pausado u ocupado"""
+        scanner = self.scanner
+        if not scanner.enabled:
+            return
+        now = time.monotonic()
+        if scanner.error is not None and now - self._last_attempt < OFFLINE_INTERVAL:
+            return
+        self._last_attempt = now
+        self._queue("status")
+        if scanner.error is None:
+            self._queue("devices")
+            if now - self._last_scan >= SCAN_INTERVAL:
+                self._last_scan = now
+                self._queue("scan_wifi")
+        self._submit_next()
+
+    def retry(self):
+        """Sondear ya aunque el escáner esté en espera tras un error"""
+        self._last_attempt = 0.0
+        self.poll()
+
+    def _queue(self, operation):
+        if operation not in self._sent and operation not in self._pending:
+            self._pending.append(operation)
+
+    def _submit_next(self):
+        """Enviar la siguiente operación si no hay ninguna en curso"""
+        if self._sent or not self._pending:
+            return
+        operation = self._pending.pop(0)
+        on_result, on_unchanged = self._handlers[operation]
+        self._sent[operation] = time.monotonic()
+        self.executor.submit(self.scanner.esp32_ip, operation, on_result=on_result,
+                             on_error=self._errors[operation], on_unchanged=on_unchanged)
+
+    def _finish(self, operation):
+        sent = self._sent.pop(operation, None)
+        if sent is not None and operation == "status":
+            self.scanner.mark_ok(time.monotonic() - sent)
+        self._submit_next()
+
+    def on_status(self, status):
+        self._finish("status")
+        self.scanner.status = status
+        self.changed.emit(self.scanner.name)
+
+    def on_devices(self, device_list):
+        self._finish("devices")
+        devices = enrich_vendors(enrich_devices(device_list.devices))
+        self.scanner.devices = get_resolver().enrich(devices)
+        self.changed.emit(self.scanner.name)
+
+    def on_scan(self, scan):
+        self._finish("scan_wifi")
+        self.scanner.networks = scan.networks
+        self.changed.emit(self.scanner.name)
+
+    # 304: nada cambió desde la última respuesta que recibió esta ventana (el
+    # executor tiene sus propios ETags, ver ``ESP32Client.request``)
+    def on_status_unchanged(self):
+        self._finish("status")
+        self.changed.emit(self.scanner.name)
+
+    def on_devices_unchanged(self):
+        self._finish("devices")
+
+    def on_error(self, operation, error):
+        """Solo un fallo de ``status`` marca el escáner como caído; un ``/scan``
+        o ``/devices`` fallido se vuelve a pedir en el siguiente sondeo"""
+        self._sent.pop(operation, None)
+        if operation == "status":
+            # Sin estado no se piden dispositivos ni redes hasta el reintento
+            self._pending.clear()
+            self.scanner.error = error
+            self.changed.emit(self.scanner.name)
+        self._submit_next()
+
+
+class FleetWindow(QMainWindow):
+    """Escáneres de la flota y la vista combinada de lo que ven"""
+    esp32_recovered = pyqtSignal(str)
+
+    def __init__(self, parent=None, registry=None):
+        super().__init__(parent)
+        self.registry = registry if registry is not None else ScannerRegistry()
+        self.executor = RequestExecutor(max_workers=FLEET_WORKERS, parent=self)
+        self.workers = {}
+        self.closed = False
+
+        self.setWindowTitle("🛰️ Flota de escáneres ESP32")
+        self.resize(1200, 800)
+        self.setup_ui()
+
+        for scanner in self.registry:
+            self.add_worker(scanner)
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.timeout.connect(self.refresh_views)
+
+        # Un escáner caído vuelve a sondearse en cuanto acepta conexiones
+        # (se guarda el callback: cada acceso a ``emit`` da un objeto distinto)
+        self.esp32_recovered.connect(self.on_esp32_recovered)
+        self.recovery_listener = self.esp32_recovered.emit
+        add_recovery_listener(self.recovery_listener)
+
+        self.poll_timer = QTimer(self)
+        self.poll_timer.timeout.connect(self.poll_all)
+        self.poll_timer.start(POLL_INTERVAL)
+        self.poll_all()
+        self.refresh_views()
+
+    def setup_ui(self):
+        central = QWidget()
+        layout = QVBoxLayout(central)
+
+        # Alta y baja de escáneres
+        form = QHBoxLayout()
+        self.name_entry = QLineEdit()
+        self.name_entry.setPlaceholderText("Nombre (p. ej. Planta 2)")
+        self.ip_entry = QLineEdit()
+        self.ip_entry.setPlaceholderText("192.168.4.1")
+        add_btn = QPushButton("➕ Añadir")
+        add_btn.clicked.connect(self.add_scanner)
+        self.ip_entry.returnPressed.connect(self.add_scanner)
+        toggle_btn = QPushButton("⏯️ Pausar/Reanudar")
+        toggle_btn.clicked.connect(self.toggle_scanner)
+        remove_btn = QPushButton("🗑️ Quitar")
+        remove_btn.clicked.connect(self.remove_scanner)
+        form.addWidget(QLabel("Escáner:"))
+        form.addWidget(self.name_entry)
+        form.addWidget(QLabel("IP:"))
+        form.addWidget(self.ip_entry)
+        form.addWidget(add_btn)
+        form.addStretch()
+        form.addWidget(toggle_btn)
+        form.addWidget(remove_btn)
+        layout.addLayout(form)
+
+        self.scanners_table = QTableView()
+        self.scanners_model = ScannersModel(["name", "ip", "state", "rssi", "devices",
+                                             "latency", "error"])
+        attach_model(self.scanners_table, self.scanners_model)
+        self.scanners_table.horizontalHeader().setSectionResizeMode(
+            QHeaderView.ResizeMode.ResizeToContents)
+        self.scanners_table.horizontalHeader().setStretchLastSection(True)
+        self.scanners_table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        layout.addWidget(self.scanners_table, 1)
+
+        tabs = QTabWidget()
+
+        devices_tab = QWidget()
+        devices_layout = QVBoxLayout(devices_tab)
+        self.devices_filter = QLineEdit()
+        self.devices_filter.setPlaceholderText("🔎 Filtrar por IP, MAC, fabricante, escáner...")
+        devices_layout.addWidget(self.devices_filter)
+        self.devices_table = QTableView()
+        self.devices_model = FleetDevicesModel(["ip", "type", "mac", "vendor", "hostname",
+                                                "status", "last_seen", "sources"])
+        devices_proxy = attach_model(self.devices_table, self.devices_model)
+        self.devices_filter.textChanged.connect(devices_proxy.setFilterFixedString)
+        self.devices_table.horizontalHeader().setSectionResizeMode(
+            QHeaderView.ResizeMode.ResizeToContents)
+        self.devices_table.horizontalHeader().setStretchLastSection(True)
+        self.devices_table.setAlternatingRowColors(True)
+        self.devices_table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        devices_layout.addWidget(self.devices_table)
+        tabs.addTab(devices_tab, "📱 Dispositivos")
+
+        self.networks_table = QTableView()
+        self.networks_model = FleetNetworksModel(["ssid", "signal", "encryption", "channel",
+                                                  "sources"])
+        attach_model(self.networks_table, self.networks_model)
+        self.networks_table.horizontalHeader().setSectionResizeMode(
+            QHeaderView.ResizeMode.ResizeToContents)
+        self.networks_table.horizontalHeader().setStretchLastSection(True)
+        self.networks_table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        tabs.addTab(self.networks_table, "📶 Redes")
+
+        layout.addWidget(tabs, 2)
+        self.setCentralWidget(central)
+
+    def add_worker(self, scanner):
+        worker = self.workers[scanner.name] = ScannerWorker(scanner, self.executor, self)
+        worker.changed.connect(self.schedule_refresh)
+        return worker
+
+    def poll_all(self):
+        for worker in self.workers.values():
+            worker.poll()
+
+    def on_esp32_recovered(self, esp32_ip):
+        for worker in self.workers.values():
+            if worker.scanner.esp32_ip == esp32_ip:
+                worker.retry()
+
+    def schedule_refresh(self, name=None):
+        """Agrupar las respuestas que lleguen en ``REFRESH_DELAY`` ms en un redibujado"""
+        if not self.refresh_timer.isActive():
+            self.refresh_timer.start(REFRESH_DELAY)
+
+    def refresh_views(self):
+        scanners = list(self.registry)
+        enabled = self.registry.enabled()
+        self.scanners_model.update_rows([ScannersModel.row_values(s) for s in scanners])
+        self.devices_model.update_rows(
+            [FleetDevicesModel.row_values(entry) for entry in merge_devices(enabled)])
+        self.networks_model.update_rows(
+            [FleetNetworksModel.row_values(entry) for entry in merge_networks(enabled)])
+        online = sum(1 for scanner in enabled if scanner.online)
+        self.statusBar().showMessage(
+            f"{online}/{len(scanners)} escáneres en línea · "
+            f"{self.devices_model.active_count()}/{len(self.devices_model.store)} dispositivos activos · "
+            f"{self.executor.pending()} peticiones en cola")
+
+    def selected_scanner(self):
+        record = selected_record(self.scanners_table)
+        return None if record is None else self.registry.scanners.get(record["name"])
+
+    def add_scanner(self):
+        try:
+            scanner = self.registry.add(self.name_entry.text(), self.ip_entry.text())
+        except ValueError as e:
+            QMessageBox.warning(self, "Escáner no válido", str(e))
+            return
+        self.name_entry.clear()
+        self.ip_entry.clear()
+        self.add_worker(scanner).poll()
+        self.refresh_views()
+
+    def toggle_scanner(self):
+        scanner = self.selected_scanner()
+        if scanner is None:
+            return
+        scanner.enabled = not scanner.enabled
+        self.registry.save()
+        if scanner.enabled:
+            self.workers[scanner.name].poll()
+        self.refresh_views()
+
+    def remove_scanner(self):
+        scanner = self.selected_scanner()
+        if scanner is None:
+            return
+        self.registry.remove(scanner.name)
+        worker = self.workers.pop(scanner.name, None)
+        if worker is not None:
+            worker.changed.disconnect(self.schedule_refresh)
+        self.refresh_views()
+
+    def closeEvent(self, event):
+        self.poll_timer.stop()
+        self.refresh_timer.stop()
+        remove_recovery_listener(self.recovery_listener)
+        self.executor.shutdown()
+        self.closed = True
+        self.deleteLater()
+        event.accept()
+
+
+def main():
+    app = QApplication(sys.argv)
+    app.setApplicationName("ESP32 Fleet Monitor")
+    window = FleetWindow()
+    window.show()
+    code = app.exec()
+    get_resolver().shutdown()
+    close_all()
+    sys.exit(code)
+
+
+if __name__ == "__main__":
+    main()
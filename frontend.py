@@ -1,15 +1,24 @@
 import sys
-import requests
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel,
-    QPushButton, QLineEdit, QTableWidget, QTableWidgetItem, QHeaderView,
+    QPushButton, QLineEdit, QTableView, QHeaderView,
     QGroupBox, QProgressBar, QMessageBox, QFrame, QSplitter, QTabWidget
 )
-from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
 from PyQt6.QtGui import QFont, QColor
 
+from arp_cache import enrich_devices
+from circuit_breaker import add_recovery_listener, remove_recovery_listener
+from esp32_client import OPERATIONS, close_all, get_client
+from esp32_workers import EventChannel, RequestExecutor
+from history_store import get_history_store
+from hostname_resolver import get_resolver
+from poll_scheduler import PollScheduler, RequestBudget
+from subnet import DEFAULT_MASK, get_subnet
+from table_models import DevicesModel, WiFiNetworksModel, attach_model, ip_key
+
 ESP32_IP = "192.168.4.1"
-SCAN_INTERVAL = 10  # segundos
+SCAN_INTERVAL = 10  # segundos (intervalo base; el planificador lo adapta)
 
 class Card(QFrame):
     def __init__(self, title, widget=None):
@@ -33,13 +42,20 @@ class Card(QFrame):
         self.setLayout(layout)
 
 class WiFiManagerUI(QMainWindow):
+    hostname_resolved = pyqtSignal(str, str)
+    esp32_recovered = pyqtSignal(str)
+
     def __init__(self):
         super().__init__()
         self.esp32_ip = ESP32_IP
         self.connected = False
         self.local_ip = ""
-        self.subnet_mask = "255.255.255.240"
+        self.subnet_mask = DEFAULT_MASK
+        self.mask_from_device = False
+        self.subnet = None
         self.network_range = ""
+        self.pending_ssid = ""
+        self.reachable = True
         self.setWindowTitle("ESP32-S3 WiFi Manager")
         self.setGeometry(100, 100, 1100, 700)
         self.setStyleSheet("""
@@ -67,7 +83,7 @@ class WiFiManagerUI(QMainWindow):
                 padding: 10px;
                 color: #e0e0e0;
             }
-            QTableWidget {
+            QTableView {
                 background-color: #23272e;
                 border-radius: 8px;
                 color: #e0e0e0;
@@ -88,8 +104,10 @@ class WiFiManagerUI(QMainWindow):
             }
         """)
         self.setup_ui()
+        self.setup_executor()
         self.setup_timer()
-        self.refresh_status()
+        self.setup_events()
+        self.poll_scheduled()
 
     def setup_ui(self):
         central = QWidget()
@@ -101,10 +119,11 @@ class WiFiManagerUI(QMainWindow):
         left_layout = QVBoxLayout()
 
         # WiFi scan card
-        self.wifi_table = QTableWidget(0, 3)
-        self.wifi_table.setHorizontalHeaderLabels(["SSID", "Señal (dBm)", "Seguridad"])
+        self.wifi_table = QTableView()
+        self.wifi_model = WiFiNetworksModel(["ssid", "rssi", "encryption"])
+        attach_model(self.wifi_table, self.wifi_model, 1, Qt.SortOrder.DescendingOrder)
         self.wifi_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
-        self.wifi_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.wifi_table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
         self.wifi_table.setAlternatingRowColors(True)
         self.wifi_table.setMaximumHeight(220)
         scan_btn = QPushButton("🔍 Escanear redes Wi-Fi")
@@ -162,8 +181,9 @@ class WiFiManagerUI(QMainWindow):
         # Tab 2: Devices
         devices_tab = QWidget()
         devices_layout = QVBoxLayout()
-        self.devices_table = QTableWidget(0, 3)
-        self.devices_table.setHorizontalHeaderLabels(["IP", "MAC", "Hostname"])
+        self.devices_table = QTableView()
+        self.devices_model = DevicesModel(["ip", "mac", "hostname"])
+        attach_model(self.devices_table, self.devices_model)
         self.devices_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
         self.devices_table.setAlternatingRowColors(True)
         devices_layout.addWidget(Card("Dispositivos Activos en la Subred", self.devices_table))
@@ -191,37 +211,163 @@ class WiFiManagerUI(QMainWindow):
         self.setCentralWidget(central)
 
         # Table row select
-        self.wifi_table.cellClicked.connect(self.on_wifi_row_selected)
+        self.wifi_table.clicked.connect(self.on_wifi_row_selected)
 
     def setup_timer(self):
+        # Un solo timer de disparo único; el planificador decide cuándo vence
+        # cada operación (más lento si no hay cambios, backoff si hay errores)
+        self.scheduler = PollScheduler(RequestBudget())
+        self.scheduler.add("status", SCAN_INTERVAL)
+        self.scheduler.add("devices", SCAN_INTERVAL)
+        self.polling = True
         self.timer = QTimer()
-        self.timer.timeout.connect(self.refresh_status)
-        self.timer.start(SCAN_INTERVAL * 1000)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.poll_scheduled)
+
+    def poll_scheduled(self):
+        for operation, forced in self.scheduler.due(accept=self.accept_poll):
+            if operation == "status":
+                self.refresh_status()
+            elif operation == "devices":
+                self.refresh_devices()
+        self.schedule_next_poll()
+
+    def accept_poll(self, operation, forced):
+        # Sin WiFi no hay lista de dispositivos que pedir
+        return operation != "devices" or self.connected
+
+    def schedule_next_poll(self):
+        if self.polling:
+            self.timer.start(int(self.scheduler.next_delay() * 1000))
+
+    def setup_events(self):
+        # Mientras el canal de eventos esté activo el timer no sondea
+        self.events = EventChannel(self.esp32_ip, self)
+        self.events.event_received.connect(self.on_event)
+        self.events.connection_changed.connect(self.on_events_connection)
+        self.events.start()
+
+    def on_events_connection(self, connected):
+        self.polling = not connected
+        if connected:
+            self.timer.stop()
+            self.refresh_status()
+        else:
+            self.scheduler.poll_now()
+            self.schedule_next_poll()
+
+    def on_event(self, name, data):
+        if name == "status":
+            self.on_status_result(data)
+        elif name == "devices" and self.connected:
+            self.refresh_devices()
+
+    def setup_executor(self):
+        # Las peticiones se hacen en segundo plano; aquí se guarda la última
+        # petición lanzada por operación para descartar respuestas obsoletas
+        self.executor = RequestExecutor()
+        self.pending_requests = {}
+        self.hostname_resolved.connect(self.on_hostname_resolved)
+        get_resolver().add_listener(self.hostname_resolved.emit)
+        self.esp32_recovered.connect(self.on_esp32_recovered)
+        self.recovery_listener = self.esp32_recovered.emit
+        add_recovery_listener(self.recovery_listener)
+
+    def start_request(self, operation, data=None):
+        request = self.pending_requests.get(operation)
+        if request is not None and data is None and OPERATIONS[operation][0] == "GET":
+            # Lectura ya hecha o en curso y aún sin entregar: una nueva sería un
+            # 304 contra el ETag de esa, cuya respuesta se descartaría
+            return request
+        request = self.executor.submit(self.esp32_ip, operation, data,
+                                       on_result=self.on_reply,
+                                       on_error=self.on_reply_error,
+                                       on_unchanged=self.on_reply_unchanged)
+        self.pending_requests[operation] = request
+        self.update_progress()
+        return request
+
+    def take_reply(self):
+        # Devuelve la operación de la respuesta recibida, o None si ya no es
+        # la petición vigente para esa operación
+        request = self.sender()
+        operation = getattr(request, "operation", None)
+        if operation is None or self.pending_requests.get(operation) is not request:
+            return None
+        del self.pending_requests[operation]
+        self.update_progress()
+        return operation
+
+    def cancel_request(self, operation):
+        self.pending_requests.pop(operation, None)
+        self.update_progress()
+
+    def update_progress(self):
+        if self.pending_requests:
+            self.progress_bar.setRange(0, 0)
+            self.progress_bar.show()
+        else:
+            self.progress_bar.hide()
+
+    def on_reply(self, data):
+        handlers = {
+            "scan_wifi": self.on_scan_result,
+            "connect": self.on_connect_result,
+            "status": self.on_status_result,
+            "devices": self.on_devices_result,
+            "config": self.on_config_result,
+        }
+        operation = self.take_reply()
+        if operation is None:
+            # Respuesta descartada (p. ej. tras clear_devices): su ETag ya no
+            # corresponde a lo que se muestra
+            stale = getattr(self.sender(), "operation", None)
+            if stale in OPERATIONS:
+                get_client(self.esp32_ip).forget(OPERATIONS[stale][1], self.executor.scope)
+        if operation in self.scheduler.endpoints:
+            self.scheduler.success(operation, data)
+        handler = handlers.get(operation)
+        if handler:
+            handler(data)
+        self.schedule_next_poll()
+
+    def on_reply_unchanged(self):
+        # 304: los datos mostrados siguen vigentes
+        operation = self.take_reply()
+        if operation in self.scheduler.endpoints:
+            self.scheduler.success(operation)
+            self.schedule_next_poll()
+
+    def on_reply_error(self, error):
+        handlers = {
+            "scan_wifi": self.on_scan_error,
+            "connect": self.on_connect_error,
+            "status": self.on_status_error,
+            "devices": self.on_devices_error,
+        }
+        operation = self.take_reply()
+        if operation in self.scheduler.endpoints:
+            self.scheduler.failure(operation)
+        handler = handlers.get(operation)
+        if handler:
+            handler(error)
+        self.schedule_next_poll()
 
     def scan_wifi(self):
-        self.progress_bar.show()
-        self.progress_bar.setRange(0, 0)
-        try:
-            resp = requests.get(f"http://{self.esp32_ip}/scan", timeout=8)
-            data = resp.json()
-            networks = data.get("networks", [])
-            self.wifi_table.setRowCount(len(networks))
-            for i, net in enumerate(networks):
-                ssid = net.get("ssid", "")
-                rssi = net.get("rssi", "")
-                encryption = net.get("encryption", "")
-                self.wifi_table.setItem(i, 0, QTableWidgetItem(ssid))
-                self.wifi_table.setItem(i, 1, QTableWidgetItem(str(rssi)))
-                self.wifi_table.setItem(i, 2, QTableWidgetItem(encryption))
-            self.status_label.setText(f"Escaneo completado: {len(networks)} redes encontradas")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"No se pudo escanear redes Wi-Fi:\n{e}")
-        self.progress_bar.hide()
+        self.start_request("scan_wifi")
 
-    def on_wifi_row_selected(self, row, col):
-        ssid_item = self.wifi_table.item(row, 0)
-        if ssid_item:
-            self.ssid_entry.setText(ssid_item.text())
+    def on_scan_result(self, data):
+        networks = data.networks
+        self.wifi_model.update_rows([WiFiNetworksModel.row_values(n) for n in networks])
+        self.status_label.setText(f"Escaneo completado: {len(networks)} redes encontradas")
+
+    def on_scan_error(self, error):
+        QMessageBox.critical(self, "Error", f"No se pudo escanear redes Wi-Fi:\n{error}")
+
+    def on_wifi_row_selected(self, index):
+        ssid = index.siblingAtColumn(0).data()
+        if ssid:
+            self.ssid_entry.setText(ssid)
 
     def connect_wifi(self):
         ssid = self.ssid_entry.text().strip()
@@ -229,78 +375,126 @@ class WiFiManagerUI(QMainWindow):
         if not ssid:
             QMessageBox.warning(self, "Advertencia", "Seleccione o ingrese un SSID")
             return
-        self.progress_bar.show()
-        self.progress_bar.setRange(0, 0)
-        try:
-            resp = requests.post(f"http://{self.esp32_ip}/connect", data={"ssid": ssid, "password": password}, timeout=15)
-            data = resp.json()
-            if data.get("success"):
-                self.connected = True
-                self.status_label.setText(f"Conectado a {data.get('ssid', ssid)} ({data.get('ip', '')})")
-                self.local_ip = data.get("ip", "")
-                self.refresh_status()
-            else:
-                self.status_label.setText("Error al conectar")
-                QMessageBox.critical(self, "Error", "No se pudo conectar a la red Wi-Fi")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Error de conexión:\n{e}")
-        self.progress_bar.hide()
+        self.pending_ssid = ssid
+        self.start_request("connect", {"ssid": ssid, "password": password})
+
+    def on_connect_result(self, data):
+        if data.get("success"):
+            self.connected = True
+            self.status_label.setText(f"Conectado a {data.get('ssid', self.pending_ssid)} ({data.get('ip', '')})")
+            self.local_ip = data.get("ip", "")
+            self.scheduler.boost()
+            self.refresh_status()
+        else:
+            self.status_label.setText("Error al conectar")
+            QMessageBox.critical(self, "Error", "No se pudo conectar a la red Wi-Fi")
+
+    def on_connect_error(self, error):
+        QMessageBox.critical(self, "Error", f"Error de conexión:\n{error}")
 
     def refresh_status(self):
-        try:
-            resp = requests.get(f"http://{self.esp32_ip}/status", timeout=5)
-            data = resp.json()
-            if data.get("connected"):
-                self.connected = True
-                self.local_ip = data.get("ip", "")
-                self.status_label.setText(f"Conectado a {data.get('ssid', '')} ({self.local_ip})")
-                self.ip_info_label.setText(f"IP Local: {self.local_ip}")
-                self.subnet_label.setText(f"Subred: {self.subnet_mask}")
-                self.calculate_network_range()
-                self.range_label.setText(f"Rango IP: {self.network_range}")
+        self.start_request("status")
+
+    def on_status_result(self, data):
+        # Tras un error hay que repintar aunque el estado no haya cambiado
+        recovering = not self.reachable
+        self.reachable = True
+        if data.connected:
+            if not self.connected:
+                self.scheduler.poll_now("devices")
+                self.scheduler.boost("devices")
+            self.connected = True
+            self.local_ip = data.ip
+            self.status_label.setText(f"Conectado a {data.ssid} ({self.local_ip})")
+            self.ip_info_label.setText(f"IP Local: {self.local_ip}")
+            self.subnet_label.setText(f"Subred: {self.subnet_mask}")
+            self.calculate_network_range()
+            self.range_label.setText(f"Rango IP: {self.network_range}")
+            if not self.mask_from_device:
+                # La máscara real viene de /config del ESP32
+                self.start_request("config")
+            if not self.polling:
+                # Con el canal de eventos no hay sondeo: pedir la lista ya
                 self.refresh_devices()
-            else:
-                self.connected = False
-                self.status_label.setText("Desconectado")
-                self.ip_info_label.setText("IP Local: --")
-                self.range_label.setText("Rango IP: --")
-                self.devices_table.setRowCount(0)
-        except Exception:
-            self.status_label.setText("ESP32 no accesible")
+        elif self.connected or recovering:
+            # Solo en el cambio: cada sondeo desconectado puede ser un 304
+            self.connected = False
+            self.status_label.setText("Desconectado")
             self.ip_info_label.setText("IP Local: --")
             self.range_label.setText("Rango IP: --")
-            self.devices_table.setRowCount(0)
+            self.clear_devices()
+
+    def on_status_error(self, error):
+        if not self.reachable:
+            # Ya se muestra el error y la tabla está vacía
+            return
+        self.reachable = False
+        self.status_label.setText("ESP32 no accesible")
+        self.ip_info_label.setText("IP Local: --")
+        self.range_label.setText("Rango IP: --")
+        self.clear_devices()
+        # El estado mostrado ya no es el del último ETag
+        get_client(self.esp32_ip).forget("/status", self.executor.scope)
+
+    def clear_devices(self):
+        # La tabla vacía ya no corresponde al último ETag: forzar lectura completa
+        self.cancel_request("devices")
+        self.devices_model.clear()
+        get_client(self.esp32_ip).forget("/devices", self.executor.scope)
 
     def calculate_network_range(self):
-        # Calcula el rango de IPs de la subred /28
+        # La subred se calcula con la máscara real y queda cacheada por (ip, máscara)
         try:
-            ip_parts = list(map(int, self.local_ip.split(".")))
-            mask_parts = list(map(int, self.subnet_mask.split(".")))
-            ip_int = sum([ip_parts[i] << (8 * (3 - i)) for i in range(4)])
-            mask_int = sum([mask_parts[i] << (8 * (3 - i)) for i in range(4)])
-            network = ip_int & mask_int
-            broadcast = network | (~mask_int & 0xFFFFFFFF)
-            net_ip = ".".join(str((network >> (8 * i)) & 0xFF) for i in reversed(range(4)))
-            broad_ip = ".".join(str((broadcast >> (8 * i)) & 0xFF) for i in reversed(range(4)))
-            self.network_range = f"{net_ip} - {broad_ip}"
-        except Exception:
+            self.subnet = get_subnet(self.local_ip, self.subnet_mask)
+            self.network_range = self.subnet.range_text()
+        except (OSError, ValueError):
+            self.subnet = None
             self.network_range = "--"
 
+    def set_subnet_mask(self, mask):
+        if mask and mask != self.subnet_mask:
+            self.subnet_mask = mask
+            self.subnet_label.setText(f"Subred: {self.subnet_mask}")
+            self.calculate_network_range()
+            self.range_label.setText(f"Rango IP: {self.network_range}")
+
+    def on_config_result(self, data):
+        self.mask_from_device = True
+        self.set_subnet_mask(data.subnet_mask)
+
     def refresh_devices(self):
-        try:
-            resp = requests.get(f"http://{self.esp32_ip}/devices", timeout=8)
-            data = resp.json()
-            devices = data.get("devices", [])
-            self.devices_table.setRowCount(len(devices))
-            for i, dev in enumerate(devices):
-                ip = dev.get("ip", "")
-                mac = dev.get("mac", "")
-                hostname = dev.get("hostname", "")
-                self.devices_table.setItem(i, 0, QTableWidgetItem(ip))
-                self.devices_table.setItem(i, 1, QTableWidgetItem(mac))
-                self.devices_table.setItem(i, 2, QTableWidgetItem(hostname))
-        except Exception:
-            self.devices_table.setRowCount(0)
+        self.start_request("devices")
+
+    def on_devices_result(self, data):
+        devices = get_resolver().enrich(enrich_devices(data.devices))
+        get_history_store().record_poll(devices)
+        if data.network_info is not None:
+            self.set_subnet_mask(data.network_info.subnet)
+        self.devices_model.update_rows([DevicesModel.row_values(d) for d in devices])
+
+    def on_devices_error(self, error):
+        self.clear_devices()
+
+    def on_hostname_resolved(self, ip, hostname):
+        self.devices_model.set_values(ip_key(ip), {"hostname": hostname})
+
+    def on_esp32_recovered(self, esp32_ip):
+        # El ESP32 vuelve a aceptar conexiones: no esperar al backoff
+        if esp32_ip == self.esp32_ip:
+            self.scheduler.boost()
+            self.scheduler.poll_now("status")
+            self.schedule_next_poll()
+
+    def closeEvent(self, event):
+        self.timer.stop()
+        self.events.stop()
+        remove_recovery_listener(self.recovery_listener)
+        self.pending_requests.clear()
+        self.executor.shutdown()
+        get_resolver().shutdown()
+        get_history_store().close()
+        close_all()
+        event.accept()
 
 def main():
     app = QApplication(sys.argv)
@@ -0,0 +1,193 @@
+"""Historial de presencia de dispositivos en SQLite.
+
+Cada sondeo de ``/devices`` (como ``esp32_records.Device``) se entrega a
+``HistoryStore.record_poll``, que solo
+encola una tupla por dispositivo: la escritura la hace un único hilo que agrupa
+todo lo acumulado en ``batch_interval`` y lo inserta en una sola transacción
+con ``executemany`` (sentencia preparada y reutilizada por ``sqlite3``). La
+base de datos usa WAL, de modo que las consultas leen sin bloquear al escritor.
+
+Para que semanas de sondeos por debajo del segundo no llenen el disco, una
+muestra solo se guarda si el dispositivo cambió de estado, de MAC o de
+hostname, o si pasaron ``sample_interval`` segundos desde la anterior; así
+"última vez en línea" tiene como mucho ese margen de error. Las muestras más
+antiguas que ``retention_days`` se borran periódicamente.
+"""
+import queue
+import sqlite3
+import threading
+import time
+
+from subnet import int_to_ip, ip_to_int
+
+HISTORY_PATH = "wifi_manager_history.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS samples (
+    ts INTEGER NOT NULL,
+    ip INTEGER NOT NULL,
+    mac TEXT NOT NULL,
+    hostname TEXT NOT NULL,
+    type TEXT NOT NULL,
+    active INTEGER NOT NULL,
+    response_time INTEGER,
+    last_seen INTEGER,
+    first_seen INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_samples_ip_ts ON samples (ip, ts);
+CREATE INDEX IF NOT EXISTS idx_samples_mac_ts ON samples (mac, ts);
+"""
+
+INSERT_SAMPLE = "INSERT INTO samples VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+
+_STOP = object()
+
+
+def _connect(path):
+    connection = sqlite3.connect(path, timeout=5, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection
+
+
+class HistoryStore:
+    """Almacén de muestras con un hilo escritor en segundo plano"""
+
+    def __init__(self, path=HISTORY_PATH, batch_interval=1.0, sample_interval=30,
+                 retention_days=30):
+        self.path = path
+        self.batch_interval = batch_interval
+        self.sample_interval = sample_interval * 1000
+        self.retention = retention_days * 86400 * 1000
+        self.rows_written = 0
+        self.last_error = None
+        self.closed = False
+        self._queue = queue.Queue()
+        self._last = {}
+        self._reader = threading.local()
+        self._writer = threading.Thread(target=self._run, name="history-writer", daemon=True)
+        self._writer.start()
+
+    def record_poll(self, devices, ts=None):
+        """Encolar un sondeo; no toca el disco (apto para el hilo de la GUI)"""
+        ts = int(time.time() * 1000) if ts is None else ts
+        rows = []
+        for device in devices:
+            rows.append((ts, device.ip_int, device.mac.upper(), device.hostname, device.type,
+                         1 if device.active else 0, device.response_time, device.last_seen,
+                         device.first_seen))
+        if rows:
+            self._queue.put(rows)
+
+    def _changed(self, row):
+        # (ts, ip, mac, hostname, type, active, ...): guardar solo lo relevante
+        previous = self._last.get(row[1])
+        if (previous is None or previous[2:6] != row[2:6]
+                or row[0] - previous[0] >= self.sample_interval):
+            self._last[row[1]] = row
+            return True
+        return False
+
+    def _run(self):
+        try:
+            connection = _connect(self.path)
+            connection.executescript(SCHEMA)
+        except sqlite3.Error as e:
+            self.last_error = str(e)
+            return
+
+        last_prune = 0
+        stopping = False
+        while not stopping:
+            # Reunir todo lo que llegue durante batch_interval tras el primer sondeo
+            batches = []
+            waiters = []
+            deadline = None
+            while True:
+                try:
+                    if deadline is None:
+                        item = self._queue.get()
+                        deadline = time.monotonic() + self.batch_interval
+                    else:
+                        item = self._queue.get(timeout=max(deadline - time.monotonic(), 0.001))
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                if isinstance(item, threading.Event):
+                    waiters.append(item)
+                    break
+                batches.append(item)
+
+            rows = [row for batch in batches for row in batch if self._changed(row)]
+            try:
+                with connection:
+                    connection.executemany(INSERT_SAMPLE, rows)
+                    now = int(time.time() * 1000)
+                    if now - last_prune > 3600 * 1000:
+                        connection.execute("DELETE FROM samples WHERE ts < ?",
+                                           (now - self.retention,))
+                        last_prune = now
+                self.rows_written += len(rows)
+            except sqlite3.Error as e:
+                self.last_error = str(e)
+            for waiter in waiters:
+                waiter.set()
+        connection.close()
+
+    def flush(self, timeout=5):
+        """Esperar a que se escriba todo lo encolado hasta ahora (no usar en la GUI)"""
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout=5):
+        self.closed = True
+        self._queue.put(_STOP)
+        self._writer.join(timeout)
+
+    def _connection(self):
+        connection = getattr(self._reader, "connection", None)
+        if connection is None:
+            connection = self._reader.connection = _connect(self.path)
+        return connection
+
+    def last_online(self, mac=None, ip=None):
+        """Última marca de tiempo (ms) en que ``mac`` o ``ip`` estuvo activo"""
+        # Recorre el índice (mac, ts) o (ip, ts) hacia atrás hasta la primera muestra activa
+        if mac is not None:
+            column, value = "mac", mac.upper()
+        else:
+            column, value = "ip", ip_to_int(ip)
+        row = self._connection().execute(
+            f"SELECT ts FROM samples WHERE {column} = ? AND active = 1 "
+            "ORDER BY ts DESC LIMIT 1", (value,)).fetchone()
+        return row[0] if row else None
+
+    def history(self, ip, since=0, until=None):
+        """Muestras de ``ip`` entre ``since`` y ``until`` (ms), como diccionarios"""
+        until = int(time.time() * 1000) if until is None else until
+        cursor = self._connection().execute(
+            "SELECT ts, mac, hostname, type, active, response_time FROM samples "
+            "WHERE ip = ? AND ts BETWEEN ? AND ? ORDER BY ts", (ip_to_int(ip), since, until))
+        return [{"ts": ts, "ip": ip, "mac": mac, "hostname": hostname, "type": device_type,
+                 "active": bool(active), "responseTime": response_time}
+                for ts, mac, hostname, device_type, active, response_time in cursor]
+
+    def known_devices(self):
+        """IP, MAC y última muestra de cada dispositivo visto alguna vez"""
+        cursor = self._connection().execute(
+            "SELECT ip, mac, MAX(ts) FROM samples GROUP BY ip, mac ORDER BY ip")
+        return [(int_to_ip(ip), mac, ts) for ip, mac, ts in cursor]
+
+
+_store = None
+
+
+def get_history_store():
+    """Almacén de historial compartido por toda la aplicación"""
+    global _store
+    if _store is None or _store.closed:
+        _store = HistoryStore()
+    return _store
@@ -0,0 +1,216 @@
+"""Resolución de nombres de host en segundo plano.
+
+El firmware marca todos los dispositivos con hostname "Unknown".
+``HostnameResolver`` busca el nombre de cada IP en un pool acotado de hilos,
+probando en orden:
+
+1. DNS inverso (``socket.gethostbyaddr``);
+2. consulta de estado NetBIOS (UDP 137), útil con equipos Windows;
+3. consulta PTR unicast al puerto mDNS (UDP 5353) del propio equipo.
+
+Los resultados se guardan en una caché LRU con TTL distinto para aciertos y
+fallos, y las búsquedas simultáneas de la misma IP comparten un único
+``Future``. ``enrich`` nunca bloquea: rellena lo que ya está en caché, encola
+lo que falta y los oyentes reciben cada nombre nuevo en cuanto llega.
+"""
+import random
+import socket
+import struct
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+UNKNOWN_HOSTNAMES = {"", "Unknown", "N/A"}
+
+
+def _encode_dns_name(name):
+    parts = [bytes([len(label)]) + label.encode("ascii") for label in name.split(".") if label]
+    return b"".join(parts) + b"\x00"
+
+
+def _read_dns_name(packet, offset):
+    """Leer un nombre DNS (con punteros de compresión); devuelve (nombre, siguiente)"""
+    labels = []
+    next_offset = None
+    for _ in range(64):
+        length = packet[offset]
+        if length & 0xC0 == 0xC0:
+            if next_offset is None:
+                next_offset = offset + 2
+            offset = ((length & 0x3F) << 8) | packet[offset + 1]
+            continue
+        offset += 1
+        if length == 0:
+            break
+        labels.append(packet[offset:offset + length].decode("utf-8", "replace"))
+        offset += length
+    return ".".join(labels), (next_offset if next_offset is not None else offset)
+
+
+def _udp_query(ip, port, packet, timeout):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        sock.settimeout(timeout)
+        sock.sendto(packet, (ip, port))
+        return sock.recvfrom(1024)[0]
+    finally:
+        sock.close()
+
+
+def reverse_dns(ip):
+    try:
+        name = socket.gethostbyaddr(ip)[0]
+    except (OSError, UnicodeError):
+        return None
+    return name if name and name != ip else None
+
+
+def netbios_name(ip, timeout=0.5):
+    """Nombre NetBIOS del equipo mediante una consulta NBSTAT"""
+    transaction = random.randint(0, 0xFFFF)
+    # Nombre "*" con la codificación de primer nivel de NetBIOS
+    raw_name = b"*" + b"\x00" * 15
+    encoded = bytes(c for b in raw_name for c in (0x41 + (b >> 4), 0x41 + (b & 0x0F)))
+    packet = (struct.pack(">HHHHHH", transaction, 0, 1, 0, 0, 0)
+              + b"\x20" + encoded + b"\x00" + struct.pack(">HH", 0x21, 1))
+    try:
+        response = _udp_query(ip, 137, packet, timeout)
+    except OSError:
+        return None
+
+    # Cabecera (12) + nombre (34) + tipo, clase, TTL y longitud (10)
+    offset = 56
+    if len(response) <= offset or struct.unpack(">H", response[:2])[0] != transaction:
+        return None
+    count = response[offset]
+    offset += 1
+    for _ in range(count):
+        entry = response[offset:offset + 18]
+        if len(entry) < 18:
+            break
+        name, suffix, flags = entry[:15], entry[15], struct.unpack(">H", entry[16:18])[0]
+        # Nombre de estación (sufijo 0x00) que no sea de grupo
+        if suffix == 0x00 and not flags & 0x8000:
+            return name.decode("ascii", "replace").strip() or None
+        offset += 18
+    return None
+
+
+def mdns_name(ip, timeout=0.5):
+    """Nombre ``.local`` mediante una consulta PTR unicast al puerto mDNS"""
+    transaction = random.randint(0, 0xFFFF)
+    reverse = ".".join(reversed(ip.split("."))) + ".in-addr.arpa"
+    packet = (struct.pack(">HHHHHH", transaction, 0, 1, 0, 0, 0)
+              + _encode_dns_name(reverse) + struct.pack(">HH", 12, 1))
+    try:
+        response = _udp_query(ip, 5353, packet, timeout)
+        _, _, questions, answers, _, _ = struct.unpack(">HHHHHH", response[:12])
+        offset = 12
+        for _ in range(questions):
+            offset = _read_dns_name(response, offset)[1] + 4
+        for _ in range(answers):
+            offset = _read_dns_name(response, offset)[1]
+            record_type, _, _, length = struct.unpack(">HHIH", response[offset:offset + 10])
+            offset += 10
+            if record_type == 12:
+                return _read_dns_name(response, offset)[0].rstrip(".") or None
+            offset += length
+    except (OSError, IndexError, struct.error):
+        return None
+    return None
+
+
+class HostnameResolver:
+    """Caché LRU/TTL de nombres de host con resolución concurrente"""
+
+    def __init__(self, max_workers=4, max_entries=1024, positive_ttl=900,
+                 negative_ttl=120, methods=(reverse_dns, netbios_name, mdns_name)):
+        self.max_entries = max_entries
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self.methods = methods
+        self._pool = ThreadPoolExecutor(max_workers, thread_name_prefix="hostname")
+        self._cache = OrderedDict()
+        self._pending = {}
+        self._listeners = []
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.closed = False
+
+    def add_listener(self, callback):
+        """``callback(ip, hostname)`` se llama desde un hilo del pool"""
+        self._listeners.append(callback)
+
+    def cached(self, ip):
+        """Devolver ``(encontrado, nombre)`` sin lanzar búsquedas"""
+        with self._lock:
+            entry = self._cache.get(ip)
+            if entry is None or entry[1] < time.monotonic():
+                return False, None
+            self._cache.move_to_end(ip)
+            return True, entry[0]
+
+    def resolve(self, ip):
+        """Devolver un ``Future`` con el nombre; reutiliza búsquedas en curso"""
+        with self._lock:
+            future = self._pending.get(ip)
+            if future is None:
+                future = self._pool.submit(self._resolve, ip)
+                self._pending[ip] = future
+            return future
+
+    def _resolve(self, ip):
+        self.lookups += 1
+        name = None
+        try:
+            for method in self.methods:
+                name = method(ip)
+                if name:
+                    break
+        except Exception:
+            name = None
+
+        ttl = self.positive_ttl if name else self.negative_ttl
+        with self._lock:
+            self._cache[ip] = (name, time.monotonic() + ttl)
+            self._cache.move_to_end(ip)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+            self._pending.pop(ip, None)
+
+        if name:
+            for callback in self._listeners:
+                callback(ip, name)
+        return name
+
+    def lookup(self, ip):
+        """Nombre en caché o None; si no está, lo resuelve en segundo plano"""
+        found, name = self.cached(ip)
+        if not found:
+            self.resolve(ip)
+        return name
+
+    def enrich(self, devices):
+        """Completar los hostnames desconocidos (in situ, sin bloquear)"""
+        for device in devices:
+            if device.hostname in UNKNOWN_HOSTNAMES:
+                name = self.lookup(device.ip)
+                if name:
+                    device.hostname = name
+        return devices
+
+    def shutdown(self):
+        self.closed = True
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+_resolver = None
+
+
+def get_resolver():
+    """Resolvedor compartido por toda la aplicación"""
+    global _resolver
+    if _resolver is None or _resolver.closed:
+        _resolver = HostnameResolver()
+    return _resolver
@@ -1,55 +1,34 @@
 import sys
-import requests
-import json
-import threading
 import time
 from datetime import datetime
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                             QHBoxLayout, QGridLayout, QLabel, QPushButton, 
-                            QLineEdit, QTableWidget, QTableWidgetItem, 
+                            QLineEdit, QTableView, 
                             QHeaderView, QGroupBox, QCheckBox, QTextEdit,
                             QProgressBar, QMessageBox, QFrame, QSplitter,
                             QTabWidget, QComboBox, QSpinBox, QSystemTrayIcon,
                             QMenu, QStatusBar)
-from PyQt6.QtCore import Qt, QTimer, QThread, pyqtSignal, QSize
-from PyQt6.QtGui import QFont, QPalette, QColor, QIcon, QPixmap, QPainter, QAction
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal, QSize
+from PyQt6.QtGui import QFont, QPalette, QIcon, QPixmap, QPainter, QAction
 
-class NetworkScannerThread(QThread):
-    """Hilo para operaciones de red en segundo plano"""
-    data_updated = pyqtSignal(dict)
-    error_occurred = pyqtSignal(str)
-    
-    def __init__(self, esp32_ip, operation, data=None):
-        super().__init__()
-        self.esp32_ip = esp32_ip
-        self.operation = operation
-        self.data = data
-        self.running = True
-    
-    def run(self):
-        try:
-            if self.operation == "scan_wifi":
-                response = requests.get(f"http://{self.esp32_ip}/scan", timeout=10)
-            elif self.operation == "connect":
-                response = requests.post(f"http://{self.esp32_ip}/connect", 
-                                       data=self.data, timeout=30)
-            elif self.operation == "status":
-                response = requests.get(f"http://{self.esp32_ip}/status", timeout=5)
-            elif self.operation == "devices":
-                response = requests.get(f"http://{self.esp32_ip}/devices", timeout=10)
-            elif self.operation == "disconnect":
-                response = requests.post(f"http://{self.esp32_ip}/disconnect", timeout=10)
-            
-            if response.status_code == 200:
-                self.data_updated.emit(response.json())
-            else:
-                self.error_occurred.emit(f"Error del servidor: {response.status_code}")
-                
-        except requests.exceptions.RequestException as e:
-            self.error_occurred.emit(f"Error de conexión: {str(e)}")
-    
-    def stop(self):
-        self.running = False
+from arp_cache import enrich_devices
+from circuit_breaker import add_recovery_listener, remove_recovery_listener
+from esp32_client import close_all, get_client
+from esp32_workers import EventChannel, RequestExecutor
+from fleet_window import FleetWindow
+from history_store import get_history_store
+from hostname_resolver import get_resolver
+from log_pane import LogPane
+from log_sink import get_log_sink
+from oui_vendors import enrich_vendors
+from poll_scheduler import PollScheduler, RequestBudget
+from rssi_history import RssiHistory
+from signal_chart import SignalChart
+from subnet import get_subnet
+from sweeper import SubnetSweeper, merge_devices
+from table_models import DevicesModel, WiFiNetworksModel, attach_model, ip_key, selected_record
+
+STATUS_INTERVAL = 5  # segundos entre sondeos de /status (base del planificador)
 
 class ModernCard(QFrame):
     """Widget de tarjeta moderna con sombra y efectos"""
@@ -114,13 +93,74 @@ class StatusIndicator(QLabel):
             }}
         """)
 
+class LazyTab(QWidget):
+    """Pestaña que construye su contenido la primera vez que se muestra"""
+    def __init__(self, factory):
+        super().__init__()
+        self.factory = factory
+        self.built = False
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.setLayout(layout)
+    
+    def ensure_built(self):
+        if not self.built:
+            self.built = True
+            self.layout().addWidget(self.factory())
+    
+    def showEvent(self, event):
+        self.ensure_built()
+        super().showEvent(event)
+
 class WiFiManagerGUI(QMainWindow):
-    def __init__(self):
+    # Emitida desde el pool del resolvedor cuando llega un hostname
+    hostname_resolved = pyqtSignal(str, str)
+    # Hitos del arranque: nombre y milisegundos desde el inicio
+    startup_milestone = pyqtSignal(str, float)
+    # Emitida desde el sondeo TCP cuando un ESP32 con circuitos abiertos vuelve
+    esp32_recovered = pyqtSignal(str)
+    
+    def __init__(self, started=None):
         super().__init__()
+        self.started = time.perf_counter() if started is None else started
+        self.startup_times = {}
         self.esp32_ip = "192.168.4.1"
         self.connected = False
         self.auto_refresh = True
         self.refresh_interval = 10
+        self.subnet = None
+        self.esp32_devices = []
+        self.swept_devices = []
+        self.rssi_history = RssiHistory()
+        # Último error mostrado: los repetidos no se vuelven a pintar ni a registrar
+        self.last_status_error = None
+        self.last_network_error = None
+        self.repeated_errors = 0
+        
+        # Las pestañas pesadas se construyen al mostrarse por primera vez
+        self.log_pane = None
+        self.early_logs = []
+        self.detailed_network_info = None
+        self.network_details = ""
+        self.signal_chart = None
+        
+        # Pool de hilos compartido para todas las peticiones al ESP32
+        self.executor = RequestExecutor()
+        
+        # Sondeo adaptativo; la primera consulta de estado sale ya, en paralelo
+        # con la construcción de la ventana (la respuesta se entrega cuando
+        # arranca el bucle de eventos)
+        self.setup_timers()
+        
+        # Los hostnames se resuelven en segundo plano y se aplican fila a fila
+        self.hostname_resolved.connect(self.on_hostname_resolved)
+        get_resolver().add_listener(self.hostname_resolved.emit)
+        
+        # Con el ESP32 caído las peticiones fallan al instante; se vuelve a
+        # sondear en cuanto responde
+        self.esp32_recovered.connect(self.on_esp32_recovered)
+        self.recovery_listener = self.esp32_recovered.emit
+        add_recovery_listener(self.recovery_listener)
         
         # Configurar la aplicación
         self.setWindowTitle("🛡️ ESP32-S3 WiFi Manager Pro")
@@ -132,11 +172,32 @@ class WiFiManagerGUI(QMainWindow):
         # Configurar interfaz
         self.setup_ui()
         
-        # Configurar timers
-        self.setup_timers()
+        # Canal de eventos; el sondeo con timers queda como respaldo
+        self.events = None
+        self.fleet_window = None
+        self.start_event_channel()
         
-        # Estado inicial
-        self.update_status()
+        self.mark_startup("ui")
+    
+    def mark_startup(self, milestone):
+        """Registrar un hito del arranque (solo la primera vez)"""
+        if milestone in self.startup_times:
+            return
+        elapsed = (time.perf_counter() - self.started) * 1000
+        self.startup_times[milestone] = elapsed
+        self.startup_milestone.emit(milestone, elapsed)
+        if milestone != "ready" and {"first_paint", "status"} <= self.startup_times.keys():
+            self.mark_startup("ready")
+            times = self.startup_times
+            self.log_message(f"Arranque: interfaz {times['ui']:.0f} ms, ventana visible "
+                             f"{times['first_paint']:.0f} ms, primera respuesta del ESP32 "
+                             f"{times['status']:.0f} ms")
+            self.statusBar().showMessage(f"Listo en {times['ready']:.0f} ms", 5000)
+    
+    def paintEvent(self, event):
+        if "first_paint" not in self.startup_times:
+            self.mark_startup("first_paint")
+        super().paintEvent(event)
     
     def apply_dark_theme(self):
         """Aplicar tema oscuro moderno"""
@@ -153,525 +214,7 @@ class WiFiManagerGUI(QMainWindow):
                 font-size: 11px;
             }
             
-            QPushButton {import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext
-import requests
-import json
-import threading
-import time
-from datetime import datetime
-import ipaddress
-
-class WiFiManagerGUI:
-    def __init__(self, root):
-        self.root = root
-        self.root.title("ESP32-S3 WiFi Manager & Network Scanner")
-        self.root.geometry("1200x800")
-        self.root.configure(bg='#2c3e50')
-        
-        # Variables
-        self.esp32_ip = "192.168.4.1"  # IP del punto de acceso del ESP32
-        self.connected = False
-        self.auto_refresh = True
-        self.refresh_interval = 10  # segundos
-        
-        # Configurar estilo
-        self.setup_styles()
-        
-        # Crear interfaz
-        self.create_widgets()
-        
-        # Iniciar actualizaciones automáticas
-        self.start_auto_refresh()
-    
-    def setup_styles(self):
-        """Configurar estilos modernos para la interfaz"""
-        self.style = ttk.Style()
-        
-        # Configurar tema oscuro personalizado
-        self.style.theme_use('clam')
-        
-        # Colores
-        bg_color = '#2c3e50'
-        fg_color = '#ecf0f1'
-        accent_color = '#3498db'
-        success_color = '#27ae60'
-        warning_color = '#f39c12'
-        danger_color = '#e74c3c'
-        
-        # Configurar estilos
-        self.style.configure('Title.TLabel', 
-                           background=bg_color, 
-                           foreground=fg_color,
-                           font=('Arial', 16, 'bold'))
-        
-        self.style.configure('Subtitle.TLabel',
-                           background=bg_color,
-                           foreground=accent_color,
-                           font=('Arial', 12, 'bold'))
-        
-        self.style.configure('Info.TLabel',
-                           background=bg_color,
-                           foreground=fg_color,
-                           font=('Arial', 10))
-        
-        self.style.configure('Success.TLabel',
-                           background=bg_color,
-                           foreground=success_color,
-                           font=('Arial', 10, 'bold'))
-        
-        self.style.configure('Warning.TLabel',
-                           background=bg_color,
-                           foreground=warning_color,
-                           font=('Arial', 10, 'bold'))
-        
-        self.style.configure('Custom.TButton',
-                           background=accent_color,
-                           foreground='white',
-                           font=('Arial', 10, 'bold'),
-                           padding=10)
-    
-    def create_widgets(self):
-        """Crear todos los widgets de la interfaz"""
-        # Frame principal con scroll
-        main_frame = tk.Frame(self.root, bg='#2c3e50')
-        main_frame.pack(fill='both', expand=True, padx=20, pady=20)
-        
-        # Título principal
-        title_label = ttk.Label(main_frame, 
-                               text="🛡️ ESP32-S3 WiFi Manager & Network Scanner", 
-                               style='Title.TLabel')
-        title_label.pack(pady=(0, 20))
-        
-        # Frame para configuración de ESP32
-        config_frame = self.create_config_section(main_frame)
-        config_frame.pack(fill='x', pady=(0, 20))
-        
-        # Frame para redes WiFi
-        wifi_frame = self.create_wifi_section(main_frame)
-        wifi_frame.pack(fill='both', expand=True, pady=(0, 20))
-        
-        # Frame para dispositivos de red
-        devices_frame = self.create_devices_section(main_frame)
-        devices_frame.pack(fill='both', expand=True)
-    
-    def create_config_section(self, parent):
-        """Crear sección de configuración del ESP32"""
-        frame = tk.LabelFrame(parent, text="Configuración ESP32", 
-                             bg='#34495e', fg='#ecf0f1', 
-                             font=('Arial', 12, 'bold'), padx=10, pady=10)
-        
-        # IP del ESP32
-        ip_frame = tk.Frame(frame, bg='#34495e')
-        ip_frame.pack(fill='x', pady=5)
-        
-        tk.Label(ip_frame, text="IP del ESP32:", 
-                bg='#34495e', fg='#ecf0f1', font=('Arial', 10)).pack(side='left')
-        
-        self.ip_entry = tk.Entry(ip_frame, font=('Arial', 10), width=15)
-        self.ip_entry.insert(0, self.esp32_ip)
-        self.ip_entry.pack(side='left', padx=(10, 0))
-        
-        # Botón para actualizar IP
-        update_ip_btn = tk.Button(ip_frame, text="Actualizar IP",
-                                 bg='#3498db', fg='white', font=('Arial', 9, 'bold'),
-                                 command=self.update_esp32_ip)
-        update_ip_btn.pack(side='left', padx=(10, 0))
-        
-        # Estado de conexión
-        self.connection_status = tk.Label(frame, text="Estado: Desconectado",
-                                         bg='#34495e', fg='#e74c3c', 
-                                         font=('Arial', 10, 'bold'))
-        self.connection_status.pack(pady=5)
-        
-        return frame
-    
-    def create_wifi_section(self, parent):
-        """Crear sección de redes WiFi"""
-        frame = tk.LabelFrame(parent, text="Redes WiFi Disponibles", 
-                             bg='#34495e', fg='#ecf0f1', 
-                             font=('Arial', 12, 'bold'), padx=10, pady=10)
-        
-        # Botones de control
-        control_frame = tk.Frame(frame, bg='#34495e')
-        control_frame.pack(fill='x', pady=(0, 10))
-        
-        scan_btn = tk.Button(control_frame, text="🔍 Escanear Redes",
-                            bg='#27ae60', fg='white', font=('Arial', 10, 'bold'),
-                            command=self.scan_wifi_networks)
-        scan_btn.pack(side='left', padx=(0, 10))
-        
-        refresh_btn = tk.Button(control_frame, text="🔄 Actualizar",
-                               bg='#f39c12', fg='white', font=('Arial', 10, 'bold'),
-                               command=self.refresh_all_data)
-        refresh_btn.pack(side='left', padx=(0, 10))
-        
-        disconnect_btn = tk.Button(control_frame, text="🔌 Desconectar",
-                                  bg='#e74c3c', fg='white', font=('Arial', 10, 'bold'),
-                                  command=self.disconnect_wifi)
-        disconnect_btn.pack(side='left')
-        
-        # Lista de redes WiFi
-        columns = ('SSID', 'Señal (dBm)', 'Seguridad', 'Canal')
-        self.wifi_tree = ttk.Treeview(frame, columns=columns, show='headings', height=8)
-        
-        # Configurar encabezados
-        for col in columns:
-            self.wifi_tree.heading(col, text=col)
-            self.wifi_tree.column(col, width=150)
-        
-        # Scrollbar para la lista
-        wifi_scrollbar = ttk.Scrollbar(frame, orient='vertical', command=self.wifi_tree.yview)
-        self.wifi_tree.configure(yscrollcommand=wifi_scrollbar.set)
-        
-        # Empaquetar Treeview y scrollbar
-        tree_frame = tk.Frame(frame, bg='#34495e')
-        tree_frame.pack(fill='both', expand=True, pady=(0, 10))
-        
-        self.wifi_tree.pack(side='left', fill='both', expand=True)
-        wifi_scrollbar.pack(side='right', fill='y')
-        
-        # Bind para doble clic
-        self.wifi_tree.bind('<Double-1>', self.on_wifi_select)
-        
-        # Frame para conexión
-        connect_frame = tk.Frame(frame, bg='#34495e')
-        connect_frame.pack(fill='x')
-        
-        tk.Label(connect_frame, text="Contraseña:", 
-                bg='#34495e', fg='#ecf0f1', font=('Arial', 10)).pack(side='left')
-        
-        self.password_entry = tk.Entry(connect_frame, font=('Arial', 10), 
-                                      width=20, show='*')
-        self.password_entry.pack(side='left', padx=(10, 0), fill='x', expand=True)
-        
-        connect_btn = tk.Button(connect_frame, text="Conectar",
-                               bg='#27ae60', fg='white', font=('Arial', 10, 'bold'),
-                               command=self.connect_to_wifi)
-        connect_btn.pack(side='right', padx=(10, 0))
-        
-        return frame
-    
-    def create_devices_section(self, parent):
-        """Crear sección de dispositivos de red"""
-        frame = tk.LabelFrame(parent, text="Dispositivos en la Red", 
-                             bg='#34495e', fg='#ecf0f1', 
-                             font=('Arial', 12, 'bold'), padx=10, pady=10)
-        
-        # Información de red
-        self.network_info = tk.Label(frame, text="Red: No conectado",
-                                    bg='#34495e', fg='#95a5a6', 
-                                    font=('Arial', 10))
-        self.network_info.pack(pady=(0, 10))
-        
-        # Lista de dispositivos
-        device_columns = ('IP', 'Tipo', 'MAC', 'Estado', 'Última conexión')
-        self.devices_tree = ttk.Treeview(frame, columns=device_columns, 
-                                        show='headings', height=10)
-        
-        # Configurar encabezados
-        for col in device_columns:
-            self.devices_tree.heading(col, text=col)
-            self.devices_tree.column(col, width=120)
-        
-        # Scrollbar para dispositivos
-        devices_scrollbar = ttk.Scrollbar(frame, orient='vertical', 
-                                         command=self.devices_tree.yview)
-        self.devices_tree.configure(yscrollcommand=devices_scrollbar.set)
-        
-        # Frame para dispositivos
-        devices_tree_frame = tk.Frame(frame, bg='#34495e')
-        devices_tree_frame.pack(fill='both', expand=True, pady=(0, 10))
-        
-        self.devices_tree.pack(side='left', fill='both', expand=True)
-        devices_scrollbar.pack(side='right', fill='y')
-        
-        # Estadísticas
-        self.stats_label = tk.Label(frame, text="Dispositivos encontrados: 0",
-                                   bg='#34495e', fg='#3498db', 
-                                   font=('Arial', 10, 'bold'))
-        self.stats_label.pack()
-        
-        # Auto-refresh control
-        refresh_control_frame = tk.Frame(frame, bg='#34495e')
-        refresh_control_frame.pack(fill='x', pady=(10, 0))
-        
-        self.auto_refresh_var = tk.BooleanVar(value=True)
-        auto_refresh_check = tk.Checkbutton(refresh_control_frame, 
-                                           text="Actualización automática (10s)",
-                                           variable=self.auto_refresh_var,
-                                           bg='#34495e', fg='#ecf0f1',
-                                           selectcolor='#2c3e50',
-                                           font=('Arial', 9),
-                                           command=self.toggle_auto_refresh)
-        auto_refresh_check.pack(side='left')
-        
-        self.last_update_label = tk.Label(refresh_control_frame, 
-                                         text="Última actualización: --",
-                                         bg='#34495e', fg='#95a5a6', 
-                                         font=('Arial', 9))
-        self.last_update_label.pack(side='right')
-        
-        return frame
-    
-    def update_esp32_ip(self):
-        """Actualizar la IP del ESP32"""
-        new_ip = self.ip_entry.get().strip()
-        if new_ip:
-            self.esp32_ip = new_ip
-            self.refresh_all_data()
-    
-    def scan_wifi_networks(self):
-        """Escanear redes WiFi disponibles"""
-        try:
-            response = requests.get(f"http://{self.esp32_ip}/scan", timeout=10)
-            if response.status_code == 200:
-                data = response.json()
-                self.populate_wifi_list(data['networks'])
-            else:
-                messagebox.showerror("Error", f"Error del servidor: {response.status_code}")
-        except requests.exceptions.RequestException as e:
-            messagebox.showerror("Error de Conexión", 
-                               f"No se pudo conectar al ESP32:\n{str(e)}")
-    
-    def populate_wifi_list(self, networks):
-        """Poblar la lista de redes WiFi"""
-        # Limpiar lista existente
-        for item in self.wifi_tree.get_children():
-            self.wifi_tree.delete(item)
-        
-        # Agregar redes
-        for network in networks:
-            signal_strength = network['rssi']
-            signal_quality = "Excelente" if signal_strength > -50 else \
-                            "Buena" if signal_strength > -60 else \
-                            "Regular" if signal_strength > -70 else "Débil"
-            
-            self.wifi_tree.insert('', 'end', values=(
-                network['ssid'],
-                f"{signal_strength} dBm ({signal_quality})",
-                network['encryption'],
-                network.get('channel', 'N/A')
-            ))
-    
-    def on_wifi_select(self, event):
-        """Manejar selección de red WiFi"""
-        selection = self.wifi_tree.selection()
-        if selection:
-            item = self.wifi_tree.item(selection[0])
-            ssid = item['values'][0]
-            # Autocompletar SSID si es necesario
-            print(f"Red seleccionada: {ssid}")
-    
-    def connect_to_wifi(self):
-        """Conectar a la red WiFi seleccionada"""
-        selection = self.wifi_tree.selection()
-        if not selection:
-            messagebox.showwarning("Advertencia", "Seleccione una red WiFi")
-            return
-        
-        item = self.wifi_tree.item(selection[0])
-        ssid = item['values'][0]
-        password = self.password_entry.get()
-        
-        if not password and "Secured" in item['values'][2]:
-            messagebox.showwarning("Advertencia", "Ingrese la contraseña para la red")
-            return
-        
-        try:
-            # Mostrar progreso
-            self.connection_status.config(text="Estado: Conectando...", fg='#f39c12')
-            self.root.update()
-            
-            data = {'ssid': ssid, 'password': password}
-            response = requests.post(f"http://{self.esp32_ip}/connect", 
-                                   data=data, timeout=30)
-            
-            if response.status_code == 200:
-                result = response.json()
-                if result['success']:
-                    self.connected = True
-                    self.connection_status.config(
-                        text=f"Estado: Conectado a {result['ssid']} ({result['ip']})", 
-                        fg='#27ae60')
-                    messagebox.showinfo("Éxito", 
-                                      f"Conectado exitosamente a {ssid}\nIP: {result['ip']}")
-                    self.password_entry.delete(0, tk.END)
-                    self.refresh_devices()
-                else:
-                    self.connection_status.config(text="Estado: Error de conexión", fg='#e74c3c')
-                    messagebox.showerror("Error", "No se pudo conectar a la red")
-            else:
-                self.connection_status.config(text="Estado: Error", fg='#e74c3c')
-                messagebox.showerror("Error", f"Error del servidor: {response.status_code}")
-                
-        except requests.exceptions.RequestException as e:
-            self.connection_status.config(text="Estado: Error de comunicación", fg='#e74c3c')
-            messagebox.showerror("Error de Conexión", 
-                               f"Error de comunicación con ESP32:\n{str(e)}")
-    
-    def disconnect_wifi(self):
-        """Desconectar de la red WiFi"""
-        try:
-            response = requests.post(f"http://{self.esp32_ip}/disconnect", timeout=10)
-            if response.status_code == 200:
-                self.connected = False
-                self.connection_status.config(text="Estado: Desconectado", fg='#e74c3c')
-                
-                # Limpiar lista de dispositivos
-                for item in self.devices_tree.get_children():
-                    self.devices_tree.delete(item)
-                
-                self.network_info.config(text="Red: No conectado")
-                self.stats_label.config(text="Dispositivos encontrados: 0")
-                
-                messagebox.showinfo("Info", "Desconectado de la red WiFi")
-            else:
-                messagebox.showerror("Error", f"Error del servidor: {response.status_code}")
-        except requests.exceptions.RequestException as e:
-            messagebox.showerror("Error", f"Error de comunicación: {str(e)}")
-    
-    def refresh_devices(self):
-        """Actualizar lista de dispositivos"""
-        try:
-            response = requests.get(f"http://{self.esp32_ip}/devices", timeout=10)
-            if response.status_code == 200:
-                data = response.json()
-                self.populate_devices_list(data)
-                self.update_network_info(data.get('networkInfo', {}))
-            else:
-                print(f"Error al obtener dispositivos: {response.status_code}")
-        except requests.exceptions.RequestException as e:
-            print(f"Error de conexión al obtener dispositivos: {e}")
-    
-    def populate_devices_list(self, data):
-        """Poblar lista de dispositivos"""
-        # Limpiar lista existente
-        for item in self.devices_tree.get_children():
-            self.devices_tree.delete(item)
-        
-        devices = data.get('devices', [])
-        
-        for device in devices:
-            device_type = device.get('type', 'Unknown')
-            status = "🟢 Activo" if device.get('active', False) else "🔴 Inactivo"
-            
-            # Formatear última conexión
-            last_seen = device.get('lastSeen')
-            if last_seen:
-                last_seen_str = datetime.fromtimestamp(last_seen/1000).strftime('%H:%M:%S')
-            else:
-                last_seen_str = "N/A"
-            
-            self.devices_tree.insert('', 'end', values=(
-                device.get('ip', 'N/A'),
-                device_type,
-                device.get('mac', 'Unknown'),
-                status,
-                last_seen_str
-            ))
-        
-        # Actualizar estadísticas
-        self.stats_label.config(text=f"Dispositivos encontrados: {len(devices)}")
-        
-        # Actualizar timestamp
-        now = datetime.now().strftime('%H:%M:%S')
-        self.last_update_label.config(text=f"Última actualización: {now}")
-    
-    def update_network_info(self, network_info):
-        """Actualizar información de la red"""
-        if network_info:
-            subnet = network_info.get('subnet', 'N/A')
-            network = network_info.get('network', 'N/A')
-            broadcast = network_info.get('broadcast', 'N/A')
-            gateway = network_info.get('gateway', 'N/A')
-            
-            info_text = f"Red: {network}/{subnet} | Gateway: {gateway} | Rango: {network} - {broadcast}"
-            self.network_info.config(text=info_text)
-    
-    def refresh_all_data(self):
-        """Actualizar todos los datos"""
-        self.check_connection_status()
-        if self.connected:
-            self.refresh_devices()
-    
-    def check_connection_status(self):
-        """Verificar estado de conexión"""
-        try:
-            response = requests.get(f"http://{self.esp32_ip}/status", timeout=5)
-            if response.status_code == 200:
-                data = response.json()
-                if data.get('connected', False):
-                    self.connected = True
-                    ssid = data.get('ssid', 'Unknown')
-                    ip = data.get('ip', 'Unknown')
-                    rssi = data.get('rssi', 0)
-                    
-                    signal_quality = "Excelente" if rssi > -50 else \
-                                    "Buena" if rssi > -60 else \
-                                    "Regular" if rssi > -70 else "Débil"
-                    
-                    status_text = f"Conectado a {ssid} ({ip}) - Señal: {signal_quality}"
-                    self.connection_status.config(text=f"Estado: {status_text}", fg='#27ae60')
-                else:
-                    self.connected = False
-                    self.connection_status.config(text="Estado: Desconectado", fg='#e74c3c')
-            else:
-                self.connection_status.config(text="Estado: Error de comunicación", fg='#e74c3c')
-        except requests.exceptions.RequestException:
-            self.connection_status.config(text="Estado: ESP32 no accesible", fg='#e74c3c')
-    
-    def toggle_auto_refresh(self):
-        """Activar/desactivar actualización automática"""
-        self.auto_refresh = self.auto_refresh_var.get()
-    
-    def start_auto_refresh(self):
-        """Iniciar el hilo de actualización automática"""
-        def auto_refresh_thread():
-            while True:
-                if self.auto_refresh:
-                    try:
-                        self.refresh_all_data()
-                    except:
-                        pass  # Ignorar errores en el hilo de fondo
-                time.sleep(self.refresh_interval)
-        
-        # Iniciar hilo daemon
-        refresh_thread = threading.Thread(target=auto_refresh_thread, daemon=True)
-        refresh_thread.start()
-
-def main():
-    """Función principal"""
-    root = tk.Tk()
-    app = WiFiManagerGUI(root)
-    
-    # Configurar el cierre de la aplicación
-    def on_closing():
-        app.auto_refresh = False
-        root.destroy()
-    
-    root.protocol("WM_DELETE_WINDOW", on_closing)
-    
-    # Mostrar instrucciones iniciales
-    messagebox.showinfo("Instrucciones de Uso", 
-                       """ESP32-S3 WiFi Manager - Instrucciones:
-
-1. Asegúrate de que el ESP32-S3 esté encendido y ejecutando el código
-2. Conecta tu PC a la red WiFi 'ESP32-WiFiConfig' (contraseña: 12345678)
-3. La IP por defecto es 192.168.4.1
-4. Haz clic en 'Escanear Redes' para ver redes disponibles
-5. Selecciona una red, ingresa la contraseña y conecta
-6. Una vez conectado, verás los dispositivos en la red automáticamente
-
-Características:
-- Escaneo automático de dispositivos cada 10 segundos
-- Detección de rango de red con máscara /28 (255.255.255.240)
-- Interfaz moderna con indicadores visuales de estado""")
-    
-    root.mainloop()
-
-if __name__ == "__main__":
-    main()
+            QPushButton {
                 background-color: #0d7377;
                 color: white;
                 border: none;
@@ -741,7 +284,7 @@ if __name__ == "__main__":
                 background-color: #323237;
             }
             
-            QTableWidget {
+            QTableView {
                 background-color: #2d2d30;
                 alternate-background-color: #323237;
                 selection-background-color: #007acc;
@@ -750,12 +293,12 @@ if __name__ == "__main__":
                 gridline-color: #3f3f46;
             }
             
-            QTableWidget::item {
+            QTableView::item {
                 padding: 12px;
                 border: none;
             }
             
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #007acc;
             }
             
@@ -850,7 +393,7 @@ if __name__ == "__main__":
                 border-top: 1px solid #3f3f46;
             }
             
-            QTextEdit {
+            QTextEdit, QListView {
                 background-color: #2d2d30;
                 border: 1px solid #3f3f46;
                 border-radius: 8px;
@@ -936,6 +479,11 @@ if __name__ == "__main__":
         update_ip_btn.clicked.connect(self.update_esp32_ip)
         ip_layout.addWidget(update_ip_btn)
         
+        fleet_btn = QPushButton("🛰️ Flota")
+        fleet_btn.setToolTip("Vigilar varios ESP32 a la vez")
+        fleet_btn.clicked.connect(self.open_fleet_window)
+        ip_layout.addWidget(fleet_btn)
+        
         layout.addLayout(ip_layout)
         
         # Estado de conexión
@@ -972,9 +520,10 @@ if __name__ == "__main__":
         layout.addLayout(buttons_layout)
         
         # Tabla de redes WiFi
-        self.wifi_table = QTableWidget()
-        self.wifi_table.setColumnCount(4)
-        self.wifi_table.setHorizontalHeaderLabels(["SSID", "Señal", "Seguridad", "Canal"])
+        self.wifi_table = QTableView()
+        self.wifi_model = WiFiNetworksModel(["ssid", "signal", "encryption", "channel"])
+        self.wifi_proxy = attach_model(self.wifi_table, self.wifi_model,
+                                       1, Qt.SortOrder.DescendingOrder)
         
         # Configurar tabla
         header = self.wifi_table.horizontalHeader()
@@ -983,9 +532,9 @@ if __name__ == "__main__":
         header.setSectionResizeMode(2, QHeaderView.ResizeMode.ResizeToContents)
         header.setSectionResizeMode(3, QHeaderView.ResizeMode.ResizeToContents)
         
-        self.wifi_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.wifi_table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
         self.wifi_table.setAlternatingRowColors(True)
-        self.wifi_table.cellDoubleClicked.connect(self.on_wifi_double_click)
+        self.wifi_table.doubleClicked.connect(self.on_wifi_double_click)
         
         layout.addWidget(self.wifi_table)
         
@@ -1048,13 +597,11 @@ if __name__ == "__main__":
         devices_tab = self.create_devices_tab()
         tabs.addTab(devices_tab, "🖥️ Dispositivos")
         
-        # Tab 2: Información de red
-        network_tab = self.create_network_info_tab()
-        tabs.addTab(network_tab, "🌐 Info de Red")
+        # Tab 2: Información de red (se construye al abrirla)
+        tabs.addTab(LazyTab(self.create_network_info_tab), "🌐 Info de Red")
         
-        # Tab 3: Logs
-        logs_tab = self.create_logs_tab()
-        tabs.addTab(logs_tab, "📋 Logs")
+        # Tab 3: Logs (se construye al abrirla)
+        tabs.addTab(LazyTab(self.create_logs_tab), "📋 Logs")
         
         layout.addWidget(tabs)
         panel.setLayout(layout)
@@ -1078,10 +625,23 @@ if __name__ == "__main__":
         """)
         layout.addWidget(self.network_info_label)
         
+        # Filtro de dispositivos y barrido local
+        filter_layout = QHBoxLayout()
+        self.devices_filter = QLineEdit()
+        self.devices_filter.setPlaceholderText("🔎 Filtrar por IP, tipo, MAC...")
+        filter_layout.addWidget(self.devices_filter)
+        
+        sweep_btn = QPushButton("📡 Barrido desde PC")
+        sweep_btn.setToolTip("Buscar dispositivos en la subred directamente desde este PC")
+        sweep_btn.clicked.connect(self.sweep_subnet)
+        filter_layout.addWidget(sweep_btn)
+        layout.addLayout(filter_layout)
+        
         # Tabla de dispositivos
-        self.devices_table = QTableWidget()
-        self.devices_table.setColumnCount(5)
-        self.devices_table.setHorizontalHeaderLabels(["IP", "Tipo", "MAC", "Estado", "Última Conexión"])
+        self.devices_table = QTableView()
+        self.devices_model = DevicesModel(["ip", "type", "mac", "vendor", "hostname", "status", "last_seen"])
+        self.devices_proxy = attach_model(self.devices_table, self.devices_model)
+        self.devices_filter.textChanged.connect(self.devices_proxy.setFilterFixedString)
         
         # Configurar tabla de dispositivos
         header = self.devices_table.horizontalHeader()
@@ -1090,9 +650,11 @@ if __name__ == "__main__":
         header.setSectionResizeMode(2, QHeaderView.ResizeMode.ResizeToContents)
         header.setSectionResizeMode(3, QHeaderView.ResizeMode.ResizeToContents)
         header.setSectionResizeMode(4, QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(5, QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(6, QHeaderView.ResizeMode.ResizeToContents)
         
         self.devices_table.setAlternatingRowColors(True)
-        self.devices_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.devices_table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
         
         layout.addWidget(self.devices_table)
         
@@ -1119,10 +681,29 @@ if __name__ == "__main__":
         self.detailed_network_info = QTextEdit()
         self.detailed_network_info.setReadOnly(True)
         self.detailed_network_info.setMaximumHeight(200)
+        self.detailed_network_info.setText(self.network_details)
         layout.addWidget(self.detailed_network_info)
         
-        # Gráfico de red (simulado con tabla)
-        network_card = ModernCard("🗺️ Mapa de Red")
+        # Historial de señal de las redes escaneadas y del enlace actual
+        chart_widget = QWidget()
+        chart_layout = QVBoxLayout(chart_widget)
+        chart_layout.setContentsMargins(0, 0, 0, 0)
+        
+        span_layout = QHBoxLayout()
+        span_layout.addWidget(QLabel("Ventana:"))
+        self.chart_span_combo = QComboBox()
+        for text, seconds in [("10 min", 600), ("1 hora", 3600), ("12 horas", 43200)]:
+            self.chart_span_combo.addItem(text, seconds)
+        self.chart_span_combo.currentIndexChanged.connect(
+            lambda: self.signal_chart.set_span(self.chart_span_combo.currentData()))
+        span_layout.addWidget(self.chart_span_combo)
+        span_layout.addStretch()
+        chart_layout.addLayout(span_layout)
+        
+        self.signal_chart = SignalChart(self.rssi_history)
+        chart_layout.addWidget(self.signal_chart)
+        
+        network_card = ModernCard("🗺️ Mapa de Red", chart_widget)
         layout.addWidget(network_card)
         
         tab.setLayout(layout)
@@ -1133,10 +714,12 @@ if __name__ == "__main__":
         tab = QWidget()
         layout = QVBoxLayout()
         
-        # Área de logs
-        self.logs_text = QTextEdit()
-        self.logs_text.setReadOnly(True)
-        layout.addWidget(self.logs_text)
+        # Área de logs (buffer circular, se vuelca a la vista por lotes)
+        self.log_pane = LogPane()
+        for ts, level, message in self.early_logs:
+            self.log_pane.log(message, level, ts)
+        self.early_logs = []
+        layout.addWidget(self.log_pane)
         
         # Controles de logs
         logs_controls = QHBoxLayout()
@@ -1172,37 +755,99 @@ if __name__ == "__main__":
         self.setStatusBar(status_bar)
     
     def setup_timers(self):
-        """Configurar timers para actualización automática"""
-        self.refresh_timer = QTimer()
-        self.refresh_timer.timeout.connect(self.auto_update)
-        self.refresh_timer.start(self.refresh_interval * 1000)
-        
-        self.status_timer = QTimer()
-        self.status_timer.timeout.connect(self.update_status)
-        self.status_timer.start(5000)  # Cada 5 segundos
+        """Configurar el sondeo automático (un timer guiado por el planificador)"""
+        self.scheduler = PollScheduler(RequestBudget())
+        self.scheduler.add("status", STATUS_INTERVAL)
+        self.scheduler.add("devices", self.refresh_interval)
+        
+        self.polling = True
+        self.poll_timer = QTimer(self)
+        self.poll_timer.setSingleShot(True)
+        self.poll_timer.timeout.connect(self.poll_scheduled)
+        self.poll_scheduled()
+    
+    def poll_scheduled(self):
+        """Lanzar los sondeos que han vencido y programar el siguiente"""
+        for operation, forced in self.scheduler.due(accept=self.accept_poll):
+            if operation == "status":
+                self.update_status()
+            elif operation == "devices":
+                self.refresh_devices()
+        self.schedule_next_poll()
+    
+    def accept_poll(self, operation, forced):
+        # La lista de dispositivos solo tiene sentido con el ESP32 conectado
+        if operation == "devices":
+            return self.connected and (self.auto_refresh or forced)
+        return True
+    
+    def schedule_next_poll(self):
+        """Reprogramar el timer según el planificador (tras cada resultado)"""
+        if self.polling:
+            self.poll_timer.start(int(self.scheduler.next_delay() * 1000))
+    
+    def start_polling(self):
+        self.polling = True
+        self.scheduler.poll_now()
+        self.schedule_next_poll()
+    
+    def stop_polling(self):
+        self.polling = False
+        self.poll_timer.stop()
+    
+    def start_event_channel(self):
+        """(Re)abrir el canal de eventos del ESP32 actual"""
+        if self.events is not None:
+            self.events.stop()
+            # El canal nuevo empieza desconectado y solo avisa al conectar: si
+            # el ESP32 nuevo no tiene /events, nadie volvería a activar el sondeo
+            self.start_polling()
+        self.events = EventChannel(self.esp32_ip, self)
+        self.events.event_received.connect(self.on_esp32_event)
+        self.events.connection_changed.connect(self.on_events_connection)
+        self.events.start()
+    
+    def on_events_connection(self, connected):
+        """Con el canal activo no se sondea; si se pierde, vuelven los timers"""
+        if self.sender() is not self.events:
+            return
+        if connected:
+            self.stop_polling()
+            self.log_message("Canal de eventos activo: sondeo periódico desactivado", "SUCCESS")
+            # Sincronizar lo que haya cambiado mientras no había canal
+            self.update_status()
+            self.refresh_devices()
+        else:
+            self.start_polling()
+            self.log_message("Canal de eventos no disponible: usando sondeo periódico", "WARNING")
+    
+    def on_esp32_event(self, name, data):
+        """Evento recibido del ESP32"""
+        if self.sender() is not self.events:
+            return
+        if name == "status":
+            self.on_status_update(data)
+        elif name == "devices":
+            joined, left = data.get('joined', []), data.get('left', [])
+            if joined:
+                self.log_message(f"Dispositivos nuevos: {', '.join(joined)}")
+            if left:
+                self.log_message(f"Dispositivos desconectados: {', '.join(left)}")
+            if self.auto_refresh:
+                self.refresh_devices()
+        elif name == "scan" and data.get('type') == "wifi":
+            self.log_message(f"Escaneo WiFi del ESP32: {data.get('totalNetworks', 0)} redes")
     
     def log_message(self, message, level="INFO"):
-        """Agregar mensaje a los logs"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        color_map = {
-            "INFO": "#ffffff",
-            "SUCCESS": "#4caf50", 
-            "WARNING": "#ff9800",
-            "ERROR": "#f44336"
-        }
-        
-        color = color_map.get(level, "#ffffff")
-        formatted_message = f'<span style="color: #888888">[{timestamp}]</span> <span style="color: {color}">[{level}]</span> {message}'
-        
-        self.logs_text.append(formatted_message)
-        
-        # Mantener solo las últimas 100 líneas
-        document = self.logs_text.document()
-        if document.blockCount() > 100:
-            cursor = self.logs_text.textCursor()
-            cursor.movePosition(cursor.MoveOperation.Start)
-            cursor.select(cursor.SelectionType.BlockUnderCursor)
-            cursor.removeSelectedText()
+        """Agregar mensaje a los logs (panel y registro en disco)"""
+        ts = time.time()
+        if self.log_pane is not None:
+            self.log_pane.log(message, level, ts)
+        else:
+            # Pestaña de logs aún sin construir: guardar los últimos mensajes
+            self.early_logs.append((ts, level, message))
+            del self.early_logs[:-1000]
+        get_log_sink().write(level, message, ts)
     
     def update_esp32_ip(self):
         """Actualizar IP del ESP32"""
@@ -1210,7 +855,10 @@ if __name__ == "__main__":
         if new_ip:
             self.esp32_ip = new_ip
             self.log_message(f"IP del ESP32 actualizada a: {new_ip}")
-            self.update_status()
+            self.start_event_channel()
+            self.scheduler.reset()
+            self.scheduler.boost()
+            self.poll_scheduled()
     
     def scan_wifi_networks(self):
         """Escanear redes WiFi"""
@@ -1218,75 +866,38 @@ if __name__ == "__main__":
         self.progress_bar.show()
         self.progress_bar.setRange(0, 0)  # Indeterminate progress
         
-        self.scan_thread = NetworkScannerThread(self.esp32_ip, "scan_wifi")
-        self.scan_thread.data_updated.connect(self.on_wifi_scan_complete)
-        self.scan_thread.error_occurred.connect(self.on_network_error)
-        self.scan_thread.start()
+        self.executor.submit(self.esp32_ip, "scan_wifi",
+                             on_result=self.on_wifi_scan_complete,
+                             on_error=self.on_network_error)
     
     def on_wifi_scan_complete(self, data):
         """Callback cuando se completa el escaneo WiFi"""
         self.progress_bar.hide()
-        networks = data.get('networks', [])
+        networks = data.networks
         
-        self.wifi_table.setRowCount(len(networks))
-        
-        for i, network in enumerate(networks):
-            ssid = network.get('ssid', '')
-            rssi = network.get('rssi', 0)
-            encryption = network.get('encryption', '')
-            channel = network.get('channel', '')
-            
-            # Determinar calidad de señal
-            if rssi > -50:
-                signal_text = f"{rssi} dBm (Excelente)"
-                signal_color = "#4caf50"
-            elif rssi > -60:
-                signal_text = f"{rssi} dBm (Buena)"
-                signal_color = "#8bc34a"
-            elif rssi > -70:
-                signal_text = f"{rssi} dBm (Regular)"
-                signal_color = "#ff9800"
-            else:
-                signal_text = f"{rssi} dBm (Débil)"
-                signal_color = "#f44336"
-            
-            # Crear items de tabla con colores
-            ssid_item = QTableWidgetItem(ssid)
-            signal_item = QTableWidgetItem(signal_text)
-            signal_item.setForeground(QColor(signal_color))
-            encryption_item = QTableWidgetItem(encryption)
-            channel_item = QTableWidgetItem(str(channel))
-            
-            self.wifi_table.setItem(i, 0, ssid_item)
-            self.wifi_table.setItem(i, 1, signal_item)
-            self.wifi_table.setItem(i, 2, encryption_item)
-            self.wifi_table.setItem(i, 3, channel_item)
+        # Solo se modifican las filas que cambiaron
+        self.wifi_model.update_rows([WiFiNetworksModel.row_values(n) for n in networks])
+        self.rssi_history.add_scan(networks)
+        self.refresh_chart()
         
         self.log_message(f"Escaneo completado: {len(networks)} redes encontradas", "SUCCESS")
     
-    def on_wifi_double_click(self, row, column):
+    def on_wifi_double_click(self, index):
         """Manejar doble clic en red WiFi"""
-        ssid_item = self.wifi_table.item(row, 0)
-        if ssid_item:
-            ssid = ssid_item.text()
-            self.log_message(f"Red seleccionada: {ssid}")
+        network = selected_record(self.wifi_table)
+        if network:
+            self.log_message(f"Red seleccionada: {network['ssid']}")
     
     def connect_to_wifi(self):
         """Conectar a red WiFi seleccionada"""
-        current_row = self.wifi_table.currentRow()
-        if current_row < 0:
+        network = selected_record(self.wifi_table)
+        if network is None:
             QMessageBox.warning(self, "Advertencia", "Seleccione una red WiFi")
             return
         
-        ssid_item = self.wifi_table.item(current_row, 0)
-        encryption_item = self.wifi_table.item(current_row, 2)
-        
-        if not ssid_item:
-            return
-        
-        ssid = ssid_item.text()
+        ssid = network['ssid']
         password = self.password_entry.text()
-        encryption = encryption_item.text() if encryption_item else ""
+        encryption = network['encryption']
         
         if "Secured" in encryption and not password:
             QMessageBox.warning(self, "Advertencia", "Ingrese la contraseña para la red")
@@ -1298,10 +909,9 @@ if __name__ == "__main__":
         self.status_indicator.set_status("connecting")
         
         data = {'ssid': ssid, 'password': password}
-        self.connect_thread = NetworkScannerThread(self.esp32_ip, "connect", data)
-        self.connect_thread.data_updated.connect(self.on_wifi_connect_complete)
-        self.connect_thread.error_occurred.connect(self.on_network_error)
-        self.connect_thread.start()
+        self.executor.submit(self.esp32_ip, "connect", data,
+                             on_result=self.on_wifi_connect_complete,
+                             on_error=self.on_network_error)
     
     def on_wifi_connect_complete(self, data):
         """Callback cuando se completa la conexión WiFi"""
@@ -1328,6 +938,10 @@ if __name__ == "__main__":
             self.password_entry.clear()
             self.log_message(f"Conectado exitosamente a {ssid} ({ip})", "SUCCESS")
             
+            # Sondear más a menudo mientras el ESP32 se asienta en la red
+            self.scheduler.boost()
+            self.schedule_next_poll()
+            
             # Actualizar información de estado
             self.connection_status_label.setText(f"Conectado a {ssid}")
             self.status_label.setText("Conectado")
@@ -1356,10 +970,9 @@ if __name__ == "__main__":
         """Desconectar de WiFi"""
         self.log_message("Desconectando de WiFi...")
         
-        self.disconnect_thread = NetworkScannerThread(self.esp32_ip, "disconnect")
-        self.disconnect_thread.data_updated.connect(self.on_wifi_disconnect_complete)
-        self.disconnect_thread.error_occurred.connect(self.on_network_error)
-        self.disconnect_thread.start()
+        self.executor.submit(self.esp32_ip, "disconnect",
+                             on_result=self.on_wifi_disconnect_complete,
+                             on_error=self.on_network_error)
     
     def on_wifi_disconnect_complete(self, data):
         """Callback cuando se completa la desconexión"""
@@ -1377,38 +990,61 @@ if __name__ == "__main__":
             """)
             
             # Limpiar información
-            self.devices_table.setRowCount(0)
+            self.esp32_devices = []
+            self.swept_devices = []
+            self.devices_model.clear()
+            get_client(self.esp32_ip).forget_versions(self.executor.scope)
             self.network_info_label.setText("Red: No conectado")
-            self.detailed_network_info.clear()
+            self.set_network_details("")
             self.device_count_status.setText("0 dispositivos")
             self.connection_status_label.setText("Desconectado")
             self.status_label.setText("Desconectado")
             
             self.log_message("Desconectado exitosamente", "SUCCESS")
+            self.scheduler.boost("status")
+            self.schedule_next_poll()
             QMessageBox.information(self, "Info", "Desconectado de la red WiFi")
     
     def update_status(self):
         """Actualizar estado de conexión"""
-        self.status_thread = NetworkScannerThread(self.esp32_ip, "status")
-        self.status_thread.data_updated.connect(self.on_status_update)
-        self.status_thread.error_occurred.connect(self.on_status_error)
-        self.status_thread.start()
+        self.executor.submit(self.esp32_ip, "status",
+                             on_result=self.on_status_polled,
+                             on_error=self.on_status_error,
+                             on_unchanged=self.on_status_unchanged)
+    
+    def on_status_polled(self, data):
+        """Respuesta de ``/status`` a un sondeo (los eventos van directos a ``on_status_update``)"""
+        self.scheduler.success("status", data)
+        self.on_status_update(data)
+        self.schedule_next_poll()
+    
+    def on_status_unchanged(self):
+        """El ESP32 respondió 304: el estado mostrado sigue vigente"""
+        self.scheduler.success("status")
+        self.schedule_next_poll()
     
     def on_status_update(self, data):
         """Callback para actualización de estado"""
-        if data.get('connected', False):
-            if not self.connected:
+        self.mark_startup("status")
+        self.rssi_history.add_status(data)
+        self.refresh_chart()
+        
+        # Tras un error hay que repintar aunque el estado no haya cambiado
+        recovering = self.last_status_error is not None
+        self.last_status_error = None
+        
+        if data.connected:
+            if not self.connected or recovering:
                 # Cambio de estado a conectado
                 self.connected = True
                 self.status_indicator.set_status("connected")
+                self.scheduler.poll_now("devices")
+                self.scheduler.boost("devices")
                 
-                ssid = data.get('ssid', 'Unknown')
-                ip = data.get('ip', 'Unknown')
-                rssi = data.get('rssi', 0)
-                
-                signal_quality = "Excelente" if rssi > -50 else \
-                                "Buena" if rssi > -60 else \
-                                "Regular" if rssi > -70 else "Débil"
+                ssid = data.ssid
+                ip = data.ip
+                rssi = data.rssi
+                signal_quality = data.quality[0]
                 
                 self.connection_label.setText(f"Estado: Conectado a {ssid} ({ip}) - {signal_quality}")
                 self.connection_label.setStyleSheet("""
@@ -1433,15 +1069,15 @@ Información de Conexión WiFi:
 🌐 SSID: {ssid}
 📶 IP Local: {ip}
 📊 Señal RSSI: {rssi} dBm ({signal_quality})
-🔗 Gateway: {data.get('gateway', 'N/A')}
-🔍 DNS: {data.get('dns', 'N/A')}
+🔗 Gateway: {data.gateway}
+🔍 DNS: {data.dns}
 ⏰ Estado: Conectado y activo
 
 Última actualización: {datetime.now().strftime('%H:%M:%S')}
                 """
-                self.detailed_network_info.setText(network_info)
+                self.set_network_details(network_info)
         else:
-            if self.connected:
+            if self.connected or recovering:
                 # Cambio de estado a desconectado
                 self.connected = False
                 self.status_indicator.set_status("disconnected")
@@ -1456,10 +1092,19 @@ Información de Conexión WiFi:
                 """)
                 self.connection_status_label.setText("Desconectado")
                 self.status_label.setText("Desconectado")
-                self.detailed_network_info.clear()
+                self.set_network_details("")
     
     def on_status_error(self, error):
         """Callback para errores de estado"""
+        self.mark_startup("status")
+        self.scheduler.failure("status")
+        self.schedule_next_poll()
+        if self.last_status_error is not None:
+            # El error ya está en pantalla
+            self.last_status_error = error
+            return
+        self.last_status_error = error
+        self.log_message(f"ESP32 no accesible: {error}", "WARNING")
         self.status_indicator.set_status("error")
         self.connection_label.setText("Estado: ESP32 no accesible")
         self.connection_label.setStyleSheet("""
@@ -1477,72 +1122,47 @@ Información de Conexión WiFi:
     def refresh_devices(self):
         """Actualizar lista de dispositivos"""
         if self.connected:
-            self.devices_thread = NetworkScannerThread(self.esp32_ip, "devices")
-            self.devices_thread.data_updated.connect(self.on_devices_update)
-            self.devices_thread.error_occurred.connect(self.on_network_error)
-            self.devices_thread.start()
+            self.executor.submit(self.esp32_ip, "devices",
+                                 on_result=self.on_devices_update,
+                                 on_error=self.on_network_error,
+                                 on_unchanged=self.on_devices_unchanged)
+    
+    def on_devices_unchanged(self):
+        """El ESP32 respondió 304: la lista no cambió desde el último sondeo"""
+        self.scheduler.success("devices")
+        self.schedule_next_poll()
+        now = datetime.now().strftime('%H:%M:%S')
+        self.last_update_label.setText(f"Última actualización: {now} (sin cambios)")
     
     def on_devices_update(self, data):
         """Callback para actualización de dispositivos"""
-        devices = data.get('devices', [])
-        network_info = data.get('networkInfo', {})
-        
-        # Actualizar tabla de dispositivos
-        self.devices_table.setRowCount(len(devices))
-        
-        for i, device in enumerate(devices):
-            ip = device.get('ip', 'N/A')
-            device_type = device.get('type', 'Unknown')
-            mac = device.get('mac', 'Unknown')
-            active = device.get('active', False)
-            last_seen = device.get('lastSeen')
-            
-            # Estado visual
-            if active:
-                status_text = "🟢 Activo"
-                status_color = "#4caf50"
-            else:
-                status_text = "🔴 Inactivo"
-                status_color = "#f44336"
-            
-            # Formatear última conexión
-            if last_seen:
-                last_seen_str = datetime.fromtimestamp(last_seen/1000).strftime('%H:%M:%S')
-            else:
-                last_seen_str = "N/A"
-            
-            # Crear items con colores
-            ip_item = QTableWidgetItem(ip)
-            type_item = QTableWidgetItem(device_type)
-            mac_item = QTableWidgetItem(mac)
-            status_item = QTableWidgetItem(status_text)
-            status_item.setForeground(QColor(status_color))
-            time_item = QTableWidgetItem(last_seen_str)
-            
-            # Destacar el propio dispositivo
-            if "Self" in device_type:
-                for item in [ip_item, type_item, mac_item, status_item, time_item]:
-                    item.setBackground(QColor("#007acc20"))
-            
-            self.devices_table.setItem(i, 0, ip_item)
-            self.devices_table.setItem(i, 1, type_item)
-            self.devices_table.setItem(i, 2, mac_item)
-            self.devices_table.setItem(i, 3, status_item)
-            self.devices_table.setItem(i, 4, time_item)
+        self.scheduler.success("devices", data)
+        self.schedule_next_poll()
+        self.clear_network_error()
+        self.esp32_devices = data.devices
+        devices = self.merged_devices()
+        network_info = data.network_info
+        
+        # Guardar el sondeo en el historial (lo escribe un hilo aparte)
+        get_history_store().record_poll(devices)
+        
+        # Actualizar tabla de dispositivos (solo las filas que cambiaron)
+        self.devices_model.update_rows([DevicesModel.row_values(d) for d in devices])
         
         # Actualizar información de red
         if network_info:
-            subnet = network_info.get('subnet', 'N/A')
-            network = network_info.get('network', 'N/A')
-            broadcast = network_info.get('broadcast', 'N/A')
-            gateway = network_info.get('gateway', 'N/A')
-            total_devices = network_info.get('totalDevices', 0)
+            try:
+                self.subnet = get_subnet(network_info.network, network_info.subnet)
+                network = f"{self.subnet.network_str}/{self.subnet.prefix} ({self.subnet.host_count} hosts)"
+            except (OSError, ValueError):
+                network = network_info.network or 'N/A'
             
-            network_text = f"Red: {network}/{subnet} | Gateway: {gateway} | Dispositivos: {total_devices}"
+            network_text = (f"Red: {network} | Gateway: {network_info.gateway} | "
+                            f"Dispositivos: {data.total_devices}")
             self.network_info_label.setText(network_text)
         
         # Actualizar estadísticas
-        active_devices = len([d for d in devices if d.get('active', False)])
+        active_devices = sum(1 for d in devices if d.active)
         self.devices_count_label.setText(f"Dispositivos activos: {active_devices}/{len(devices)}")
         self.device_count_status.setText(f"{active_devices} dispositivos activos")
         
@@ -1552,24 +1172,79 @@ Información de Conexión WiFi:
         
         self.log_message(f"Dispositivos actualizados: {active_devices} activos de {len(devices)} total")
     
+    def merged_devices(self):
+        """Dispositivos del ESP32 y del barrido local con MAC, fabricante y hostname"""
+        devices = enrich_vendors(enrich_devices(merge_devices(self.esp32_devices, self.swept_devices)))
+        return get_resolver().enrich(devices)
+    
+    def on_hostname_resolved(self, ip, hostname):
+        """Aplicar un hostname resuelto sin esperar al siguiente sondeo"""
+        self.devices_model.set_values(ip_key(ip), {"hostname": hostname})
+    
+    def sweep_subnet(self):
+        """Barrer la subred desde el PC como alternativa al escaneo del ESP32"""
+        if self.subnet is None:
+            QMessageBox.warning(self, "Advertencia",
+                                "Aún no se conoce la subred; espere a la primera lista de dispositivos")
+            return
+        
+        sweeper = SubnetSweeper(self.subnet)
+        self.log_message(f"Barrido local de {self.subnet.network_str}/{self.subnet.prefix} "
+                         f"({self.subnet.host_count} hosts)...")
+        self.executor.submit_task("sweep", lambda: {"devices": sweeper.sweep()},
+                                  on_result=self.on_sweep_complete,
+                                  on_error=self.on_network_error)
+    
+    def on_sweep_complete(self, data):
+        """Callback cuando termina el barrido local"""
+        self.swept_devices = data.get('devices', [])
+        devices = self.merged_devices()
+        self.devices_model.update_rows([DevicesModel.row_values(d) for d in devices])
+        self.log_message(f"Barrido local completado: {len(self.swept_devices)} dispositivos responden", "SUCCESS")
+    
     def on_network_error(self, error):
         """Callback para errores de red"""
         self.progress_bar.hide()
+        operation = getattr(self.sender(), "operation", None)
+        if operation in self.scheduler.endpoints:
+            self.scheduler.failure(operation)
+            self.schedule_next_poll()
+        if error == self.last_network_error:
+            self.repeated_errors += 1
+            return
+        self.clear_network_error()
+        self.last_network_error = error
         self.log_message(f"Error de red: {error}", "ERROR")
         
         # Solo mostrar error crítico si no es un error de rutina
-        if "timeout" not in error.lower() and "connection" not in error.lower():
+        lowered = error.lower()
+        if not any(word in lowered for word in ("timeout", "connection", "circuito abierto",
+                                                "plazo agotado")):
             QMessageBox.critical(self, "Error de Red", f"Error de comunicación:\n{error}")
     
-    def auto_update(self):
-        """Actualización automática"""
-        if self.auto_refresh and self.connected:
-            self.refresh_devices()
+    def clear_network_error(self):
+        """Olvidar el último error de red (y contar cuántas veces se repitió)"""
+        if self.repeated_errors:
+            self.log_message(f"El error anterior se repitió {self.repeated_errors} veces más",
+                             "WARNING")
+        self.last_network_error = None
+        self.repeated_errors = 0
+    
+    def on_esp32_recovered(self, esp32_ip):
+        """El ESP32 vuelve a aceptar conexiones: sondear ya en lugar de esperar al backoff"""
+        if esp32_ip != self.esp32_ip:
+            return
+        self.log_message("El ESP32 vuelve a responder", "SUCCESS")
+        self.scheduler.boost()
+        self.scheduler.poll_now("status", "devices")
+        self.schedule_next_poll()
     
     def toggle_auto_refresh(self, checked):
         """Activar/desactivar actualización automática"""
         self.auto_refresh = checked
         if checked:
+            self.scheduler.poll_now("devices")
+            self.schedule_next_poll()
             self.log_message("Actualización automática activada")
         else:
             self.log_message("Actualización automática desactivada")
@@ -1577,53 +1252,69 @@ Información de Conexión WiFi:
     def update_refresh_interval(self, value):
         """Actualizar intervalo de actualización"""
         self.refresh_interval = value
-        self.refresh_timer.stop()
-        self.refresh_timer.start(value * 1000)
+        self.scheduler.set_interval("devices", value)
+        self.schedule_next_poll()
         self.log_message(f"Intervalo de actualización cambiado a {value} segundos")
     
+    def set_network_details(self, text):
+        """Texto de la tarjeta de información de red (aunque aún no exista)"""
+        self.network_details = text
+        if self.detailed_network_info is not None:
+            self.detailed_network_info.setText(text)
+    
+    def refresh_chart(self):
+        if self.signal_chart is not None:
+            self.signal_chart.update()
+    
     def clear_logs(self):
         """Limpiar logs"""
-        self.logs_text.clear()
+        self.log_pane.clear()
         self.log_message("Logs limpiados")
     
     def export_logs(self):
-        """Exportar logs a archivo"""
-        try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"wifi_manager_logs_{timestamp}.txt"
-            
-            with open(filename, 'w', encoding='utf-8') as f:
-                f.write(f"WiFi Manager Logs - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                f.write("="*60 + "\n\n")
-                
-                # Obtener texto plano sin HTML
-                plain_text = self.logs_text.toPlainText()
-                f.write(plain_text)
-            
-            self.log_message(f"Logs exportados a: {filename}", "SUCCESS")
-            QMessageBox.information(self, "Éxito", f"Logs exportados exitosamente a:\n{filename}")
-            
-        except Exception as e:
-            self.log_message(f"Error al exportar logs: {str(e)}", "ERROR")
-            QMessageBox.critical(self, "Error", f"Error al exportar logs:\n{str(e)}")
+        """Exportar logs: copiar los segmentos del registro en disco (en segundo plano)"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        destination = f"wifi_manager_logs_{timestamp}"
+        sink = get_log_sink()
+        self.executor.submit_task("export_logs",
+                                  lambda: {"directory": destination, "files": sink.export(destination)},
+                                  on_result=self.on_logs_exported,
+                                  on_error=self.on_logs_export_error)
+    
+    def on_logs_exported(self, data):
+        """Callback cuando termina la copia de los segmentos"""
+        directory, files = data['directory'], data['files']
+        self.log_message(f"Logs exportados a: {directory} ({len(files)} archivos)", "SUCCESS")
+        QMessageBox.information(self, "Éxito", f"Logs exportados exitosamente a:\n{directory}")
+    
+    def on_logs_export_error(self, error):
+        self.log_message(f"Error al exportar logs: {error}", "ERROR")
+        QMessageBox.critical(self, "Error", f"Error al exportar logs:\n{error}")
+    
+    def open_fleet_window(self):
+        """Mostrar la ventana de flota (se crea la primera vez)"""
+        if self.fleet_window is None or self.fleet_window.closed:
+            self.fleet_window = FleetWindow(self)
+        self.fleet_window.show()
+        self.fleet_window.raise_()
+        self.fleet_window.activateWindow()
     
     def closeEvent(self, event):
         """Manejar cierre de la aplicación"""
         self.auto_refresh = False
-        if hasattr(self, 'refresh_timer'):
-            self.refresh_timer.stop()
-        if hasattr(self, 'status_timer'):
-            self.status_timer.stop()
-        
-        # Detener threads activos
-        for thread_name in ['scan_thread', 'connect_thread', 'disconnect_thread', 'status_thread', 'devices_thread']:
-            if hasattr(self, thread_name):
-                thread = getattr(self, thread_name)
-                if thread.isRunning():
-                    thread.quit()
-                    thread.wait()
-        
+        self.stop_polling()
+        
+        # Detener el canal de eventos y el pool de peticiones
+        if self.fleet_window is not None and not self.fleet_window.closed:
+            self.fleet_window.close()
+        self.events.stop()
+        remove_recovery_listener(self.recovery_listener)
+        self.executor.shutdown()
+        get_resolver().shutdown()
+        get_history_store().close()
+        close_all()
         self.log_message("Aplicación cerrada")
+        get_log_sink().close()
         event.accept()
 
 class SplashScreen(QWidget):
@@ -1631,7 +1322,8 @@ class SplashScreen(QWidget):
     def __init__(self):
         super().__init__()
         self.setFixedSize(400, 300)
-        self.setWindowFlags(Qt.WindowType.FramelessWindowHint)
+        # Encima de la ventana principal, que se muestra antes de cerrar el splash
+        self.setWindowFlags(Qt.WindowType.FramelessWindowHint | Qt.WindowType.WindowStaysOnTopHint)
         self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
         
         # Centrar en pantalla
@@ -1719,33 +1411,25 @@ class SplashScreen(QWidget):
         container.setLayout(container_layout)
         layout.addWidget(container)
         self.setLayout(layout)
-        
-        # Timer para simular carga
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_progress)
-        self.current_progress = 0
-        self.timer.start(50)
-    
-    def update_progress(self):
-        self.current_progress += 2
-        self.progress.setValue(self.current_progress)
-        
-        # Actualizar estado
-        if self.current_progress < 30:
-            self.status_label.setText("Cargando componentes...")
-        elif self.current_progress < 60:
-            self.status_label.setText("Inicializando interfaz...")
-        elif self.current_progress < 90:
-            self.status_label.setText("Configurando tema...")
-        else:
-            self.status_label.setText("¡Listo!")
-        
-        if self.current_progress >= 100:
-            self.timer.stop()
-            QTimer.singleShot(500, self.close)
+    
+    def set_milestone(self, text, progress):
+        """Mostrar un hito real del arranque"""
+        self.progress.setValue(max(progress, self.progress.value()))
+        self.status_label.setText(text)
+
+# Hitos del arranque -> (texto del splash, progreso)
+STARTUP_MILESTONES = {
+    "ui": ("Interfaz construida", 40),
+    "first_paint": ("Esperando al ESP32...", 70),
+    "status": ("ESP32 consultado", 90),
+    "ready": ("¡Listo!", 100),
+}
+# El splash se cierra aunque el ESP32 no haya respondido
+STARTUP_TIMEOUT = 5000
 
 def main():
     """Función principal de la aplicación"""
+    started = time.perf_counter()
     app = QApplication(sys.argv)
     
     # Configurar aplicación
@@ -1762,22 +1446,27 @@ def main():
     splash.show()
     
     # Procesar eventos para mostrar splash
+    splash.set_milestone("Construyendo interfaz...", 10)
     app.processEvents()
     
-    # Crear ventana principal
-    main_window = WiFiManagerGUI()
+    # Crear ventana principal; la primera consulta de /status ya está en curso
+    main_window = WiFiManagerGUI(started)
+    splash.set_milestone(*STARTUP_MILESTONES["ui"])
+    
+    def on_milestone(milestone, elapsed):
+        if milestone in STARTUP_MILESTONES:
+            splash.set_milestone(*STARTUP_MILESTONES[milestone])
+        if milestone == "ready":
+            QTimer.singleShot(200, splash.close)
     
-    # Configurar cierre de splash cuando se muestre la ventana principal
-    def show_main_window():
-        if splash.isVisible():
-            splash.close()
-        main_window.show()
-        main_window.log_message("Aplicación iniciada correctamente", "SUCCESS")
-        main_window.log_message(f"ESP32 IP configurada: {main_window.esp32_ip}")
-        main_window.log_message("Para comenzar, conecta tu PC a la red 'ESP32-WiFiConfig'", "INFO")
+    main_window.startup_milestone.connect(on_milestone)
+    QTimer.singleShot(STARTUP_TIMEOUT, splash.close)
     
-    # Mostrar ventana principal después del splash
-    QTimer.singleShot(3000, show_main_window)
+    # La ventana se muestra en cuanto está construida
+    main_window.show()
+    main_window.log_message("Aplicación iniciada correctamente", "SUCCESS")
+    main_window.log_message(f"ESP32 IP configurada: {main_window.esp32_ip}")
+    main_window.log_message("Para comenzar, conecta tu PC a la red 'ESP32-WiFiConfig'", "INFO")
     
     # Manejar cierre limpio
     def cleanup():
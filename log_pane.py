@@ -0,0 +1,175 @@
+"""Panel de logs acotado para la interfaz PyQt6.
+
+``log`` solo añade una tupla ``(ts, nivel, mensaje)`` a una cola y se puede
+llamar desde cualquier hilo. Un ``QTimer`` vuelca lo acumulado cada
+``flush_interval`` ms en un buffer circular de ``capacity`` entradas; la
+vista es una ``QListView`` sobre un modelo de lista, así que solo se formatean
+las filas visibles y un pico de miles de mensajes por segundo cuesta una
+inserción de filas por volcado en lugar de un reflujo de texto enriquecido por
+mensaje.
+"""
+import time
+from collections import deque
+from datetime import datetime
+
+from PyQt6.QtCore import QAbstractListModel, QModelIndex, Qt, QTimer
+from PyQt6.QtGui import QColor
+from PyQt6.QtWidgets import QAbstractItemView, QComboBox, QHBoxLayout, QLabel, QListView, QVBoxLayout, QWidget
+
+LEVEL_COLORS = {
+    "INFO": "#ffffff",
+    "SUCCESS": "#4caf50",
+    "WARNING": "#ff9800",
+    "ERROR": "#f44336",
+}
+
+# Filtros del combo -> niveles visibles (None: todos)
+LEVEL_FILTERS = [
+    ("Todos", None),
+    ("Avisos y errores", {"WARNING", "ERROR"}),
+    ("Solo errores", {"ERROR"}),
+    ("Éxitos", {"SUCCESS"}),
+]
+
+DEFAULT_CAPACITY = 5000
+FLUSH_INTERVAL = 100
+
+
+def format_entry(entry):
+    ts, level, message = entry
+    return f"[{datetime.fromtimestamp(ts).strftime('%H:%M:%S')}] [{level}] {message}"
+
+
+class LogModel(QAbstractListModel):
+    """Entradas visibles con el filtro actual (como mucho ``capacity``)"""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, parent=None):
+        super().__init__(parent)
+        self.capacity = capacity
+        self.levels = None
+        self.rows = deque()
+        self._colors = {level: QColor(color) for level, color in LEVEL_COLORS.items()}
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return format_entry(self.rows[index.row()])
+        if role == Qt.ItemDataRole.ForegroundRole:
+            return self._colors.get(self.rows[index.row()][1])
+        return None
+
+    def accepts(self, entry):
+        return self.levels is None or entry[1] in self.levels
+
+    def append_batch(self, entries):
+        """Añadir un volcado: un solo bloque de filas insertadas y otro de eliminadas"""
+        entries = [entry for entry in entries if self.accepts(entry)][-self.capacity:]
+        if not entries:
+            return
+        overflow = len(self.rows) + len(entries) - self.capacity
+        if overflow > 0:
+            self.beginRemoveRows(QModelIndex(), 0, overflow - 1)
+            for _ in range(overflow):
+                self.rows.popleft()
+            self.endRemoveRows()
+        first = len(self.rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(entries) - 1)
+        self.rows.extend(entries)
+        self.endInsertRows()
+
+    def reset(self, entries):
+        self.beginResetModel()
+        self.rows = deque(entry for entry in entries if self.accepts(entry))
+        self.endResetModel()
+
+
+class LogPane(QWidget):
+    """Vista de logs con buffer circular, volcado por lotes y filtro por nivel"""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, flush_interval=FLUSH_INTERVAL, parent=None):
+        super().__init__(parent)
+        self.capacity = capacity
+        self.entries = deque(maxlen=capacity)
+        self.dropped = 0
+        # deque.append es atómico: cualquier hilo puede encolar sin bloqueo
+        self._pending = deque(maxlen=capacity)
+
+        self.model = LogModel(capacity, self)
+        self.view = QListView()
+        self.view.setModel(self.model)
+        self.view.setUniformItemSizes(True)
+        self.view.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.view.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+
+        self.filter_combo = QComboBox()
+        for text, levels in LEVEL_FILTERS:
+            self.filter_combo.addItem(text, levels)
+        self.filter_combo.currentIndexChanged.connect(
+            lambda: self.set_levels(self.filter_combo.currentData()))
+        self.count_label = QLabel()
+
+        filter_layout = QHBoxLayout()
+        filter_layout.addWidget(QLabel("Nivel:"))
+        filter_layout.addWidget(self.filter_combo)
+        filter_layout.addStretch()
+        filter_layout.addWidget(self.count_label)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addLayout(filter_layout)
+        layout.addWidget(self.view)
+
+        self.flush_timer = QTimer(self)
+        self.flush_timer.timeout.connect(self.flush)
+        self.flush_timer.start(flush_interval)
+
+    def log(self, message, level="INFO", ts=None):
+        """Encolar un mensaje (desde cualquier hilo); se ve en el siguiente volcado"""
+        if len(self._pending) == self.capacity:
+            self.dropped += 1
+        self._pending.append((time.time() if ts is None else ts, level, message))
+
+    def flush(self):
+        """Pasar lo encolado al buffer y a la vista"""
+        pending = self._pending
+        count = len(pending)
+        if not count:
+            return
+        batch = [pending.popleft() for _ in range(count)]
+        self.entries.extend(batch)
+
+        scrollbar = self.view.verticalScrollBar()
+        at_bottom = scrollbar.value() >= scrollbar.maximum()
+        self.model.append_batch(batch)
+        if at_bottom:
+            self.view.scrollToBottom()
+        self._update_count()
+
+    def set_levels(self, levels):
+        self.flush()
+        self.model.levels = levels
+        self.model.reset(self.entries)
+        self.view.scrollToBottom()
+        self._update_count()
+
+    def _update_count(self):
+        text = f"{len(self.model.rows)}/{len(self.entries)} líneas"
+        if self.dropped:
+            text += f" ({self.dropped} descartadas)"
+        self.count_label.setText(text)
+
+    def clear(self):
+        self._pending.clear()
+        self.entries.clear()
+        self.dropped = 0
+        self.model.reset(())
+        self._update_count()
+
+    def plain_text(self):
+        """Todas las entradas del buffer (sin filtrar) como texto plano"""
+        self.flush()
+        return "\n".join(format_entry(entry) for entry in self.entries)
@@ -0,0 +1,225 @@
+"""Registro continuo de los logs en disco (JSON Lines).
+
+``LogSink.write`` solo encola el mensaje; un hilo escritor agrupa lo que llega
+durante ``batch_interval`` y lo añade al segmento actual, un fichero
+``.jsonl`` con un objeto por línea (``ts``, ``level``, ``message``). Cuando el
+segmento supera ``max_bytes`` o ``max_age`` segundos se cierra, se comprime con
+gzip (opcional) y se empieza otro; solo se conservan los ``keep`` segmentos más
+recientes.
+
+Los segmentos cerrados no vuelven a cambiar, así que exportar es copiarlos:
+``export`` cierra el segmento actual (en el hilo escritor, entre dos lotes) y
+copia todos los segmentos a una carpeta. Una sesión larga queda registrada
+completa sin que la interfaz guarde los mensajes en memoria.
+
+Varias instancias (la ventana principal y ``esp32_poller``, dos interfaces...)
+pueden compartir la carpeta: al arrancar solo se comprimen los ``.jsonl`` que
+llevan más de ``max_age`` sin cambios, y la limpieza de los antiguos no toca
+los que otra instancia puede seguir escribiendo.
+"""
+import gzip
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+from datetime import datetime
+
+LOG_DIRECTORY = "wifi_manager_logs"
+SEGMENT_PREFIX = "wifi_manager_"
+
+_STOP = object()
+
+
+class _Rotate(threading.Event):
+    """Marcador: cerrar el segmento actual y avisar al terminar"""
+
+
+class LogSink:
+    """Escritor de logs en segmentos rotados, con un hilo en segundo plano"""
+
+    def __init__(self, directory=LOG_DIRECTORY, max_bytes=5 * 1024 * 1024, max_age=3600,
+                 compress=True, keep=50, batch_interval=0.5):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.compress = compress
+        self.keep = keep
+        self.batch_interval = batch_interval
+        self.records_written = 0
+        self.last_error = None
+        self.closed = False
+        self._queue = queue.Queue()
+        self._file = None
+        self._path = None
+        self._opened = 0
+        self._size = 0
+        # Segmentos .jsonl cerrados por esta instancia (sin compresión)
+        self._closed = set()
+        self._writer = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._writer.start()
+
+    def write(self, level, message, ts=None):
+        """Encolar un mensaje; no toca el disco (apto para el hilo de la GUI)"""
+        self._queue.put((time.time() if ts is None else ts, level, message))
+
+    def _open_segment(self):
+        name = f"{SEGMENT_PREFIX}{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.jsonl"
+        self._path = os.path.join(self.directory, name)
+        self._file = open(self._path, "a", encoding="utf-8")
+        self._opened = time.monotonic()
+        self._size = 0
+
+    def _abandoned(self, path):
+        """``.jsonl`` de otra sesión que ya nadie escribe: una instancia en marcha
+        rota el segmento que supera ``max_age`` antes de volver a escribir"""
+        if path == self._path or not path.endswith(".jsonl"):
+            return False
+        try:
+            return time.time() - os.path.getmtime(path) > self.max_age
+        except OSError:
+            return False
+
+    def _finish(self, path):
+        """Comprimir un segmento cerrado y borrar los más antiguos"""
+        if self.compress:
+            try:
+                with open(path, "rb") as source, gzip.open(path + ".gz", "wb") as dest:
+                    shutil.copyfileobj(source, dest)
+                os.remove(path)
+            except FileNotFoundError:
+                # Ya lo comprimió otra instancia
+                pass
+        else:
+            self._closed.add(path)
+        closed = [old for old in self.segments()
+                  if not old.endswith(".jsonl") or old in self._closed or self._abandoned(old)]
+        for old in closed[:-self.keep or None]:
+            try:
+                os.remove(old)
+            except FileNotFoundError:
+                pass
+            self._closed.discard(old)
+
+    def _rotate(self):
+        if self._file is None:
+            return
+        self._file.close()
+        path, self._file, self._path = self._path, None, None
+        self._finish(path)
+
+    def _write_batch(self, records):
+        if self._file is not None and time.monotonic() - self._opened >= self.max_age:
+            self._rotate()
+        chunk = []
+        for ts, level, message in records:
+            if self._file is None:
+                self._open_segment()
+            line = json.dumps({"ts": round(ts, 3), "level": level, "message": message},
+                              ensure_ascii=False) + "\n"
+            chunk.append(line)
+            self._size += len(line.encode("utf-8"))
+            if self._size >= self.max_bytes:
+                self._file.write("".join(chunk))
+                chunk = []
+                self._rotate()
+        if chunk:
+            self._file.write("".join(chunk))
+            self._file.flush()
+        self.records_written += len(records)
+
+    def _run(self):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # Segmentos que quedaron abiertos en una sesión anterior (los de
+            # otra instancia en marcha se dejan a ella)
+            for path in self.segments():
+                if self._abandoned(path):
+                    self._finish(path)
+        except OSError as e:
+            self.last_error = str(e)
+
+        stopping = False
+        while not stopping:
+            records = []
+            markers = []
+            deadline = None
+            while True:
+                try:
+                    if deadline is None:
+                        item = self._queue.get()
+                        deadline = time.monotonic() + self.batch_interval
+                    else:
+                        item = self._queue.get(timeout=max(deadline - time.monotonic(), 0.001))
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                if isinstance(item, threading.Event):
+                    markers.append(item)
+                    break
+                records.append(item)
+
+            try:
+                if records:
+                    self._write_batch(records)
+                if stopping or any(isinstance(marker, _Rotate) for marker in markers):
+                    self._rotate()
+            except OSError as e:
+                self.last_error = str(e)
+            for marker in markers:
+                marker.set()
+
+    def segments(self):
+        """Rutas de los segmentos en orden cronológico (el actual incluido)"""
+        try:
+            names = sorted(name for name in os.listdir(self.directory)
+                           if name.startswith(SEGMENT_PREFIX))
+        except OSError:
+            return []
+        return [os.path.join(self.directory, name) for name in names]
+
+    def flush(self, timeout=5):
+        """Esperar a que se escriba todo lo encolado hasta ahora (no usar en la GUI)"""
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def export(self, destination, timeout=10):
+        """Cerrar el segmento actual y copiar todos a ``destination`` (no usar en la GUI).
+
+        Devuelve la lista de ficheros copiados.
+        """
+        marker = _Rotate()
+        self._queue.put(marker)
+        marker.wait(timeout)
+        os.makedirs(destination, exist_ok=True)
+        copied = []
+        for path in self.segments():
+            if path == self._path:
+                # Segmento abierto con lo llegado después del marcador
+                continue
+            try:
+                copied.append(shutil.copy2(path, destination))
+            except FileNotFoundError:
+                # Borrado por la rotación mientras se copiaba
+                continue
+        return copied
+
+    def close(self, timeout=5):
+        self.closed = True
+        self._queue.put(_STOP)
+        self._writer.join(timeout)
+
+
+_sink = None
+
+
+def get_log_sink():
+    """Registro de logs compartido por toda la aplicación"""
+    global _sink
+    if _sink is None or _sink.closed:
+        _sink = LogSink()
+    return _sink
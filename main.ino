@@ -8,6 +8,18 @@
 // Configuración del servidor web
 WebServer server(80);
 
+// Canal de eventos (Server-Sent Events). WebServer atiende las peticiones de
+// una en una, así que las conexiones permanentes van en un puerto aparte.
+#define EVENTS_PORT 81
+#define MAX_EVENT_CLIENTS 4
+#define EVENT_PING_INTERVAL 15000
+#define EVENT_REQUEST_TIMEOUT 50  // ms máximos leyendo la petición de un cliente
+WiFiServer eventServer(EVENTS_PORT);
+std::vector<WiFiClient> eventClients;
+unsigned long lastEventPing = 0;
+unsigned long lastStatusCheck = 0;
+uint32_t lastStatusHash = 0;
+
 // Variables globales
 String connectedSSID = "";
 IPAddress deviceIP;
@@ -42,6 +54,19 @@ struct WiFiNetwork {
 std::vector<NetworkDevice> detectedDevices;
 std::set<String> uniqueSSIDs; // Para evitar SSIDs duplicados
 
+// Versión de la lista de dispositivos: cambia cuando un dispositivo aparece,
+// desaparece o cambia de estado. Forma parte del ETag de /devices (ver
+// devicesEtag) para que el cliente reciba un 304 si no hubo cambios.
+uint32_t devicesVersion = 1;
+
+// Pasos con que entran en el ETag de /devices los valores que cambian en cada
+// escaneo: "Última Conexión" se refresca al menos cada 30 s y el tiempo de
+// respuesta cuando cambia de franja, sin invalidar la lista en cada escaneo
+const unsigned long DEVICES_ETAG_SEEN_STEP = 30000;
+const int DEVICES_ETAG_RESPONSE_STEP = 50;
+// Último ETag de /devices anunciado por el canal de eventos
+String lastDevicesEtag = "";
+
 void setup() {
   Serial.begin(115200);
   delay(2000);
@@ -65,6 +90,19 @@ void setup() {
 
 void loop() {
   server.handleClient();
+  acceptEventClients();
+  
+  // Avisar de cambios de estado de la conexión
+  if (millis() - lastStatusCheck > 1000) {
+    checkStatusChange();
+    lastStatusCheck = millis();
+  }
+  
+  // Comentario de keep-alive para que los clientes detecten cortes
+  if (millis() - lastEventPing > EVENT_PING_INTERVAL) {
+    broadcastEvent(": ping\n\n");
+    lastEventPing = millis();
+  }
   
   // Actualizar escaneo de dispositivos según intervalo configurado
   if (millis() - lastScan > SCAN_INTERVAL) {
@@ -81,6 +119,10 @@ void setupWebServer() {
   // Configurar CORS para todas las rutas
   server.enableCORS(true);
   
+  // Cabeceras necesarias para las respuestas condicionales (ETag)
+  const char* headerKeys[] = {"If-None-Match"};
+  server.collectHeaders(headerKeys, 1);
+  
   // Endpoint para obtener redes WiFi disponibles (mejorado)
   server.on("/scan", HTTP_GET, handleScanWiFi);
   
@@ -113,7 +155,76 @@ void setupWebServer() {
   
   // Iniciar servidor
   server.begin();
+  eventServer.begin();
   Serial.println("Servidor web iniciado en puerto 80");
+  Serial.printf("Canal de eventos en puerto %d\n", EVENTS_PORT);
+}
+
+void acceptEventClients() {
+  WiFiClient client = eventServer.available();
+  if (!client) return;
+  
+  // Descartar la petición: cualquier GET recibe el flujo de eventos. Solo se
+  // lee lo que ya ha llegado (readStringUntil esperaría hasta 1 s por línea),
+  // hasta la línea en blanco o EVENT_REQUEST_TIMEOUT ms, para no frenar loop()
+  unsigned long start = millis();
+  int newlines = 0;
+  while (client.connected() && millis() - start < EVENT_REQUEST_TIMEOUT) {
+    if (!client.available()) {
+      delay(1);
+      continue;
+    }
+    char c = client.read();
+    if (c == '\n') {
+      if (++newlines == 2) break;
+    } else if (c != '\r') {
+      newlines = 0;
+    }
+  }
+  
+  if (eventClients.size() >= MAX_EVENT_CLIENTS) {
+    client.print("HTTP/1.1 503 Service Unavailable\r\nContent-Length: 0\r\nConnection: close\r\n\r\n");
+    client.stop();
+    return;
+  }
+  
+  client.print("HTTP/1.1 200 OK\r\n"
+               "Content-Type: text/event-stream\r\n"
+               "Cache-Control: no-cache\r\n"
+               "Connection: close\r\n"
+               "Access-Control-Allow-Origin: *\r\n\r\n"
+               "retry: 3000\n\n");
+  eventClients.push_back(client);
+  Serial.printf("Cliente de eventos conectado (%d)\n", eventClients.size());
+}
+
+void broadcastEvent(const String& message) {
+  for (auto it = eventClients.begin(); it != eventClients.end();) {
+    if (!it->connected()) {
+      it->stop();
+      it = eventClients.erase(it);
+      continue;
+    }
+    it->print(message);
+    ++it;
+  }
+}
+
+void sendEvent(const char* name, JsonDocument& doc) {
+  if (eventClients.empty()) return;
+  String payload;
+  serializeJson(doc, payload);
+  broadcastEvent(String("event: ") + name + "\ndata: " + payload + "\n\n");
+}
+
+void checkStatusChange() {
+  uint32_t hash = statusHash();
+  if (hash == lastStatusHash) return;
+  lastStatusHash = hash;
+  
+  DynamicJsonDocument doc(512);
+  fillStatus(doc);
+  sendEvent("status", doc);
 }
 
 void handleCORS() {
@@ -123,6 +234,26 @@ void handleCORS() {
   server.send(200, "text/plain", "");
 }
 
+// Enviar el ETag y responder 304 si el cliente ya tiene esa versión
+bool sendNotModified(const String& etag) {
+  server.sendHeader("ETag", etag);
+  if (server.header("If-None-Match") == etag) {
+    server.send(304, "application/json", "");
+    return true;
+  }
+  return false;
+}
+
+// Hash FNV-1a para construir ETags a partir de los campos de una respuesta
+uint32_t fnv1a(const String& text) {
+  uint32_t hash = 2166136261UL;
+  for (size_t i = 0; i < text.length(); i++) {
+    hash ^= (uint8_t)text[i];
+    hash *= 16777619UL;
+  }
+  return hash;
+}
+
 void handleScanWiFi() {
   Serial.println("Escaneando redes WiFi...");
   
@@ -207,6 +338,11 @@ void handleScanWiFi() {
   serializeJson(doc, response);
   server.send(200, "application/json", response);
   
+  DynamicJsonDocument event(128);
+  event["type"] = "wifi";
+  event["totalNetworks"] = uniqueNetworks.size();
+  sendEvent("scan", event);
+  
   Serial.printf("Escaneo completado. Redes únicas encontradas: %d\n", uniqueNetworks.size());
 }
 
@@ -242,10 +378,50 @@ void handleConnect() {
   server.send(200, "application/json", response);
 }
 
+// Hash del estado de la conexión: todo salvo el uptime, con el RSSI agrupado
+// en pasos de 3 dB. Sirve de ETag para /status y para el evento "status".
+uint32_t statusHash() {
+  String fingerprint = String(WiFi.status() == WL_CONNECTED);
+  if (WiFi.status() == WL_CONNECTED) {
+    fingerprint += WiFi.SSID() + WiFi.localIP().toString() + WiFi.BSSIDstr() +
+                   String(WiFi.channel()) + String(WiFi.RSSI() / 3);
+  }
+  return fnv1a(fingerprint);
+}
+
+// ETag de /devices: la versión de la lista más un hash de los campos en vivo
+// (última vez visto, tiempo online y de respuesta, RSSI en pasos de 3 dB)
+String devicesEtag() {
+  String fingerprint = String(devicesVersion);
+  for (const auto &device : detectedDevices) {
+    if (device.active) {
+      // El tiempo online es lastSeen - firstSeen y firstSeen solo cambia con la versión
+      fingerprint += device.ip.toString() + String(device.lastSeen / DEVICES_ETAG_SEEN_STEP) +
+                     String(device.responseTime / DEVICES_ETAG_RESPONSE_STEP);
+    }
+  }
+  if (WiFi.status() == WL_CONNECTED) {
+    fingerprint += String(WiFi.RSSI() / 3);
+  }
+  return "\"d" + String(devicesVersion) + "-" + String(fnv1a(fingerprint), HEX) + "\"";
+}
+
 void handleStatus() {
   server.sendHeader("Access-Control-Allow-Origin", "*");
   
+  if (sendNotModified("\"s" + String(statusHash(), HEX) + "\"")) {
+    return;
+  }
+  
   DynamicJsonDocument doc(512);
+  fillStatus(doc);
+  
+  String response;
+  serializeJson(doc, response);
+  server.send(200, "application/json", response);
+}
+
+void fillStatus(JsonDocument& doc) {
   doc["connected"] = (WiFi.status() == WL_CONNECTED);
   
   if (WiFi.status() == WL_CONNECTED) {
@@ -260,15 +436,15 @@ void handleStatus() {
     // Calcular tiempo de conexión
     doc["uptime"] = millis();
   }
-  
-  String response;
-  serializeJson(doc, response);
-  server.send(200, "application/json", response);
 }
 
 void handleDevices() {
   server.sendHeader("Access-Control-Allow-Origin", "*");
   
+  if (sendNotModified(devicesEtag())) {
+    return;
+  }
+  
   DynamicJsonDocument doc(4096);
   JsonArray devices = doc.createNestedArray("devices");
   
@@ -335,7 +511,19 @@ void handleDisconnect() {
   
   WiFi.disconnect();
   connectedSSID = "";
+  
+  DynamicJsonDocument event(1024);
+  event.createNestedArray("joined");
+  JsonArray left = event.createNestedArray("left");
+  for (const auto &device : detectedDevices) {
+    if (device.active) left.add(device.ip.toString());
+  }
   detectedDevices.clear();
+  devicesVersion++;
+  event["version"] = devicesVersion;
+  event["activeDevices"] = 0;
+  sendEvent("devices", event);
+  lastDevicesEtag = devicesEtag();
   
   Serial.println("Desconectado de WiFi");
   
@@ -372,6 +560,7 @@ void handleGetConfig() {
   doc["freeHeap"] = ESP.getFreeHeap();
   doc["uptime"] = millis();
   doc["version"] = "2.0.0";
+  doc["eventsPort"] = EVENTS_PORT;
   
   String response;
   serializeJson(doc, response);
@@ -424,6 +613,7 @@ void calculateNetworkRange() {
   
   networkAddr = IPAddress(network);
   broadcastAddr = IPAddress(broadcast);
+  devicesVersion++;
   
   Serial.println("Rango de red calculado:");
   Serial.printf("Red: %s\n", networkAddr.toString().c_str());
@@ -442,10 +632,13 @@ void scanNetworkDevices() {
   uint32_t network = (uint32_t)networkAddr;
   uint32_t broadcast = (uint32_t)broadcastAddr;
   
-  // Marcar todos los dispositivos como no activos
+  // Marcar todos los dispositivos como no activos (recordando su estado)
+  std::vector<bool> wasActive;
   for (auto &device : detectedDevices) {
+    wasActive.push_back(device.active);
     device.active = false;
   }
+  size_t previousCount = detectedDevices.size();
   
   int devicesFound = 0;
   unsigned long scanStartTime = millis();
@@ -499,7 +692,22 @@ void scanNetworkDevices() {
     delay(50);
   }
   
+  // Nueva versión si algún dispositivo apareció o cambió de estado
+  DynamicJsonDocument event(1024);
+  JsonArray joined = event.createNestedArray("joined");
+  JsonArray left = event.createNestedArray("left");
+  for (size_t i = 0; i < detectedDevices.size(); i++) {
+    bool before = i < previousCount && wasActive[i];
+    if (detectedDevices[i].active && !before) {
+      joined.add(detectedDevices[i].ip.toString());
+    } else if (!detectedDevices[i].active && before) {
+      left.add(detectedDevices[i].ip.toString());
+    }
+  }
+  bool changed = joined.size() > 0 || left.size() > 0;
+  
   // Remover dispositivos inactivos después de 2 minutos
+  size_t beforeCleanup = detectedDevices.size();
   detectedDevices.erase(
     std::remove_if(detectedDevices.begin(), detectedDevices.end(),
       [](const NetworkDevice& device) {
@@ -507,8 +715,27 @@ void scanNetworkDevices() {
       }),
     detectedDevices.end()
   );
+  if (changed || detectedDevices.size() != beforeCleanup) {
+    devicesVersion++;
+  }
   
   unsigned long scanDuration = millis() - scanStartTime;
+  
+  // También se avisa si solo cambiaron los campos en vivo del ETag: con el
+  // canal de eventos activo las interfaces no sondean /devices
+  String etag = devicesEtag();
+  bool refreshed = etag != lastDevicesEtag;
+  lastDevicesEtag = etag;
+  if (changed || refreshed) {
+    event["version"] = devicesVersion;
+    event["activeDevices"] = devicesFound;
+    sendEvent("devices", event);
+  }
+  DynamicJsonDocument scanEvent(128);
+  scanEvent["type"] = "devices";
+  scanEvent["duration"] = scanDuration;
+  scanEvent["activeDevices"] = devicesFound;
+  sendEvent("scan", scanEvent);
   Serial.printf("Escaneo completado en %lu ms. Dispositivos activos: %d\n", 
                 scanDuration, devicesFound);
 }
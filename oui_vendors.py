@@ -0,0 +1,258 @@
+"""Fabricante de un dispositivo a partir de su MAC (OUI).
+
+El registro OUI del IEEE tiene decenas de miles de líneas; interpretarlo al
+arrancar costaría cientos de milisegundos. En su lugar se compila una vez a
+``oui.bin``, un archivo binario de ancho fijo que se mapea en memoria:
+
+- cabecera: ``OUI1``, número de entradas y posición de los nombres;
+- ``count`` claves uint32 (el OUI de 24 bits) ordenadas;
+- ``count`` desplazamientos uint32 hacia la tabla de nombres;
+
+(todos los enteros en little-endian, así el archivo sirve en cualquier máquina)
+- nombres UTF-8 terminados en NUL, sin repetir.
+
+Abrirlo no lee nada del disco: las claves se consultan con ``bisect`` sobre un
+``memoryview`` del propio mapa y cada nombre se decodifica una sola vez.
+
+Para generar el archivo (acepta ``oui.csv``, ``oui.txt`` del IEEE o el
+``manuf`` de Wireshark)::
+
+    python oui_vendors.py oui.csv
+    python oui_vendors.py --download     # descarga oui.csv del IEEE y lo compila
+
+Sin ``oui.bin`` se usa una tabla pequeña incluida aquí (``FALLBACK_VENDORS``)
+con los fabricantes más habituales junto a un ESP32.
+"""
+import bisect
+import mmap
+import os
+import re
+import shutil
+import struct
+import sys
+from array import array
+
+OUI_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "oui.bin")
+
+MAGIC = b"OUI1"
+HEADER = struct.Struct("<4sII")
+IEEE_CSV_URL = "https://standards-oui.ieee.org/oui/oui.csv"
+
+# Fabricantes frecuentes en la red de un ESP32, para cuando no hay ``oui.bin``
+FALLBACK_VENDORS = {
+    0x18FE34: "Espressif Inc.",
+    0x240AC4: "Espressif Inc.",
+    0x246F28: "Espressif Inc.",
+    0x30AEA4: "Espressif Inc.",
+    0x3C71BF: "Espressif Inc.",
+    0x5CCF7F: "Espressif Inc.",
+    0x600194: "Espressif Inc.",
+    0xA4CF12: "Espressif Inc.",
+    0xB827EB: "Raspberry Pi Foundation",
+    0xDCA632: "Raspberry Pi Trading Ltd",
+    0xE45F01: "Raspberry Pi Trading Ltd",
+    0x000C29: "VMware, Inc.",
+    0x005056: "VMware, Inc.",
+    0x080027: "PCS Systemtechnik GmbH",
+    0x00155D: "Microsoft Corporation",
+}
+
+# Bit "administrado localmente": MAC aleatoria o asignada por software
+LOCAL_VENDOR = "MAC aleatoria"
+
+MEMO_SIZE = 8192
+
+_HEX = "0123456789ABCDEFabcdef"
+_LINE = re.compile(r"^\s*(?:MA-L,)?([0-9A-Fa-f]{2})[-:.]?([0-9A-Fa-f]{2})[-:.]?([0-9A-Fa-f]{2})"
+                   r"(?:\s+\(hex\))?[\s,]+(.+?)\s*$")
+
+
+def mac_prefix(mac):
+    """OUI de ``mac`` como entero, o -1 si no es una MAC válida"""
+    if not mac or len(mac) < 8:
+        return -1
+    digits = mac[0:2] + mac[3:5] + mac[6:8] if mac[2] in ":-" else mac[0:6]
+    if len(digits) != 6 or not all(c in _HEX for c in digits):
+        return -1
+    return int(digits, 16)
+
+
+class OuiIndex:
+    """Índice OUI -> fabricante sobre ``oui.bin`` mapeado en memoria"""
+
+    def __init__(self, path=OUI_PATH):
+        self.path = path
+        self._map = None
+        self._keys = ()
+        self._offsets = ()
+        self._names = {}
+        self._memo = {}
+        try:
+            with open(path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            # Sin archivo compilado (o vacío): solo la tabla FALLBACK_VENDORS
+            return
+
+        start = HEADER.size
+        try:
+            magic, count, names_offset = HEADER.unpack_from(self._map, 0)
+        except struct.error:
+            magic = None
+        if magic != MAGIC or names_offset != start + 8 * count or len(self._map) < names_offset:
+            self.close()
+            return
+        view = memoryview(self._map)
+        self._keys = view[start:start + 4 * count].cast("I")
+        self._offsets = view[start + 4 * count:start + 8 * count].cast("I")
+        if sys.byteorder == "big":
+            # El archivo es little-endian: copiar las tablas dadas la vuelta
+            keys, offsets = array("I", self._keys), array("I", self._offsets)
+            keys.byteswap()
+            offsets.byteswap()
+            self._keys.release()
+            self._offsets.release()
+            self._keys, self._offsets = keys, offsets
+        self._names_offset = names_offset
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _name(self, offset):
+        name = self._names.get(offset)
+        if name is None:
+            start = self._names_offset + offset
+            end = self._map.find(b"\x00", start)
+            name = self._names[offset] = sys.intern(self._map[start:end].decode("utf-8", "replace"))
+        return name
+
+    def lookup_prefix(self, prefix):
+        if self._map is None:
+            return FALLBACK_VENDORS.get(prefix)
+        keys = self._keys
+        i = bisect.bisect_left(keys, prefix)
+        if i < len(keys) and keys[i] == prefix:
+            return self._name(self._offsets[i])
+        return None
+
+    def lookup(self, mac):
+        """Fabricante de ``mac`` o None si no se conoce"""
+        # Las MAC se repiten en cada sondeo: la mayoría de búsquedas son un acceso a dict
+        try:
+            return self._memo[mac]
+        except KeyError:
+            pass
+        prefix = mac_prefix(mac)
+        vendor = None
+        if prefix >= 0:
+            vendor = self.lookup_prefix(prefix)
+            if vendor is None and prefix & 0x020000:
+                vendor = LOCAL_VENDOR
+        if len(self._memo) >= MEMO_SIZE:
+            self._memo.clear()
+        self._memo[mac] = vendor
+        return vendor
+
+    def enrich(self, devices):
+        """Añadir ``vendor`` a cada dispositivo según su MAC (in situ)"""
+        for device in devices:
+            device.vendor = self.lookup(device.mac) or ""
+        return devices
+
+    def close(self):
+        # Los memoryview deben liberarse antes que el mapa
+        for view in (self._keys, self._offsets):
+            if isinstance(view, memoryview):
+                view.release()
+        self._keys = self._offsets = ()
+        self._memo.clear()
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+
+def parse_registry(lines):
+    """Recorrer un registro OUI en texto y devolver ``{oui: fabricante}``"""
+    vendors = {}
+    for line in lines:
+        if line.startswith("#"):
+            continue
+        match = _LINE.match(line)
+        if not match:
+            continue
+        # En el CSV del IEEE el nombre puede ir entre comillas y seguido de la dirección
+        name = match.group(4)
+        if name.startswith('"'):
+            name = name[1:name.find('"', 1)]
+        else:
+            name = name.split(",")[0].split("\t")[-1]
+        name = name.strip()
+        if name:
+            vendors.setdefault(int("".join(match.group(1, 2, 3)), 16), name)
+    return vendors
+
+
+def compile_registry(source, dest=OUI_PATH):
+    """Compilar un registro de texto a ``dest``; devuelve el número de entradas"""
+    with open(source, encoding="utf-8", errors="replace") as f:
+        vendors = parse_registry(f)
+
+    keys = array("I", sorted(vendors))
+    offsets = array("I")
+    names = {}
+    blob = bytearray()
+    for key in keys:
+        name = vendors[key]
+        if name not in names:
+            names[name] = len(blob)
+            blob += name.encode("utf-8") + b"\x00"
+        offsets.append(names[name])
+
+    if sys.byteorder == "big":
+        keys.byteswap()
+        offsets.byteswap()
+    tmp = dest + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(keys), HEADER.size + 8 * len(keys)))
+        keys.tofile(f)
+        offsets.tofile(f)
+        f.write(blob)
+    os.replace(tmp, dest)
+    return len(keys)
+
+
+def download_registry(dest="oui.csv"):
+    """Descargar el registro OUI del IEEE (CSV) a ``dest``"""
+    from urllib.request import Request, urlopen
+    # El servidor del IEEE rechaza las peticiones sin User-Agent de navegador
+    request = Request(IEEE_CSV_URL, headers={"User-Agent": "Mozilla/5.0"})
+    with urlopen(request, timeout=60) as response, open(dest, "wb") as f:
+        shutil.copyfileobj(response, f)
+    return dest
+
+
+_index = None
+
+
+def get_oui_index():
+    """Índice OUI compartido por toda la aplicación"""
+    global _index
+    if _index is None:
+        _index = OuiIndex()
+    return _index
+
+
+def enrich_vendors(devices):
+    return get_oui_index().enrich(devices)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3):
+        print("Uso: python oui_vendors.py <registro OUI | --download> [destino]")
+        sys.exit(1)
+    source = sys.argv[1]
+    if source == "--download":
+        source = download_registry()
+        print(f"Registro descargado de {IEEE_CSV_URL}")
+    total = compile_registry(source, *sys.argv[2:])
+    print(f"{total} fabricantes compilados")
@@ -0,0 +1,257 @@
+"""Planificador adaptativo de los sondeos al ESP32.
+
+Sustituye a los intervalos fijos (``status_timer``, ``refresh_interval``,
+``SCAN_INTERVAL``, el ``time.sleep`` de ``InterfazC1``) por un intervalo por
+operación que se ajusta solo:
+
+- Si la respuesta trae datos nuevos el intervalo se reduce a la mitad (hasta
+  ``minimum``); si no cambió nada (``304`` o el mismo registro reutilizado por
+  ``PayloadDecoder``) crece un 50 % (hasta ``maximum``).
+- Nunca se pide más a menudo que ``LATENCY_FACTOR`` veces la latencia media:
+  un ESP32 lento no pasa el día respondiendo.
+- Tras un error se espera ``interval * 2^fallos`` (como mucho ``MAX_BACKOFF``)
+  con jitter, en lugar de repetir la petición con el mismo ritmo.
+- ``boost`` acelera el sondeo durante unos segundos tras una acción del
+  usuario (conectar, cambiar de IP...) o un cambio detectado.
+- Todas las operaciones comparten un ``RequestBudget``: si se agota, lo que
+  vence se aplaza hasta que haya fichas.
+
+No depende de Qt ni de Tk: las interfaces llaman a ``due`` desde su timer o
+hilo, lanzan las peticiones devueltas y avisan del resultado con ``success``
+o ``failure``.
+"""
+import random
+import threading
+import time
+
+LATENCY_FACTOR = 10
+MAX_BACKOFF = 120.0     # s
+MIN_INTERVAL = 1.0      # s
+BOOST_DURATION = 30.0   # s
+JITTER = 0.1            # ±10 % en el intervalo normal
+DEFAULT_BUDGET = 60     # peticiones por minuto
+DEFAULT_BURST = 10
+
+
+def _entities(record):
+    """Redes de un ``WiFiScan`` o dispositivos de un ``DeviceList``"""
+    entities = getattr(record, "networks", None)
+    return getattr(record, "devices", None) if entities is None else entities
+
+
+def _entities_changed(record, last):
+    """Lista de entidades distinta de la anterior (objetos reutilizados o no)"""
+    entities, previous = _entities(record), _entities(last)
+    if entities is None or previous is None or len(entities) != len(previous):
+        return True
+    return any(entity is not old for entity, old in zip(entities, previous))
+
+
+class RequestBudget:
+    """Cubo de fichas: ``per_minute`` peticiones de media, ráfagas de ``burst``"""
+
+    def __init__(self, per_minute=DEFAULT_BUDGET, burst=DEFAULT_BURST, clock=time.monotonic):
+        self.rate = per_minute / 60.0
+        self.burst = burst
+        self.clock = clock
+        self.tokens = float(burst)
+        self.denied = 0
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def take(self, now=None, force=False):
+        """Gastar una ficha; con ``force`` se gasta aunque no quede (puede quedar en negativo)"""
+        with self._lock:
+            self._refill(self.clock() if now is None else now)
+            if self.tokens >= 1 or force:
+                self.tokens -= 1
+                return True
+            self.denied += 1
+            return False
+
+    def wait_time(self, now=None):
+        """Segundos hasta la próxima ficha"""
+        with self._lock:
+            self._refill(self.clock() if now is None else now)
+            return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+
+class Endpoint:
+    """Estado del sondeo de una operación"""
+
+    def __init__(self, operation, interval, minimum=None, maximum=None):
+        self.operation = operation
+        self.current = interval
+        self.failures = 0
+        self.latency = None
+        self.boost_until = 0.0
+        self.next_due = 0.0
+        self.forced = True
+        self.started = None
+        self.last = None
+        self.set_interval(interval, minimum, maximum)
+
+    def set_interval(self, interval, minimum=None, maximum=None):
+        self.interval = interval
+        self.minimum = max(interval / 4, MIN_INTERVAL) if minimum is None else minimum
+        self.maximum = interval * 6 if maximum is None else maximum
+        self.current = min(max(self.current, self.minimum), self.maximum)
+
+    def backoff(self):
+        return min(MAX_BACKOFF, self.interval * 2 ** self.failures)
+
+    def delay(self, now):
+        """Segundos hasta el siguiente sondeo según el último resultado"""
+        if self.failures:
+            backoff = self.backoff()
+            # Jitter "a medias": entre la mitad y el total del backoff
+            return backoff / 2 + random.uniform(0, backoff / 2)
+        delay = self.minimum if now < self.boost_until else self.current
+        if self.latency is not None:
+            delay = max(delay, self.latency * LATENCY_FACTOR)
+        return delay * random.uniform(1 - JITTER, 1 + JITTER)
+
+
+class PollScheduler:
+    """Intervalos de sondeo adaptativos para las operaciones de un ESP32"""
+
+    def __init__(self, budget=None, clock=time.monotonic):
+        self.budget = budget
+        self.clock = clock
+        self.endpoints = {}
+        self._lock = threading.Lock()
+
+    def add(self, operation, interval, minimum=None, maximum=None):
+        """Registrar una operación; vence enseguida (primer sondeo)"""
+        endpoint = Endpoint(operation, interval, minimum, maximum)
+        with self._lock:
+            self.endpoints[operation] = endpoint
+        return endpoint
+
+    def set_interval(self, operation, interval, minimum=None, maximum=None):
+        """Cambiar el intervalo base (p. ej. desde la configuración)"""
+        with self._lock:
+            endpoint = self.endpoints[operation]
+            endpoint.set_interval(interval, minimum, maximum)
+            endpoint.next_due = min(endpoint.next_due, self.clock() + endpoint.delay(self.clock()))
+
+    def interval(self, operation):
+        """Intervalo actual (sin jitter), para mostrarlo"""
+        endpoint = self.endpoints[operation]
+        return endpoint.backoff() if endpoint.failures else endpoint.current
+
+    def due(self, now=None, accept=None):
+        """Operaciones que toca pedir ahora, como ``(operación, forzada)``.
+
+        Las forzadas (primer sondeo o ``poll_now``) no esperan al presupuesto;
+        las demás se aplazan si no quedan fichas. ``accept(operación, forzada)``
+        puede descartar las que no procede pedir (p. ej. ``devices`` sin WiFi):
+        se reprograman sin gastar presupuesto.
+        """
+        now = self.clock() if now is None else now
+        ready = []
+        with self._lock:
+            for endpoint in self.endpoints.values():
+                if now < endpoint.next_due:
+                    continue
+                forced = endpoint.forced
+                if accept is not None and not accept(endpoint.operation, forced):
+                    endpoint.forced = False
+                    endpoint.next_due = now + endpoint.delay(now)
+                    continue
+                if self.budget is not None and not self.budget.take(now, force=forced):
+                    endpoint.next_due = now + self.budget.wait_time(now)
+                    continue
+                endpoint.forced = False
+                endpoint.started = now
+                # Si el resultado no llega, se vuelve a intentar tras el intervalo
+                endpoint.next_due = now + endpoint.delay(now)
+                ready.append((endpoint.operation, forced))
+        return ready
+
+    def next_delay(self, now=None):
+        """Segundos hasta el siguiente vencimiento (None si no hay operaciones)"""
+        now = self.clock() if now is None else now
+        with self._lock:
+            if not self.endpoints:
+                return None
+            return max(min(endpoint.next_due for endpoint in self.endpoints.values()) - now, 0.0)
+
+    def _finish(self, endpoint, now):
+        if endpoint.started is not None:
+            latency = now - endpoint.started
+            endpoint.latency = latency if endpoint.latency is None else \
+                0.8 * endpoint.latency + 0.2 * latency
+            endpoint.started = None
+        endpoint.next_due = now + endpoint.delay(now)
+
+    def success(self, operation, record=None):
+        """Respuesta recibida; ``record`` es None para un ``304``.
+
+        Hay cambio si el registro no es el mismo objeto que la vez anterior
+        (``PayloadDecoder`` reutiliza los que no cambian) y, para las listas,
+        si alguna red o dispositivo no es el que se recibió la vez anterior.
+        """
+        now = self.clock()
+        with self._lock:
+            endpoint = self.endpoints.get(operation)
+            if endpoint is None:
+                return False
+            changed = (record is not None and record is not endpoint.last
+                       and _entities_changed(record, endpoint.last))
+            if record is not None:
+                endpoint.last = record
+            endpoint.failures = 0
+            if changed:
+                endpoint.current = max(endpoint.minimum, endpoint.current / 2)
+            else:
+                endpoint.current = min(endpoint.maximum, endpoint.current * 1.5)
+            self._finish(endpoint, now)
+            return changed
+
+    def failure(self, operation):
+        """La petición falló: aplicar backoff exponencial con jitter"""
+        now = self.clock()
+        with self._lock:
+            endpoint = self.endpoints.get(operation)
+            if endpoint is None:
+                return
+            endpoint.failures += 1
+            endpoint.started = None
+            endpoint.next_due = now + endpoint.delay(now)
+
+    def boost(self, *operations, duration=BOOST_DURATION):
+        """Sondear al ritmo mínimo durante ``duration`` s (todas si no se indican)"""
+        now = self.clock()
+        with self._lock:
+            for endpoint in self.endpoints.values():
+                if operations and endpoint.operation not in operations:
+                    continue
+                endpoint.boost_until = now + duration
+                endpoint.failures = 0
+                endpoint.next_due = min(endpoint.next_due, now + endpoint.minimum)
+
+    def poll_now(self, *operations):
+        """Pedir las operaciones en el siguiente ``due`` (todas si no se indican)"""
+        with self._lock:
+            for endpoint in self.endpoints.values():
+                if operations and endpoint.operation not in operations:
+                    continue
+                endpoint.next_due = 0.0
+                endpoint.forced = True
+
+    def reset(self):
+        """Olvidar lo aprendido (p. ej. al cambiar de ESP32) y sondear ya"""
+        with self._lock:
+            for endpoint in self.endpoints.values():
+                endpoint.current = endpoint.interval
+                endpoint.failures = 0
+                endpoint.latency = None
+                endpoint.started = None
+                endpoint.last = None
+                endpoint.next_due = 0.0
+                endpoint.forced = True
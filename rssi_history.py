@@ -0,0 +1,145 @@
+"""Historial de RSSI por BSSID en buffers circulares de NumPy.
+
+Cada BSSID tiene un ``RssiRing`` de tamaño fijo con dos arrays (marca de tiempo
+y RSSI): añadir una muestra es escribir dos posiciones, y al llenarse se
+sobrescriben las más antiguas. No se crea ningún objeto Python por muestra.
+
+``RssiRing.downsample`` reduce la ventana visible a un número fijo de columnas
+con su mínimo y máximo (``np.minimum.reduceat``/``np.maximum.reduceat``), de
+modo que la gráfica dibuja siempre ``width`` segmentos aunque la ventana
+contenga horas de muestras. El resultado se guarda hasta que llega una muestra
+nueva o cambia la ventana.
+"""
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# 12 horas con el sondeo de /status cada 5 segundos
+DEFAULT_CAPACITY = 8640
+MAX_SERIES = 64
+
+
+class RssiRing:
+    """Buffer circular de muestras ``(ts, rssi)`` de un BSSID"""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, label=""):
+        self.label = label
+        self.ts = np.zeros(capacity, dtype=np.float64)
+        self.rssi = np.zeros(capacity, dtype=np.float32)
+        self.head = 0
+        self.count = 0
+        self.version = 0
+        self._cache_key = None
+        self._cache = None
+
+    @property
+    def capacity(self):
+        return len(self.ts)
+
+    def __len__(self):
+        return self.count
+
+    def append(self, ts, rssi):
+        self.ts[self.head] = ts
+        self.rssi[self.head] = rssi
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        self.version += 1
+
+    @property
+    def last(self):
+        """Última muestra como ``(ts, rssi)`` o None"""
+        if not self.count:
+            return None
+        i = self.head - 1
+        return float(self.ts[i]), float(self.rssi[i])
+
+    def _window(self, start, end):
+        """Vistas cronológicas (sin copiar) de las muestras entre ``start`` y ``end``"""
+        if self.count < self.capacity:
+            parts = [(self.ts[:self.count], self.rssi[:self.count])]
+        else:
+            parts = [(self.ts[self.head:], self.rssi[self.head:]),
+                     (self.ts[:self.head], self.rssi[:self.head])]
+        for ts, rssi in parts:
+            lo, hi = np.searchsorted(ts, (start, end))
+            if hi > lo:
+                yield ts[lo:hi], rssi[lo:hi]
+
+    def downsample(self, start, end, width):
+        """Mínimo y máximo de RSSI en ``width`` columnas de la ventana.
+
+        Devuelve ``(columnas, mínimos, máximos)``: índices de las columnas
+        que tienen muestras y sus valores extremos.
+        """
+        key = (self.version, start, end, width)
+        if key == self._cache_key:
+            return self._cache
+
+        edges = np.linspace(start, end, width + 1)
+        columns, lows, highs = [], [], []
+        for ts, rssi in self._window(start, end):
+            # Primera muestra de cada columna; las columnas vacías se descartan
+            bounds = np.searchsorted(ts, edges[:-1])
+            column = np.flatnonzero(np.diff(np.append(bounds, len(ts))) > 0)
+            starts = bounds[column]
+            columns.append(column)
+            lows.append(np.minimum.reduceat(rssi, starts))
+            highs.append(np.maximum.reduceat(rssi, starts))
+
+        if columns:
+            result = (np.concatenate(columns), np.concatenate(lows), np.concatenate(highs))
+        else:
+            empty = np.empty(0, dtype=np.float32)
+            result = (np.empty(0, dtype=np.intp), empty, empty)
+        self._cache_key, self._cache = key, result
+        return result
+
+
+class RssiHistory:
+    """Buffers de RSSI por BSSID; descarta los menos recientes si hay demasiados"""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, max_series=MAX_SERIES):
+        self.capacity = capacity
+        self.max_series = max_series
+        self.series = OrderedDict()
+        self.current = None
+
+    def add(self, key, rssi, ts=None, label=""):
+        if not key:
+            return
+        ring = self.series.get(key)
+        if ring is None:
+            ring = self.series[key] = RssiRing(self.capacity, label or key)
+            while len(self.series) > self.max_series:
+                self.series.popitem(last=False)
+        else:
+            self.series.move_to_end(key)
+            if label:
+                ring.label = label
+        ring.append(time.time() if ts is None else ts, rssi)
+
+    def add_scan(self, networks, ts=None):
+        """Registrar el RSSI de cada red de ``/scan``"""
+        ts = time.time() if ts is None else ts
+        for network in networks:
+            self.add(network.key, network.rssi, ts, network.ssid)
+
+    def add_status(self, status, ts=None):
+        """Registrar el RSSI del enlace actual de ``/status``"""
+        if not status.connected:
+            self.current = None
+            return
+        key = status.bssid or status.ssid
+        self.current = key
+        self.add(key, status.rssi, ts, status.ssid)
+
+    def strongest(self, count):
+        """Las ``count`` series con mejor RSSI reciente (la del enlace actual primero)"""
+        rings = sorted(self.series.items(), key=lambda item: -item[1].last[1])
+        keys = [key for key, _ in rings]
+        if self.current in self.series:
+            keys.remove(self.current)
+            keys.insert(0, self.current)
+        return [(key, self.series[key]) for key in keys[:count]]
@@ -0,0 +1,96 @@
+"""Gráfica de RSSI para la tarjeta "Mapa de Red".
+
+Dibuja las series de un ``rssi_history.RssiHistory``: por cada columna de
+píxeles un segmento vertical del mínimo al máximo de la ventana, así que el
+coste de repintar depende del ancho del widget y no del número de muestras.
+"""
+import math
+import time
+
+import numpy as np
+from PyQt6.QtCore import QLineF, QPointF, QRectF, Qt
+from PyQt6.QtGui import QColor, QPainter, QPen
+from PyQt6.QtWidgets import QSizePolicy, QWidget
+
+SERIES_COLORS = ["#007acc", "#4caf50", "#ff9800", "#e91e63", "#9c27b0",
+                 "#00bcd4", "#cddc39", "#795548"]
+
+# Umbrales de calidad de señal (ver esp32_records.signal_quality)
+QUALITY_LINES = [(-50, "#4caf50"), (-60, "#8bc34a"), (-70, "#ff9800")]
+
+RSSI_MIN = -100
+RSSI_MAX = -30
+
+
+class SignalChart(QWidget):
+    """Historial de RSSI de las redes más fuertes y del enlace actual"""
+
+    def __init__(self, history, span=600, max_series=6, parent=None):
+        super().__init__(parent)
+        self.history = history
+        self.span = span
+        self.max_series = max_series
+        self.setMinimumHeight(220)
+        self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+
+    def set_span(self, seconds):
+        self.span = seconds
+        self.update()
+
+    def _y(self, rssi, plot):
+        # Acepta un número o un array de NumPy
+        ratio = np.clip((rssi - RSSI_MIN) / (RSSI_MAX - RSSI_MIN), 0.0, 1.0)
+        return plot.bottom() - ratio * plot.height()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor("#1e1e1e"))
+        plot = QRectF(self.rect()).adjusted(44, 10, -10, -28)
+        if plot.width() < 10 or plot.height() < 10:
+            return
+        width = int(plot.width())
+
+        # Fin de la ventana alineado a la columna para reutilizar el downsample
+        step = self.span / width
+        end = math.ceil(time.time() / step) * step
+        start = end - self.span
+
+        painter.setPen(QColor("#3f3f46"))
+        painter.drawRect(plot)
+        for rssi, color in QUALITY_LINES:
+            y = float(self._y(rssi, plot))
+            line_color = QColor(color)
+            line_color.setAlpha(96)
+            painter.setPen(QPen(line_color, 1, Qt.PenStyle.DashLine))
+            painter.drawLine(QLineF(plot.left(), y, plot.right(), y))
+            painter.setPen(QColor("#888888"))
+            painter.drawText(QRectF(0, y - 8, 40, 16),
+                             Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter, str(rssi))
+
+        legend_x = plot.left()
+        for i, (key, ring) in enumerate(self.history.strongest(self.max_series)):
+            color = QColor(SERIES_COLORS[i % len(SERIES_COLORS)])
+            columns, lows, highs = ring.downsample(start, end, width)
+            if len(columns):
+                xs = (plot.left() + columns + 0.5).tolist()
+                y_low = self._y(lows, plot)
+                y_high = self._y(highs, plot)
+                middle = ((y_low + y_high) / 2).tolist()
+                painter.setPen(QPen(color, 2 if key == self.history.current else 1))
+                # Un segmento mín-máx por columna y uniones entre columnas contiguas
+                segments = [QLineF(x, a, x, b) for x, a, b in zip(xs, y_low.tolist(), y_high.tolist())]
+                segments += [QLineF(xs[j - 1], middle[j - 1], xs[j], middle[j])
+                             for j in range(1, len(xs)) if xs[j] - xs[j - 1] <= 3]
+                painter.drawLines(segments)
+                if len(xs) == 1:
+                    painter.drawPoint(QPointF(xs[0], middle[0]))
+
+            label = ring.label or key
+            if key == self.history.current:
+                label = f"★ {label}"
+            painter.setPen(color)
+            text_width = painter.fontMetrics().horizontalAdvance(label) + 16
+            painter.drawText(QRectF(legend_x, plot.bottom() + 6, text_width, 18),
+                             Qt.AlignmentFlag.AlignLeft, label)
+            legend_x += text_width
+        painter.end()
@@ -0,0 +1,131 @@
+"""Cálculo de subredes para cualquier máscara.
+
+``get_subnet(ip, mask)`` devuelve un ``Subnet`` inmutable y cacheado por
+``(ip, mask)``: la red, el broadcast y el rango de hosts se calculan una sola
+vez con aritmética entera y todas las vistas y barridos usan ese mismo objeto.
+La máscara puede darse como ``"255.255.255.240"``, ``"/28"`` o ``28``.
+"""
+import functools
+import socket
+
+try:
+    import numpy as np
+except ImportError:  # numpy solo hace falta para hosts_array()
+    np = None
+
+# Máscara que usa el firmware si no se conoce otra (/28)
+DEFAULT_MASK = "255.255.255.240"
+
+
+def ip_to_int(ip):
+    return int.from_bytes(socket.inet_aton(ip), "big")
+
+
+def int_to_ip(value):
+    return socket.inet_ntoa(value.to_bytes(4, "big"))
+
+
+def prefix_from_mask(mask):
+    """Convertir una máscara (punteada, ``/n`` o entero) a longitud de prefijo"""
+    if isinstance(mask, int):
+        prefix = mask
+    else:
+        mask = str(mask).strip()
+        if mask.startswith("/") or mask.isdigit():
+            prefix = int(mask.lstrip("/"))
+        else:
+            value = ip_to_int(mask)
+            prefix = bin(value).count("1")
+            if value != ((0xFFFFFFFF << (32 - prefix)) & 0xFFFFFFFF):
+                raise ValueError(f"Máscara no contigua: {mask}")
+    if not 0 <= prefix <= 32:
+        raise ValueError(f"Prefijo fuera de rango: {prefix}")
+    return prefix
+
+
+class Subnet:
+    """Subred IPv4 con sus direcciones precalculadas como enteros"""
+    __slots__ = ("ip", "prefix", "mask", "network", "broadcast",
+                 "first_host", "last_host", "_strings")
+
+    def __init__(self, ip, prefix):
+        self.ip = ip_to_int(ip)
+        self.prefix = prefix
+        self.mask = (0xFFFFFFFF << (32 - prefix)) & 0xFFFFFFFF
+        self.network = self.ip & self.mask
+        self.broadcast = self.network | (~self.mask & 0xFFFFFFFF)
+        if prefix >= 31:
+            # /31 y /32 no reservan red ni broadcast
+            self.first_host, self.last_host = self.network, self.broadcast
+        else:
+            self.first_host, self.last_host = self.network + 1, self.broadcast - 1
+        self._strings = None
+
+    @property
+    def host_count(self):
+        return self.last_host - self.first_host + 1
+
+    def _text(self):
+        if self._strings is None:
+            self._strings = (int_to_ip(self.network), int_to_ip(self.broadcast),
+                             int_to_ip(self.mask), int_to_ip(self.first_host),
+                             int_to_ip(self.last_host))
+        return self._strings
+
+    @property
+    def network_str(self):
+        return self._text()[0]
+
+    @property
+    def broadcast_str(self):
+        return self._text()[1]
+
+    @property
+    def mask_str(self):
+        return self._text()[2]
+
+    def range_text(self):
+        """Texto ``red - broadcast`` usado en las interfaces"""
+        network, broadcast = self._text()[:2]
+        return f"{network} - {broadcast}"
+
+    def hosts_text(self):
+        first, last = self._text()[3:]
+        return f"{first} - {last} ({self.host_count} hosts)"
+
+    def __contains__(self, ip):
+        value = ip if isinstance(ip, int) else ip_to_int(ip)
+        return value & self.mask == self.network
+
+    def hosts(self, exclude_self=False):
+        """Recorrer los hosts como enteros sin construir una lista"""
+        for value in range(self.first_host, self.last_host + 1):
+            if exclude_self and value == self.ip:
+                continue
+            yield value
+
+    def host_strings(self, exclude_self=False):
+        for value in self.hosts(exclude_self):
+            yield int_to_ip(value)
+
+    def hosts_array(self, exclude_self=False):
+        """Hosts como array NumPy uint32 (para barridos de /16)"""
+        if np is None:
+            raise ImportError("hosts_array() requiere numpy")
+        hosts = np.arange(self.first_host, self.last_host + 1, dtype=np.uint32)
+        if exclude_self and self.first_host <= self.ip <= self.last_host:
+            hosts = np.delete(hosts, self.ip - self.first_host)
+        return hosts
+
+    def __repr__(self):
+        return f"Subnet({self.network_str}/{self.prefix})"
+
+
+@functools.lru_cache(maxsize=64)
+def _cached_subnet(ip, prefix):
+    return Subnet(ip, prefix)
+
+
+def get_subnet(ip, mask=DEFAULT_MASK):
+    """Obtener la subred de ``ip`` con ``mask`` (cacheada)"""
+    return _cached_subnet(ip, prefix_from_mask(mask))
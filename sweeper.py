@@ -0,0 +1,158 @@
+"""Descubrimiento de dispositivos desde el PC.
+
+El firmware hace ping a cada host de uno en uno (``scanNetworkDevices`` en
+``main.ino``), así que incluso una /28 tarda segundos. ``SubnetSweeper`` barre
+la misma subred desde el PC con sondas TCP (y opcionalmente UDP) asíncronas:
+un número acotado de corrutinas consume los hosts de ``Subnet.hosts()``, con
+un límite de sondas por segundo y un timeout por host.
+
+Un host se considera activo si acepta una conexión TCP o la rechaza con RST,
+o si responde a la sonda UDP o devuelve "puerto inalcanzable". Los resultados
+tienen el mismo formato que los dispositivos de ``/devices`` para poder
+mezclarlos con ``merge_devices``.
+"""
+import asyncio
+import time
+
+from esp32_records import Device
+from subnet import ip_to_int
+
+# Puertos habituales en equipos domésticos y de oficina
+DEFAULT_TCP_PORTS = (80, 443, 22, 445, 139, 53, 8080, 62078)
+DEFAULT_UDP_PORTS = (137,)
+
+SWEEP_DEVICE_TYPE = "Detectado por PC"
+
+
+class RateLimiter:
+    """Espaciar el inicio de las sondas para no superar ``rate`` por segundo"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class _UDPProbe(asyncio.DatagramProtocol):
+    def __init__(self):
+        self.done = asyncio.get_running_loop().create_future()
+
+    def datagram_received(self, data, addr):
+        if not self.done.done():
+            self.done.set_result(True)
+
+    def error_received(self, exc):
+        # ICMP "puerto inalcanzable": el host existe
+        if not self.done.done():
+            self.done.set_result(isinstance(exc, ConnectionRefusedError))
+
+
+class SubnetSweeper:
+    """Barrido concurrente de una ``subnet.Subnet``"""
+
+    def __init__(self, subnet, tcp_ports=DEFAULT_TCP_PORTS, udp_ports=DEFAULT_UDP_PORTS,
+                 concurrency=64, rate=1000, timeout=0.6, exclude=()):
+        self.subnet = subnet
+        self.tcp_ports = tuple(tcp_ports)
+        self.udp_ports = tuple(udp_ports)
+        self.concurrency = concurrency
+        self.rate = rate
+        self.timeout = timeout
+        self.exclude = set(exclude)
+        self.probes_sent = 0
+
+    async def _probe_tcp(self, ip, port):
+        await self._limiter.acquire()
+        self.probes_sent += 1
+        try:
+            _, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), self.timeout)
+        except ConnectionRefusedError:
+            return True
+        except (asyncio.TimeoutError, OSError):
+            return False
+        writer.close()
+        return True
+
+    async def _probe_udp(self, ip, port):
+        await self._limiter.acquire()
+        self.probes_sent += 1
+        loop = asyncio.get_running_loop()
+        try:
+            transport, protocol = await loop.create_datagram_endpoint(
+                _UDPProbe, remote_addr=(ip, port))
+        except OSError:
+            return False
+        try:
+            transport.sendto(b"\x00")
+            return await asyncio.wait_for(protocol.done, self.timeout)
+        except (asyncio.TimeoutError, OSError):
+            return False
+        finally:
+            transport.close()
+
+    async def probe_host(self, ip):
+        """Devolver el tiempo de respuesta en ms, o None si no responde"""
+        start = time.monotonic()
+        probes = [self._probe_tcp(ip, port) for port in self.tcp_ports]
+        probes += [self._probe_udp(ip, port) for port in self.udp_ports]
+        tasks = [asyncio.ensure_future(probe) for probe in probes]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                if await finished:
+                    return int((time.monotonic() - start) * 1000)
+        finally:
+            for task in tasks:
+                task.cancel()
+        return None
+
+    async def sweep_async(self):
+        """Barrer la subred y devolver los dispositivos activos"""
+        self._limiter = RateLimiter(self.rate)
+        self.probes_sent = 0
+        hosts = self.subnet.host_strings(exclude_self=True)
+        found = []
+
+        async def worker():
+            for ip in hosts:
+                if ip in self.exclude:
+                    continue
+                response_time = await self.probe_host(ip)
+                if response_time is not None:
+                    found.append(swept_device(ip, response_time))
+
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        found.sort(key=lambda device: device.ip_int)
+        return found
+
+    def sweep(self):
+        """Versión bloqueante de ``sweep_async`` (para hilos de trabajo)"""
+        return asyncio.run(self.sweep_async())
+
+
+def swept_device(ip, response_time):
+    """``Device`` con el mismo formato que los de ``/devices``"""
+    now = int(time.time() * 1000)
+    return Device(ip, ip_to_int(ip), SWEEP_DEVICE_TYPE, active=True, last_seen=now,
+                  first_seen=now, response_time=response_time)
+
+
+def merge_devices(esp32_devices, swept_devices):
+    """Unir la lista de ``/devices`` con la del barrido local, por IP.
+
+    Los datos del ESP32 tienen prioridad; del barrido solo se añaden las IPs
+    que el ESP32 no conoce.
+    """
+    merged = list(esp32_devices)
+    known = {device.ip_int for device in merged}
+    merged.extend(device for device in swept_devices if device.ip_int not in known)
+    return merged
@@ -0,0 +1,438 @@
+"""Modelos de tabla (model/view) para redes WiFi y dispositivos.
+
+Los datos se guardan por columnas en un ``ColumnStore``: las IPs como
+enteros uint32, los valores numéricos (RSSI, canal, tiempos) en ``array`` de
+enteros y los textos (MAC, hostname, SSID...) como cadenas internadas, de modo
+que los valores repetidos comparten un único objeto. La vista solo pide las
+celdas visibles, así que una /22 con miles de hosts se dibuja y ordena sin
+crear un objeto por celda.
+
+``update_rows`` aplica cada sondeo como un diff por clave: elimina, inserta o
+marca como modificadas solo las filas que cambiaron, por lo que la selección y
+el scroll de la vista se conservan.
+"""
+import sys
+from array import array
+from datetime import datetime
+
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, QSortFilterProxyModel, Qt
+from PyQt6.QtGui import QColor
+
+from esp32_records import signal_quality, signal_text
+from fleet import device_key
+from subnet import int_to_ip, ip_to_int
+
+SORT_ROLE = Qt.ItemDataRole.UserRole + 1
+
+_colors = {}
+
+
+def _color(name):
+    if name not in _colors:
+        _colors[name] = QColor(name)
+    return _colors[name]
+
+
+def ip_key(ip):
+    """Convertir ``"a.b.c.d"`` a entero uint32 (0 si no es válida)"""
+    try:
+        return ip_to_int(ip)
+    except (OSError, TypeError):
+        return 0
+
+
+def _runs(rows):
+    """Agrupar filas ordenadas en rangos contiguos ``(inicio, fin)``"""
+    start = end = None
+    for row in rows:
+        if start is None:
+            start = end = row
+        elif row == end + 1:
+            end = row
+        else:
+            yield start, end
+            start = end = row
+    if start is not None:
+        yield start, end
+
+
+class ColumnStore:
+    """Tabla por columnas con un índice clave -> fila"""
+
+    def __init__(self, schema):
+        # schema: lista de (nombre, typecode de array) o (nombre, None) para texto
+        self.schema = list(schema)
+        self.columns = {name: (array(code) if code else []) for name, code in self.schema}
+        self.keys = []
+        self.index = {}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def get(self, row, name):
+        return self.columns[name][row]
+
+    def _coerce(self, name, value):
+        if self.columns[name].__class__ is list:
+            return sys.intern(str(value))
+        return int(value or 0)
+
+    def append(self, key, values):
+        self.index[key] = len(self.keys)
+        self.keys.append(key)
+        for name, column in self.columns.items():
+            column.append(self._coerce(name, values.get(name, "" if column.__class__ is list else 0)))
+
+    def update(self, row, values):
+        """Actualizar una fila; devuelve True si algún valor cambió"""
+        changed = False
+        for name, value in values.items():
+            column = self.columns.get(name)
+            if column is None:
+                continue
+            value = self._coerce(name, value)
+            if column[row] != value:
+                column[row] = value
+                changed = True
+        return changed
+
+    def delete(self, start, stop):
+        """Eliminar las filas ``start:stop`` (llamar a ``reindex`` después)"""
+        del self.keys[start:stop]
+        for column in self.columns.values():
+            del column[start:stop]
+
+    def reindex(self):
+        self.index = {key: row for row, key in enumerate(self.keys)}
+
+    def clear(self):
+        self.delete(0, len(self.keys))
+        self.index = {}
+
+
+class ColumnTableModel(QAbstractTableModel):
+    """Modelo base: cada columna visible tiene métodos ``display_<id>``,
+    y opcionalmente ``sort_<id>``, ``foreground_<id>`` y ``background``"""
+    schema = []
+    headers = {}
+
+    def __init__(self, columns, parent=None):
+        super().__init__(parent)
+        self.store = ColumnStore(self.schema)
+        self.column_ids = list(columns)
+        self._display = [getattr(self, f"display_{c}") for c in self.column_ids]
+        self._sort = [getattr(self, f"sort_{c}", None) or getattr(self, f"display_{c}")
+                      for c in self.column_ids]
+        self._foreground = [getattr(self, f"foreground_{c}", None) for c in self.column_ids]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.store)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.column_ids)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.headers[self.column_ids[section]]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row, column = index.row(), index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self._display[column](row)
+        if role == SORT_ROLE:
+            return self._sort[column](row)
+        if role == Qt.ItemDataRole.ForegroundRole and self._foreground[column]:
+            color = self._foreground[column](row)
+            return _color(color) if color else None
+        if role == Qt.ItemDataRole.BackgroundRole:
+            color = self.background(row)
+            return _color(color) if color else None
+        return None
+
+    def background(self, row):
+        return None
+
+    def key_at(self, row):
+        return self.store.keys[row]
+
+    def record(self, row):
+        """Valores de una fila como diccionario"""
+        return {name: self.store.get(row, name) for name, _ in self.store.schema}
+
+    def update_rows(self, rows):
+        """Aplicar un sondeo completo: ``rows`` es una lista de ``(clave, valores)``"""
+        store = self.store
+        incoming = {}
+        for key, values in rows:
+            incoming.setdefault(key, values)
+
+        # Eliminar las filas que ya no están, de abajo hacia arriba
+        stale = sorted(row for key, row in store.index.items() if key not in incoming)
+        for start, end in reversed(list(_runs(stale))):
+            self.beginRemoveRows(QModelIndex(), start, end)
+            store.delete(start, end + 1)
+            self.endRemoveRows()
+        if stale:
+            store.reindex()
+
+        # Actualizar las existentes y reunir las nuevas
+        changed = []
+        new_rows = []
+        for key, values in incoming.items():
+            row = store.index.get(key)
+            if row is None:
+                new_rows.append((key, values))
+            elif store.update(row, values):
+                changed.append(row)
+
+        last_column = len(self.column_ids) - 1
+        for start, end in _runs(sorted(changed)):
+            self.dataChanged.emit(self.index(start, 0), self.index(end, last_column))
+
+        if new_rows:
+            first = len(store)
+            self.beginInsertRows(QModelIndex(), first, first + len(new_rows) - 1)
+            for key, values in new_rows:
+                store.append(key, values)
+            self.endInsertRows()
+
+    def set_values(self, key, values):
+        """Actualizar una sola fila (p. ej. al llegar un hostname resuelto)"""
+        row = self.store.index.get(key)
+        if row is not None and self.store.update(row, values):
+            self.dataChanged.emit(self.index(row, 0),
+                                  self.index(row, len(self.column_ids) - 1))
+
+    def clear(self):
+        self.beginResetModel()
+        self.store.clear()
+        self.endResetModel()
+
+
+class WiFiNetworksModel(ColumnTableModel):
+    """Redes WiFi del endpoint ``/scan``, una fila por SSID"""
+    schema = [("ssid", None), ("rssi", "i"), ("encryption", None),
+              ("channel", "i"), ("bssid", None)]
+    headers = {"ssid": "SSID", "rssi": "Señal (dBm)", "signal": "Señal",
+               "encryption": "Seguridad", "channel": "Canal"}
+
+    @staticmethod
+    def row_values(network):
+        """Convertir un ``WiFiNetwork`` en ``(clave, valores)``"""
+        return network.ssid, {
+            "ssid": network.ssid,
+            "rssi": network.rssi,
+            "encryption": network.encryption,
+            "channel": network.channel,
+            "bssid": network.bssid,
+        }
+
+    def display_ssid(self, row):
+        return self.store.columns["ssid"][row]
+
+    def display_rssi(self, row):
+        return str(self.store.columns["rssi"][row])
+
+    def sort_rssi(self, row):
+        return self.store.columns["rssi"][row]
+
+    def display_signal(self, row):
+        return signal_text(self.store.columns["rssi"][row])
+
+    sort_signal = sort_rssi
+
+    def foreground_signal(self, row):
+        return signal_quality(self.store.columns["rssi"][row])[1]
+
+    def display_encryption(self, row):
+        return self.store.columns["encryption"][row]
+
+    def display_channel(self, row):
+        channel = self.store.columns["channel"][row]
+        return str(channel) if channel else ""
+
+    def sort_channel(self, row):
+        return self.store.columns["channel"][row]
+
+
+class DevicesModel(ColumnTableModel):
+    """Dispositivos del endpoint ``/devices``, una fila por IP"""
+    schema = [("ip", "I"), ("type", None), ("mac", None), ("vendor", None), ("hostname", None),
+              ("active", "b"), ("last_seen", "q"), ("response_time", "i")]
+    headers = {"ip": "IP", "type": "Tipo", "mac": "MAC", "vendor": "Fabricante",
+               "hostname": "Hostname", "status": "Estado", "last_seen": "Última Conexión"}
+
+    @staticmethod
+    def row_values(device):
+        """Convertir un ``Device`` en ``(clave, valores)``"""
+        return device.ip_int, {
+            "ip": device.ip_int,
+            "type": device.type,
+            "mac": device.mac,
+            "vendor": device.vendor,
+            "hostname": device.hostname,
+            "active": 1 if device.active else 0,
+            "last_seen": device.last_seen or 0,
+            "response_time": device.response_time or 0,
+        }
+
+    def display_ip(self, row):
+        return int_to_ip(self.store.columns["ip"][row])
+
+    def sort_ip(self, row):
+        return self.store.columns["ip"][row]
+
+    def display_type(self, row):
+        return self.store.columns["type"][row]
+
+    def display_mac(self, row):
+        return self.store.columns["mac"][row]
+
+    def display_vendor(self, row):
+        return self.store.columns["vendor"][row]
+
+    def display_hostname(self, row):
+        return self.store.columns["hostname"][row]
+
+    def display_status(self, row):
+        return "🟢 Activo" if self.store.columns["active"][row] else "🔴 Inactivo"
+
+    def sort_status(self, row):
+        return self.store.columns["active"][row]
+
+    def foreground_status(self, row):
+        return "#4caf50" if self.store.columns["active"][row] else "#f44336"
+
+    def display_last_seen(self, row):
+        last_seen = self.store.columns["last_seen"][row]
+        if not last_seen:
+            return "N/A"
+        return datetime.fromtimestamp(last_seen / 1000).strftime('%H:%M:%S')
+
+    def sort_last_seen(self, row):
+        return self.store.columns["last_seen"][row]
+
+    def background(self, row):
+        # Destacar el propio dispositivo
+        return "#007acc20" if "Self" in self.store.columns["type"][row] else None
+
+    def active_count(self):
+        return sum(self.store.columns["active"])
+
+
+class FleetDevicesModel(DevicesModel):
+    """Dispositivos combinados de la flota, una fila por MAC (o IP)"""
+    schema = DevicesModel.schema + [("sources", None)]
+    headers = {**DevicesModel.headers, "sources": "Escáneres"}
+
+    @staticmethod
+    def row_values(entry):
+        """Convertir ``(Device, orígenes)`` de ``fleet.merge_devices``"""
+        device, sources = entry
+        values = DevicesModel.row_values(device)[1]
+        values["sources"] = ", ".join(sources)
+        return device_key(device), values
+
+    def display_sources(self, row):
+        return self.store.columns["sources"][row]
+
+
+class FleetNetworksModel(WiFiNetworksModel):
+    """Redes combinadas de la flota, una fila por BSSID"""
+    schema = WiFiNetworksModel.schema + [("sources", None)]
+    headers = {**WiFiNetworksModel.headers, "sources": "Escáneres"}
+
+    @staticmethod
+    def row_values(entry):
+        """Convertir ``(WiFiNetwork, orígenes)`` de ``fleet.merge_networks``"""
+        network, sources = entry
+        values = WiFiNetworksModel.row_values(network)[1]
+        values["sources"] = ", ".join(sources)
+        return network.key, values
+
+    def display_sources(self, row):
+        return self.store.columns["sources"][row]
+
+
+class ScannersModel(ColumnTableModel):
+    """Escáneres de la flota con el resultado de su último sondeo"""
+    schema = [("name", None), ("ip", None), ("state", None), ("online", "b"), ("rssi", "i"),
+              ("devices", "i"), ("latency", "i"), ("error", None)]
+    headers = {"name": "Escáner", "ip": "IP", "state": "Estado", "rssi": "Señal",
+               "devices": "Dispositivos", "latency": "Latencia", "error": "Último error"}
+
+    @staticmethod
+    def row_values(scanner):
+        status = scanner.status
+        return scanner.name, {
+            "name": scanner.name,
+            "ip": scanner.esp32_ip,
+            "state": scanner.state_text(),
+            "online": 1 if scanner.online else 0,
+            "rssi": status.rssi if status is not None and status.connected else 0,
+            "devices": sum(1 for device in scanner.devices if device.active),
+            "latency": -1 if scanner.latency is None else round(scanner.latency * 1000),
+            "error": scanner.error or "",
+        }
+
+    def display_name(self, row):
+        return self.store.columns["name"][row]
+
+    def display_ip(self, row):
+        return self.store.columns["ip"][row]
+
+    def display_state(self, row):
+        return self.store.columns["state"][row]
+
+    def foreground_state(self, row):
+        return "#4caf50" if self.store.columns["online"][row] else "#f44336"
+
+    def display_rssi(self, row):
+        rssi = self.store.columns["rssi"][row]
+        return signal_text(rssi) if rssi else ""
+
+    def sort_rssi(self, row):
+        return self.store.columns["rssi"][row]
+
+    def display_devices(self, row):
+        return str(self.store.columns["devices"][row])
+
+    def sort_devices(self, row):
+        return self.store.columns["devices"][row]
+
+    def display_latency(self, row):
+        latency = self.store.columns["latency"][row]
+        return f"{latency} ms" if latency >= 0 else ""
+
+    def sort_latency(self, row):
+        return self.store.columns["latency"][row]
+
+    def display_error(self, row):
+        return self.store.columns["error"][row]
+
+
+def attach_model(view, model, sort_column=0, order=Qt.SortOrder.AscendingOrder):
+    """Conectar ``model`` a ``view`` a través de un proxy de orden y filtro"""
+    proxy = QSortFilterProxyModel(view)
+    proxy.setSourceModel(model)
+    proxy.setSortRole(SORT_ROLE)
+    proxy.setFilterKeyColumn(-1)
+    proxy.setFilterCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+    proxy.setDynamicSortFilter(True)
+    view.setModel(proxy)
+    view.setSortingEnabled(True)
+    view.sortByColumn(sort_column, order)
+    return proxy
+
+
+def selected_record(view):
+    """Registro de la fila actual de ``view`` (o None)"""
+    index = view.currentIndex()
+    if not index.isValid():
+        return None
+    proxy = view.model()
+    return proxy.sourceModel().record(proxy.mapToSource(index).row())
+